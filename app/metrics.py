@@ -0,0 +1,306 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, date, time, timedelta
+from typing import Any, NamedTuple
+
+import pytz
+from sqlalchemy import Select, select, func, and_, or_, desc, distinct, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.utils import local_time, format_local_time
+from database.tables import Executors, Clients, Orders, OrdersResponses, ExecutorsViews, Professions, Jobs, \
+    ExecutorsJobs, OrdersJobs, DailyExecutorStats, DailyOrderStats, DailyProfessionStats, DailyRegistrationStats, \
+    RollupsState, UserRoles
+from settings import settings
+
+# Строк детализации на одной странице
+METRICS_PAGE_SIZE = 50
+
+
+class DayCount(NamedTuple):
+    day: date
+    count: int
+
+
+class ProfessionCount(NamedTuple):
+    profession: str
+    count: int
+
+
+@dataclass
+class MetricPage:
+    """Агрегаты метрики за период и одна страница строк детализации"""
+    count: int
+    by_day: list[DayCount]
+    rows: list[Row]
+    page: int
+    pages: int
+    by_profession: list[ProfessionCount] = field(default_factory=list)
+
+
+@dataclass
+class Metric:
+    """
+        Метрика по исходной таблице (created_at, разбивка по профессиям)
+        и ее дневной агрегат (rollup_count по дням rollup_day, колонка в daily_profession_stats)
+    """
+    created_at: InstrumentedAttribute
+    rollup_day: InstrumentedAttribute
+    rollup_count: InstrumentedAttribute
+    rollup_filter: ColumnElement | None = None
+    by_profession_stmt: Select | None = None
+    rollup_profession_count: InstrumentedAttribute | None = None
+
+
+def parse_period(start_date: str, end_date: str) -> tuple[datetime, datetime]:
+    """Переводим даты из строк в datetime и вычитаем три часа для нормального сравнения в БД"""
+    start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
+    end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
+    return start_date_formatted, end_date_formatted
+
+
+def profession_count(counted: Any) -> Select:
+    """Количество уникальных counted по профессиям"""
+    return select(Professions.title.label("profession"), func.count(distinct(counted)).label("count"))
+
+
+def day_start_utc(day: date) -> datetime:
+    """Начало дня по settings.timezone во времени БД (UTC без таймзоны)"""
+    tz = pytz.timezone(settings.timezone)
+    return tz.localize(datetime.combine(day, time())).astimezone(pytz.utc).replace(tzinfo=None)
+
+
+async def rollup_days(session: AsyncSession, start_date: datetime, end_date: datetime) -> tuple[date, date] | None:
+    """
+        Полные дни периода [первый, последний) по settings.timezone, для которых агрегаты уже посчитаны.
+        None если таких дней нет и считать нужно по исходным таблицам
+    """
+    state = await session.get(RollupsState, 1)
+    if state is None:
+        return None
+
+    tz = pytz.timezone(settings.timezone)
+    start_local = pytz.utc.localize(start_date).astimezone(tz)
+    end_local = pytz.utc.localize(end_date).astimezone(tz)
+
+    # Неполный первый день периода считается по исходной таблице
+    first_day = start_local.date() if start_local.time() == time() else start_local.date() + timedelta(days=1)
+    refreshed_day = pytz.utc.localize(state.refreshed_until).astimezone(tz).date()
+
+    first_day = max(first_day, state.complete_from)
+    last_day = min(end_local.date(), refreshed_day)
+    return (first_day, last_day) if first_day < last_day else None
+
+
+async def metric_totals(session: AsyncSession, metric: Metric, start_date: datetime, end_date: datetime,
+                        with_professions: bool = True) -> tuple[list[DayCount], list[ProfessionCount]]:
+    """
+        Разбивка метрики по дням и профессиям за период.
+        Полные дни берутся из дневных агрегатов, края периода и еще не посчитанные дни - из исходной таблицы
+    """
+    created_at = metric.created_at
+    days = await rollup_days(session, start_date, end_date)
+
+    if days is None:
+        raw_period = and_(created_at > start_date, created_at < end_date)
+    else:
+        raw_period = or_(
+            and_(created_at > start_date, created_at < day_start_utc(days[0])),
+            and_(created_at >= day_start_utc(days[1]), created_at < end_date),
+        )
+
+    # День по московскому времени, группировка по имени колонки, а не по выражению с параметрами
+    day = func.date(local_time(created_at)).label("day")
+    raw_by_day = await session.execute(
+        select(day, func.count().label("count"))
+        .select_from(created_at.class_)
+        .where(raw_period)
+        .group_by(day)
+    )
+    by_day = [DayCount(row.day, row.count) for row in raw_by_day]
+
+    by_profession = Counter()
+    if with_professions and metric.by_profession_stmt is not None:
+        raw_by_profession = await session.execute(
+            metric.by_profession_stmt.where(raw_period).group_by(Professions.id, Professions.title)
+        )
+        by_profession.update({row.profession: row.count for row in raw_by_profession})
+
+    if days is not None:
+        rollup_period = and_(metric.rollup_day >= days[0], metric.rollup_day < days[1])
+        if metric.rollup_filter is not None:
+            rollup_period = and_(rollup_period, metric.rollup_filter)
+
+        rollup_by_day = await session.execute(
+            select(metric.rollup_day.label("day"), func.sum(metric.rollup_count).label("count"))
+            .where(rollup_period)
+            .group_by(metric.rollup_day)
+        )
+        by_day += [DayCount(row.day, row.count) for row in rollup_by_day if row.count]
+
+        if with_professions and metric.rollup_profession_count is not None:
+            rollup_by_profession = await session.execute(
+                select(Professions.title.label("profession"),
+                       func.sum(metric.rollup_profession_count).label("count"))
+                .join(Professions, Professions.id == DailyProfessionStats.profession_id)
+                .where(and_(DailyProfessionStats.day >= days[0], DailyProfessionStats.day < days[1],
+                            metric.rollup_profession_count > 0))
+                .group_by(Professions.id, Professions.title)
+            )
+            by_profession.update({row.profession: row.count for row in rollup_by_profession})
+
+    return (
+        sorted(by_day),
+        [ProfessionCount(profession, count) for profession, count in by_profession.most_common()],
+    )
+
+
+async def load_metric(session: AsyncSession, metric: Metric, start_date: datetime, end_date: datetime,
+                      rows_stmt: Select, page: int) -> MetricPage:
+    """
+        Общий счетчик и разбивка по дням (и по профессиям) считаются в БД,
+        из строк детализации выбирается только запрошенная страница
+    """
+    by_day, by_profession = await metric_totals(session, metric, start_date, end_date)
+    count = sum(row.count for row in by_day)
+
+    pages = max(math.ceil(count / METRICS_PAGE_SIZE), 1)
+    page = min(max(page, 1), pages)
+    rows = await session.execute(
+        rows_stmt
+        .where(and_(metric.created_at > start_date, metric.created_at < end_date))
+        .order_by(desc(metric.created_at))
+        .limit(METRICS_PAGE_SIZE)
+        .offset((page - 1) * METRICS_PAGE_SIZE)
+    )
+
+    return MetricPage(
+        count=count, by_day=by_day, rows=rows.all(), page=page, pages=pages, by_profession=by_profession
+    )
+
+
+# Отклики на заказы, профессия берется из заказа
+ORDERS_RESPONSES = Metric(
+    created_at=OrdersResponses.created_at,
+    rollup_day=DailyOrderStats.day,
+    rollup_count=DailyOrderStats.responses,
+    by_profession_stmt=profession_count(OrdersResponses.id)
+    .select_from(OrdersResponses)
+    .join(OrdersJobs, OrdersJobs.order_id == OrdersResponses.order_id)
+    .join(Jobs, Jobs.id == OrdersJobs.job_id)
+    .join(Professions, Professions.id == Jobs.profession_id),
+    rollup_profession_count=DailyProfessionStats.responses,
+)
+
+# Просмотры исполнителей, профессия берется из профиля исполнителя
+EXECUTORS_VIEWS = Metric(
+    created_at=ExecutorsViews.created_at,
+    rollup_day=DailyExecutorStats.day,
+    rollup_count=DailyExecutorStats.views,
+    by_profession_stmt=profession_count(ExecutorsViews.id)
+    .select_from(ExecutorsViews)
+    .join(ExecutorsJobs, ExecutorsJobs.executor_id == ExecutorsViews.executor_id)
+    .join(Jobs, Jobs.id == ExecutorsJobs.job_id)
+    .join(Professions, Professions.id == Jobs.profession_id),
+    rollup_profession_count=DailyProfessionStats.views,
+)
+
+EXECUTORS_REGISTRATION = Metric(
+    created_at=Executors.created_at,
+    rollup_day=DailyRegistrationStats.day,
+    rollup_count=DailyRegistrationStats.count,
+    rollup_filter=DailyRegistrationStats.role == UserRoles.EXECUTOR.value,
+    by_profession_stmt=profession_count(Executors.id)
+    .select_from(Executors)
+    .join(ExecutorsJobs, ExecutorsJobs.executor_id == Executors.id)
+    .join(Jobs, Jobs.id == ExecutorsJobs.job_id)
+    .join(Professions, Professions.id == Jobs.profession_id),
+    rollup_profession_count=DailyProfessionStats.executors,
+)
+
+# Профессии у клиента нет
+CLIENTS_REGISTRATION = Metric(
+    created_at=Clients.created_at,
+    rollup_day=DailyRegistrationStats.day,
+    rollup_count=DailyRegistrationStats.count,
+    rollup_filter=DailyRegistrationStats.role == UserRoles.CLIENT.value,
+)
+
+
+async def orders_responses_metric(session: AsyncSession, start_date: datetime, end_date: datetime,
+                                  page: int) -> MetricPage:
+    """Отклики на заказы"""
+    rows_stmt = select(
+        OrdersResponses.order_id,
+        Orders.title.label("order_title"),
+        OrdersResponses.executor_id,
+        Executors.name.label("executor_name"),
+        OrdersResponses.text,
+        format_local_time(OrdersResponses.created_at).label("created_at"),
+    ) \
+        .select_from(OrdersResponses) \
+        .join(OrdersResponses.order) \
+        .join(OrdersResponses.executor)
+
+    return await load_metric(session, ORDERS_RESPONSES, start_date, end_date, rows_stmt, page)
+
+
+async def executors_views_metric(session: AsyncSession, start_date: datetime, end_date: datetime,
+                                 page: int) -> MetricPage:
+    """Просмотры исполнителей"""
+    rows_stmt = select(
+        ExecutorsViews.executor_id,
+        Executors.name.label("executor_name"),
+        ExecutorsViews.client_id,
+        Clients.name.label("client_name"),
+        format_local_time(ExecutorsViews.created_at).label("created_at"),
+    ) \
+        .select_from(ExecutorsViews) \
+        .join(ExecutorsViews.executor) \
+        .join(ExecutorsViews.client)
+
+    return await load_metric(session, EXECUTORS_VIEWS, start_date, end_date, rows_stmt, page)
+
+
+async def executors_registration_metric(session: AsyncSession, start_date: datetime, end_date: datetime,
+                                        page: int) -> MetricPage:
+    """Регистрации исполнителей"""
+    rows_stmt = select(
+        Executors.id,
+        Executors.tg_id,
+        Executors.name,
+        Executors.age,
+        Executors.description,
+        Executors.verified,
+        format_local_time(Executors.created_at).label("created_at"),
+    )
+
+    return await load_metric(session, EXECUTORS_REGISTRATION, start_date, end_date, rows_stmt, page)
+
+
+async def clients_registration_metric(session: AsyncSession, start_date: datetime, end_date: datetime,
+                                      page: int) -> MetricPage:
+    """Регистрации клиентов"""
+    rows_stmt = select(
+        Clients.id,
+        Clients.tg_id,
+        Clients.name,
+        format_local_time(Clients.created_at).label("created_at"),
+    )
+
+    return await load_metric(session, CLIENTS_REGISTRATION, start_date, end_date, rows_stmt, page)
+
+
+async def daily_metrics(session: AsyncSession, start_date: datetime, end_date: datetime) -> list[tuple]:
+    """Все метрики по дням: день, отклики, просмотры, регистрации исполнителей и клиентов"""
+    metrics = (ORDERS_RESPONSES, EXECUTORS_VIEWS, EXECUTORS_REGISTRATION, CLIENTS_REGISTRATION)
+    days: dict[date, list[int]] = {}
+    for idx, metric in enumerate(metrics):
+        by_day, _ = await metric_totals(session, metric, start_date, end_date, with_professions=False)
+        for row in by_day:
+            days.setdefault(row.day, [0] * len(metrics))[idx] = row.count
+
+    return [(day.strftime("%d.%m.%Y"), *counts) for day, counts in sorted(days.items())]
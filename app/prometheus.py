@@ -0,0 +1,60 @@
+import os
+import time
+
+from fastapi import FastAPI, Request
+from prometheus_client import REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from database.database import async_engine
+from settings import settings
+
+# Те же границы, что у метрик бота (utils/metrics.py не входит в образ админки)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+ADMIN_REQUEST_LATENCY = Histogram(
+    "admin_request_latency_seconds", "Время до ответа админки (для выгрузок CSV - до начала передачи)", ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+ADMIN_DB_POOL_CONNECTIONS = Gauge(
+    "admin_db_pool_connections", "Соединения пула SQLAlchemy админки: in_use - заняты, size - открыты", ["state"],
+    multiprocess_mode="livesum"
+)
+
+
+def instrument(app: FastAPI) -> None:
+    """Замер времени запросов по имени обработчика (число меток ограничено набором роутов)"""
+    @app.middleware("http")
+    async def observe_request(request: Request, call_next):
+        started = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            endpoint = request.scope.get("endpoint")
+            ADMIN_REQUEST_LATENCY.labels(getattr(endpoint, "__name__", "unmatched")).observe(
+                time.perf_counter() - started
+            )
+
+
+def sample_db_pool() -> None:
+    """Замер пула соединений админки перед сбором метрик"""
+    pool = async_engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        ADMIN_DB_POOL_CONNECTIONS.labels("in_use").set(pool.checkedout())
+        ADMIN_DB_POOL_CONNECTIONS.labels("size").set(pool.checkedin() + pool.checkedout())
+
+
+def collect_metrics() -> bytes:
+    """
+        Метрики в текстовом формате Prometheus. Если задан settings.metrics_dir, собираются все его подкаталоги:
+        процессы бота и админки (PROMETHEUS_MULTIPROC_DIR каждого процесса - подкаталог metrics_dir),
+        иначе только метрики процесса админки
+    """
+    sample_db_pool()
+    if not settings.metrics_dir:
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    for entry in sorted(os.scandir(settings.metrics_dir), key=lambda e: e.name):
+        if entry.is_dir():
+            MultiProcessCollector(registry, path=entry.path)
+    return generate_latest(registry)
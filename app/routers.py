@@ -1,164 +1,137 @@
-import os
+import secrets
 from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Sequence
 
-import pytz
-from fastapi import FastAPI, BackgroundTasks
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import joinedload
+from fastapi import FastAPI, Header, HTTPException
+from sqlalchemy import select, and_, desc, case
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from starlette.responses import FileResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.responses import StreamingResponse, Response
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
-from app.utils import write_csv_file
+from app.metrics import parse_period, daily_metrics
+from app.prometheus import instrument, collect_metrics
+from app.utils import stream_rows, stream_csv, iterate_rows, format_local_time
 from database.database import async_session_factory
-from database.tables import Executors, Clients, Orders, OrdersResponses, ExecutorsViews, User
+from database.tables import Executors, Clients, Orders, OrdersResponses, ExecutorsViews
 from settings import settings
 
 
 app = FastAPI()
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=["172.16.0.0/12"])
-app.add_middleware(TrustedHostMiddleware, allowed_hosts=["pruv2025.ru"])
+# app - имя сервиса в docker compose: Prometheus внутри сети собирает /metrics напрямую с app:8000
+app.add_middleware(TrustedHostMiddleware, allowed_hosts=["pruv2025.ru", "app"])
+instrument(app)
 
 
 # Отправка CSV
 @app.get("/export-csv/orders-responses/")
-async def export_csv_orders_responses(start_date: str, end_date: str, background_tasks: BackgroundTasks):
+async def export_csv_orders_responses(start_date: str, end_date: str, gzip: bool = False):
     """Отправка метрик откликов на заказы в сsv формате """
     # Переводим время в datetime
     start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
     end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
 
-    async with async_session_factory() as session:
-        stmt = select(OrdersResponses, Orders, Executors) \
-            .join(OrdersResponses.order) \
-            .join(OrdersResponses.executor) \
-            .where(and_(OrdersResponses.created_at > start_date_formatted, OrdersResponses.created_at < end_date_formatted)) \
-            .order_by(desc(OrdersResponses.created_at)) \
-            .options(joinedload(OrdersResponses.order)) \
-            .options(joinedload(OrdersResponses.executor))
-        result = await session.execute(stmt)
-        orders_responses = result.scalars().all()
-
-    # Переводим время на МСК
-    for item in orders_responses:
-        item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
-
-    # Форматируем даты для названия csv файла
-    start_date_for_filename, end_date_for_filename = generate_dates_for_filename(start_date_formatted, end_date_formatted)
-
-    # Записываем файл
-    filename = write_csv_file(orders_responses, model="orders_responses", start_date=start_date_for_filename,
-                              end_date=end_date_for_filename)
+    stmt = select(Orders.title, Executors.name, OrdersResponses.text, format_local_time(OrdersResponses.created_at)) \
+        .select_from(OrdersResponses) \
+        .join(OrdersResponses.order) \
+        .join(OrdersResponses.executor) \
+        .where(and_(OrdersResponses.created_at > start_date_formatted, OrdersResponses.created_at < end_date_formatted)) \
+        .order_by(desc(OrdersResponses.created_at))
 
-    # Отложенное удаление файла после отправки
-    background_tasks.add_task(os.remove, f"app/files/{filename}")
-
-    # Отправляем файл
-    return FileResponse(path=f"app/files/{filename}", filename=filename, media_type='multipart/form-data')
+    return csv_response(stream_rows(stmt), "orders_responses", start_date_formatted, end_date_formatted, gzip)
 
 
 @app.get("/export-csv/executors-views/")
-async def export_csv_executors_views(start_date: str, end_date: str, background_tasks: BackgroundTasks):
+async def export_csv_executors_views(start_date: str, end_date: str, gzip: bool = False):
     """Отправка метрик просмотра исполнителей в сsv формате"""
     # Переводим время в datetime
     start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
     end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
 
-    async with async_session_factory() as session:
-        stmt = select(ExecutorsViews, Executors, Clients) \
-            .join(ExecutorsViews.executor) \
-            .join(ExecutorsViews.client) \
-            .where(and_(ExecutorsViews.created_at > start_date_formatted, ExecutorsViews.created_at < end_date_formatted)) \
-            .order_by(desc(ExecutorsViews.created_at))\
-            .options(joinedload(ExecutorsViews.executor)) \
-            .options(joinedload(ExecutorsViews.client))
+    stmt = select(Executors.name, Clients.name, format_local_time(ExecutorsViews.created_at)) \
+        .select_from(ExecutorsViews) \
+        .join(ExecutorsViews.executor) \
+        .join(ExecutorsViews.client) \
+        .where(and_(ExecutorsViews.created_at > start_date_formatted, ExecutorsViews.created_at < end_date_formatted)) \
+        .order_by(desc(ExecutorsViews.created_at))
 
-        result = await session.execute(stmt)
-        executors_views = result.scalars().all()
-
-    # Переводим время на МСК
-    for item in executors_views:
-        item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
-
-    # Форматируем даты для названия csv файла
-    start_date_for_filename, end_date_for_filename = generate_dates_for_filename(start_date_formatted, end_date_formatted)
-
-    # Записываем файл
-    filename = write_csv_file(executors_views, model="executors_views", start_date=start_date_for_filename, end_date=end_date_for_filename)
-
-    # Отложенное удаление файла после отправки
-    background_tasks.add_task(os.remove, f"app/files/{filename}")
-
-    # Отправляем файл
-    return FileResponse(path=f"app/files/{filename}", filename=filename, media_type='multipart/form-data')
+    return csv_response(stream_rows(stmt), "executors_views", start_date_formatted, end_date_formatted, gzip)
 
 
 @app.get("/export-csv/executors-registration/")
-async def export_csv_executors_registration(start_date: str, end_date: str, background_tasks: BackgroundTasks):
+async def export_csv_executors_registration(start_date: str, end_date: str, gzip: bool = False):
     """Отправка метрик регистрации исполнителей в сsv формате """
     # Переводим время в datetime
     start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
     end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
 
-    async with async_session_factory() as session:
-        stmt = select(Executors, User) \
-            .join(Executors.user) \
-            .where(and_(Executors.created_at > start_date_formatted, Executors.created_at < end_date_formatted)) \
-            .order_by(desc(Executors.created_at)) \
-            .options(joinedload(Executors.user))
+    stmt = select(Executors.id, Executors.tg_id, Executors.name, Executors.age, Executors.description,
+                  case((Executors.verified, "Да"), else_="Нет"), format_local_time(Executors.created_at)) \
+        .where(and_(Executors.created_at > start_date_formatted, Executors.created_at < end_date_formatted)) \
+        .order_by(desc(Executors.created_at))
 
-        result = await session.execute(stmt)
-        executors = result.scalars().all()
-
-    # Переводим время на МСК
-    for item in executors:
-        item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
-
-    # Форматируем даты для названия csv файла
-    start_date_for_filename, end_date_for_filename = generate_dates_for_filename(start_date_formatted, end_date_formatted)
-
-    # Записываем файл
-    filename = write_csv_file(executors, model="executors_registration", start_date=start_date_for_filename, end_date=end_date_for_filename)
-
-    # Отложенное удаление файла после отправки
-    background_tasks.add_task(os.remove, f"app/files/{filename}")
-
-    # Отправляем файл
-    return FileResponse(path=f"app/files/{filename}", filename=filename, media_type='multipart/form-data')
+    return csv_response(stream_rows(stmt), "executors_registration", start_date_formatted, end_date_formatted, gzip)
 
 
 @app.get("/export-csv/clients-registration/")
-async def export_csv_clients_registration(start_date: str, end_date: str, background_tasks: BackgroundTasks):
+async def export_csv_clients_registration(start_date: str, end_date: str, gzip: bool = False):
     """Отправка метрик регистрации клиентов в сsv формате """
     # Переводим время в datetime
     start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
     end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
 
+    stmt = select(Clients.id, Clients.tg_id, Clients.name, format_local_time(Clients.created_at)) \
+        .where(and_(Clients.created_at > start_date_formatted, Clients.created_at < end_date_formatted)) \
+        .order_by(desc(Clients.created_at))
+
+    return csv_response(stream_rows(stmt), "clients_registration", start_date_formatted, end_date_formatted, gzip)
+
+
+@app.get("/export-csv/daily-metrics/")
+async def export_csv_daily_metrics(start_date: str, end_date: str, gzip: bool = False):
+    """Отправка всех метрик по дням в сsv формате, полные дни берутся из дневных агрегатов"""
+    start_date_formatted, end_date_formatted = parse_period(start_date, end_date)
+
     async with async_session_factory() as session:
-        stmt = select(Clients, User) \
-            .join(Clients.user) \
-            .where(and_(Clients.created_at > start_date_formatted, Clients.created_at < end_date_formatted)) \
-            .order_by(desc(Clients.created_at)) \
-            .options(joinedload(Clients.user))
+        rows = await daily_metrics(session, start_date_formatted, end_date_formatted)
 
-        result = await session.execute(stmt)
-        clients = result.scalars().all()
+    return csv_response(iterate_rows(rows), "daily_metrics", start_date_formatted, end_date_formatted, gzip)
 
-    # Переводим время на МСК
-    for item in clients:
-        item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
 
-    # Форматируем даты для названия csv файла
-    start_date_for_filename, end_date_for_filename = generate_dates_for_filename(start_date_formatted, end_date_formatted)
+# Метрики Prometheus
+@app.get("/metrics")
+def metrics(authorization: str | None = Header(default=None)) -> Response:
+    """Метрики процессов бота и админки в формате Prometheus"""
+    # Синхронный обработчик: чтение файлов multiprocess метрик выполняется в пуле потоков
+    # Без METRICS_TOKEN метрики не отдаются: порт админки опубликован наружу
+    if not settings.metrics_token:
+        raise HTTPException(status_code=404)
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.metrics_token}"):
+        raise HTTPException(status_code=401)
 
-    # Записываем файл
-    filename = write_csv_file(clients, model="clients_registration", start_date=start_date_for_filename, end_date=end_date_for_filename)
+    return Response(collect_metrics(), media_type=CONTENT_TYPE_LATEST)
 
-    # Отложенное удаление файла после отправки
-    background_tasks.add_task(os.remove, f"app/files/{filename}")
 
-    # Отправляем файл
-    return FileResponse(path=f"app/files/{filename}", filename=filename, media_type='multipart/form-data')
+def csv_response(rows: AsyncIterator[Sequence[Any]], model: str, start_date: datetime, end_date: datetime,
+                 gzip: bool) -> StreamingResponse:
+    """
+        Потоковая отдача csv файла: строки (stream_rows - серверный курсор) отправляются чанками,
+        файл не собирается целиком ни в памяти, ни на диске. gzip - отдать сжатый файл .csv.gz
+    """
+    # Форматируем даты для названия csv файла
+    start_date_for_filename, end_date_for_filename = generate_dates_for_filename(start_date, end_date)
+    filename = f"{start_date_for_filename}-{end_date_for_filename}.csv"
+    media_type = "text/csv; charset=utf-8"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        stream_csv(rows, model, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 def generate_dates_for_filename(start_date: datetime, end_date: datetime) -> (str, str):
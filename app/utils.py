@@ -1,58 +1,80 @@
-from typing import List, Any
+from typing import Any, AsyncIterator, Sequence
 import csv
+import io
+import zlib
 
+from sqlalchemy import Select, func
+from sqlalchemy.sql.elements import ColumnElement
 
-def write_csv_file(data: List[Any], model: str, start_date: str, end_date: str) -> str:
-    """Создает csv файл, возвращает путь до файла"""
-    filename = f"{start_date}-{end_date}.csv"
-    values = []
-    headers = []
+from database.database import async_session_factory
+from settings import settings
 
-    # Запись метрик откликов на заказы
-    if model == "orders_responses":
-        headers = ["№ п/п", "Заказ", "Исполнитель", "Текст", "Дата"]
+# Строк в одном чанке ответа и в одной выборке серверного курсора
+CSV_CHUNK_ROWS = 1000
 
-        for idx, item in enumerate(data, start=1):
-            row = [idx, item.order.title, item.executor.name, item.text, item.created_at]
-            values.append(row)
+CSV_HEADERS = {
+    "orders_responses": ["№ п/п", "Заказ", "Исполнитель", "Текст", "Дата"],
+    "executors_views": ["№ п/п", "Исполнитель", "Заказчик", "Дата"],
+    "executors_registration": ["№ п/п", "Id", "Телеграмм id", "Имя", "Возраст", "Описание", "Верифицирован",
+                               "Дата регистрации"],
+    "clients_registration": ["№ п/п", "Id", "Телеграмм id", "Имя", "Дата регистрации"],
+    "daily_metrics": ["№ п/п", "Дата", "Отклики", "Просмотры исполнителей", "Регистрации исполнителей",
+                      "Регистрации клиентов"],
+}
 
-    # Запись метрик просмотра исполнителей
-    elif model == "executors_views":
-        headers = ["№ п/п", "Исполнитель", "Заказчик", "Дата"]
 
-        for idx, item in enumerate(data, start=1):
-            row = [idx, item.executor.name, item.client.name, item.created_at]
-            values.append(row)
+def local_time(column: Any) -> ColumnElement:
+    """Перевод времени из БД (UTC без таймзоны) в settings.timezone на стороне БД"""
+    return func.timezone(settings.timezone, func.timezone("UTC", column))
 
-    # Запись метрик регистрации исполнителей
-    elif model == "executors_registration":
-        headers = ["№ п/п", "Id", "Телеграмм id", "Имя", "Возраст", "Описание", "Верифицирован", "Дата регистрации"]
 
-        for idx, item in enumerate(data, start=1):
-            if item.verified:
-                verified_formatted = "Да"
-            else:
-                verified_formatted = "Нет"
+def format_local_time(column: Any) -> ColumnElement:
+    """Время в settings.timezone строкой дд.мм.гггг чч:мм"""
+    return func.to_char(local_time(column), "DD.MM.YYYY HH24:MI")
 
-            row = [idx, item.id, item.tg_id, item.name, item.age, item.description, verified_formatted, item.created_at]
-            values.append(row)
 
-    # Запись метрик регистрации клиентов
-    elif model == "clients_registration":
-        headers = ["№ п/п", "Id", "Телеграмм id", "Имя", "Дата регистрации"]
+async def stream_rows(stmt: Select) -> AsyncIterator[Sequence[Any]]:
+    """Построчное чтение результата запроса серверным курсором, в памяти держится не больше CSV_CHUNK_ROWS строк"""
+    async with async_session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=CSV_CHUNK_ROWS))
+        async for row in result:
+            yield row
 
-        for idx, item in enumerate(data, start=1):
-            row = [idx, item.id, item.tg_id, item.name, item.created_at]
-            values.append(row)
 
-    with open(f"app/files/{filename}", 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
+async def iterate_rows(rows: list[Sequence[Any]]) -> AsyncIterator[Sequence[Any]]:
+    """Уже выбранные строки для stream_csv"""
+    for row in rows:
+        yield row
 
-        # Записываем заголовки
-        writer.writerow(headers)
 
-        # Записываем данные
-        for value in values:
-            writer.writerow(value)
+async def stream_csv(rows: AsyncIterator[Sequence[Any]], model: str, compress: bool = False) -> AsyncIterator[bytes]:
+    """Формирует csv файл по мере получения строк, отдает его чанками по CSV_CHUNK_ROWS строк"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # wbits=31 - формат gzip
+    compressor = zlib.compressobj(wbits=31) if compress else None
 
-    return filename
\ No newline at end of file
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk) if compressor else chunk
+
+    # Записываем заголовки
+    writer.writerow(CSV_HEADERS[model])
+
+    # Записываем данные
+    idx = 0
+    async for row in rows:
+        idx += 1
+        writer.writerow([idx, *row])
+
+        if idx % CSV_CHUNK_ROWS == 0:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    yield chunk
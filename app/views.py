@@ -1,11 +1,13 @@
-from datetime import datetime, timedelta
+from abc import ABC, abstractmethod
+from datetime import datetime
+from urllib.parse import urlencode
 
 import pytz
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import joinedload
 
 from app.filters import AdminFilter, RoleFilter, BannedFilter, VerifiedFilter, AvailabilityFilter, JobsForeignKeyFilter, \
     CreatedDateFilter
+from app.metrics import METRICS_PAGE_SIZE, MetricPage, parse_period, orders_responses_metric, \
+    executors_views_metric, executors_registration_metric, clients_registration_metric
 from sqladmin import ModelView, BaseView, expose
 from database import tables as t
 from database.database import async_session_factory
@@ -451,276 +453,179 @@ class ExecutorsViewsAdmin(ModelView, model=ExecutorsViews):
 
 
 # CUSTOM VIEWS
-class OrderResponseMetricView(BaseView):
-    """Метрики откликов на заказы"""
-    name = "Отклики на заказы"
+class MetricView(BaseView, ABC):
+    """
+        Общая логика страниц метрик: агрегаты считаются в БД (app/metrics.py), строки выводятся постранично.
+        Период и страница передаются в query параметрах, чтобы работали ссылки пагинации
+    """
     category = categories["metrics"][0]
     category_icon = categories["metrics"][1]
-    title = "Отклики на заказы"
 
-    # URL для POST запроса формы
-    form_url = f"{settings.domain}/admin/orders-responses-metric"
-    order_details_url = f"{settings.domain}/admin/orders/details/"
-    executor_details_url = f"{settings.domain}/admin/executors/details/"
+    form_url: str
+    export_csv_url: str
+    template: str
+
+    @abstractmethod
+    async def load(self, session, start_date: datetime, end_date: datetime, page: int) -> MetricPage:
+        """Строки метрики за период [start_date, end_date) для страницы page"""
+
+    async def form_page(self, request):
+        # Если период уже выбран (ссылки пагинации), выводим метрики
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date")
+        if start_date and end_date:
+            page = request.query_params.get("page", "1")
+            return await self.metrics_page(request, start_date, end_date, int(page) if page.isdigit() else 1)
 
-    @expose("/orders-responses-metric", methods=["GET"])
-    async def select_metrics_dates(self, request):
         context = {
             "data": None,
             "form_url": self.form_url,
             "title": self.title,
         }
-        return await self.templates.TemplateResponse(request, "orders_responses_metric.html", context=context)
-
-    @expose("/orders-responses-metric", methods=["POST"])
-    async def metrics_period_page(self, request):
-        # Получаем данные из request
-        form_data = await request.form()
-        start_date = form_data.get("start_date")
-        end_date = form_data.get("end_date")
+        return await self.templates.TemplateResponse(request, self.template, context=context)
 
-        # Переводим даты из строк в datetime и вычитаем три часа для нормального сравнения в БД
-        start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
-        end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
+    async def metrics_page(self, request, start_date: str, end_date: str, page: int = 1):
+        start_date_formatted, end_date_formatted = parse_period(start_date, end_date)
 
         async with async_session_factory() as session:
-            stmt = select(OrdersResponses, Orders, Executors)\
-                .join(OrdersResponses.order)\
-                .join(OrdersResponses.executor)\
-                .where(and_(OrdersResponses.created_at > start_date_formatted, OrdersResponses.created_at < end_date_formatted))\
-                .order_by(desc(OrdersResponses.created_at))\
-                .options(joinedload(OrdersResponses.order))\
-                .options(joinedload(OrdersResponses.executor))
-            result = await session.execute(stmt)
-            orders_responses = result.scalars().all()
-
-        # Переводим время на МСК
-        for item in orders_responses:
-            item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
+            data = await self.load(session, start_date_formatted, end_date_formatted, page)
 
         # Готовим путь для скачивания CSV
-        export_csv_path = f"{settings.domain}/export-csv/orders-responses/?start_date={start_date}&end_date={end_date}"
+        period = urlencode({"start_date": start_date, "end_date": end_date})
+        export_csv_path = f"{self.export_csv_url}?{period}"
+        export_daily_csv_path = f"{settings.domain}/export-csv/daily-metrics/?{period}"
 
         # Даты для вывода в subtitle
         start_date_str = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
         end_date_str = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
 
-        data = {
-            "orders_responses": orders_responses,
-            "orders_responses_count": len(orders_responses),
-        }
         context = {
             "data": data,
             "form_url": self.form_url,
-            "order_details_url": self.order_details_url,
-            "executor_details_url": self.executor_details_url,
+            "page_url": f"{self.form_url}?{period}&page=",
+            "page_size": METRICS_PAGE_SIZE,
             "export_csv_path": export_csv_path,
+            "export_daily_csv_path": export_daily_csv_path,
             "title": self.title,
             "subtitle": f"{start_date_str} - {end_date_str}"
         }
-        return await self.templates.TemplateResponse(request, "orders_responses_metric.html", context=context)
+        context.update(self.details_urls())
+        return await self.templates.TemplateResponse(request, self.template, context=context)
+
+    def details_urls(self) -> dict[str, str]:
+        """Ссылки на детальные страницы записей для шаблона"""
+        return {}
+
+
+class OrderResponseMetricView(MetricView):
+    """Метрики откликов на заказы"""
+    name = "Отклики на заказы"
+    title = "Отклики на заказы"
+    template = "orders_responses_metric.html"
+
+    # URL для POST запроса формы
+    form_url = f"{settings.domain}/admin/orders-responses-metric"
+    export_csv_url = f"{settings.domain}/export-csv/orders-responses/"
+    order_details_url = f"{settings.domain}/admin/orders/details/"
+    executor_details_url = f"{settings.domain}/admin/executors/details/"
 
+    @expose("/orders-responses-metric", methods=["GET"])
+    async def select_metrics_dates(self, request):
+        return await self.form_page(request)
+
+    @expose("/orders-responses-metric", methods=["POST"])
+    async def metrics_period_page(self, request):
+        # Получаем данные из request
+        form_data = await request.form()
+        return await self.metrics_page(request, form_data.get("start_date"), form_data.get("end_date"))
 
-class ExecutorsViewsMetricView(BaseView):
+    async def load(self, session, start_date: datetime, end_date: datetime, page: int) -> MetricPage:
+        return await orders_responses_metric(session, start_date, end_date, page)
+
+    def details_urls(self) -> dict[str, str]:
+        return {"order_details_url": self.order_details_url, "executor_details_url": self.executor_details_url}
+
+
+class ExecutorsViewsMetricView(MetricView):
     """Метрики просмотров исполнителей"""
     name = "Просмотры исполнителей"
-    category = categories["metrics"][0]
-    category_icon = categories["metrics"][1]
     title = "Просмотры исполнителей"
+    template = "executors_views_metric.html"
 
     # URL для POST запроса формы
     form_url = f"{settings.domain}/admin/executors-views-metric"
+    export_csv_url = f"{settings.domain}/export-csv/executors-views/"
     executor_details_url = f"{settings.domain}/admin/executors/details/"
     client_details_url = f"{settings.domain}/admin/clients/details/"
 
     @expose("/executors-views-metric", methods=["GET"])
     async def select_dates(self, request):
-        context = {
-            "data": None,
-            "form_url": self.form_url,
-            "title": self.title,
-        }
-        return await self.templates.TemplateResponse(request, "executors_views_metric.html", context=context)
+        return await self.form_page(request)
 
     @expose("/executors-views-metric", methods=["POST"])
     async def metrics(self, request):
         form_data = await request.form()
-        start_date = form_data.get("start_date")
-        end_date = form_data.get("end_date")
-
-        # Переводим даты из строк в datetime и вычитаем три часа для нормального сравнения в БД
-        start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
-        end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
-
-        async with async_session_factory() as session:
-            stmt = select(ExecutorsViews, Executors, Clients) \
-                .join(ExecutorsViews.executor) \
-                .join(ExecutorsViews.client) \
-                .where(and_(ExecutorsViews.created_at > start_date_formatted, ExecutorsViews.created_at < end_date_formatted)) \
-                .order_by(desc(ExecutorsViews.created_at))\
-                .options(joinedload(ExecutorsViews.executor)) \
-                .options(joinedload(ExecutorsViews.client))
-
-            result = await session.execute(stmt)
-            executors_views = result.scalars().all()
+        return await self.metrics_page(request, form_data.get("start_date"), form_data.get("end_date"))
 
-        # Переводим время на МСК
-        for item in executors_views:
-            item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
+    async def load(self, session, start_date: datetime, end_date: datetime, page: int) -> MetricPage:
+        return await executors_views_metric(session, start_date, end_date, page)
 
-        # Готовим путь для скачивания CSV
-        export_csv_path = f"{settings.domain}/export-csv/executors-views/?start_date={start_date}&end_date={end_date}"
+    def details_urls(self) -> dict[str, str]:
+        return {"executor_details_url": self.executor_details_url, "client_details_url": self.client_details_url}
 
-        # Даты для вывода в subtitle
-        start_date_str = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
-        end_date_str = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
 
-        data = {
-            "executors_views": executors_views,
-            "executors_views_count": len(executors_views),
-        }
-        context = {
-            "data": data,
-            "form_url": self.form_url,
-            "executor_details_url": self.executor_details_url,
-            "client_details_url": self.client_details_url,
-            "export_csv_path": export_csv_path,
-            "title": self.title,
-            "subtitle": f"{start_date_str} - {end_date_str}"
-        }
-        return await self.templates.TemplateResponse(request, "executors_views_metric.html", context=context)
-
-
-class ExecutorsRegistrationMetricView(BaseView):
+class ExecutorsRegistrationMetricView(MetricView):
     """Метрики регистрации исполнителей"""
     name = "Регистрация исполнителей"
-    category = categories["metrics"][0]
-    category_icon = categories["metrics"][1]
     title = "Регистрация исполнителей"
+    template = "executors_registration_metric.html"
 
     # URL для POST запроса формы
     form_url = f"{settings.domain}/admin/executors-registration-metric"
+    export_csv_url = f"{settings.domain}/export-csv/executors-registration/"
     executor_details_url = f"{settings.domain}/admin/executors/details/"
 
     @expose("/executors-registration-metric", methods=["GET"])
     async def select_dates_ex_registration(self, request):
-        context = {
-            "data": None,
-            "form_url": self.form_url,
-            "title": self.title
-        }
-        return await self.templates.TemplateResponse(request, "executors_registration_metric.html", context=context)
+        return await self.form_page(request)
 
     @expose("/executors-registration-metric", methods=["POST"])
     async def metrics_ex_registration(self, request):
         form_data = await request.form()
-        start_date = form_data.get("start_date")
-        end_date = form_data.get("end_date")
-
-        # Переводим даты из строк в datetime и вычитаем три часа для нормального сравнения в БД
-        start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
-        end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
+        return await self.metrics_page(request, form_data.get("start_date"), form_data.get("end_date"))
 
-        async with async_session_factory() as session:
-            stmt = select(Executors, User) \
-                .join(Executors.user) \
-                .where(and_(Executors.created_at > start_date_formatted, Executors.created_at < end_date_formatted)) \
-                .order_by(desc(Executors.created_at))\
-                .options(joinedload(Executors.user))
-
-            result = await session.execute(stmt)
-            executors = result.scalars().all()
+    async def load(self, session, start_date: datetime, end_date: datetime, page: int) -> MetricPage:
+        return await executors_registration_metric(session, start_date, end_date, page)
 
-        # Переводим время на МСК
-        for item in executors:
-            item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
-
-        # Готовим путь для скачивания CSV
-        export_csv_path = f"{settings.domain}/export-csv/executors-registration/?start_date={start_date}&end_date={end_date}"
+    def details_urls(self) -> dict[str, str]:
+        return {"executor_details_url": self.executor_details_url}
 
-        # Даты для вывода в subtitle
-        start_date_str = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
-        end_date_str = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
 
-        data = {
-            "executors": executors,
-            "executors_count": len(executors),
-        }
-        context = {
-            "data": data,
-            "form_url": self.form_url,
-            "executor_details_url": self.executor_details_url,
-            "export_csv_path": export_csv_path,
-            "title": self.title,
-            "subtitle": f"{start_date_str} - {end_date_str}"
-        }
-        return await self.templates.TemplateResponse(request, "executors_registration_metric.html", context=context)
-
-
-class ClientsRegistrationMetricView(BaseView):
+class ClientsRegistrationMetricView(MetricView):
     """Метрики регистрации клиентов"""
     name = "Регистрация клиентов"
-    category = categories["metrics"][0]
-    category_icon = categories["metrics"][1]
     title = "Регистрация клиентов"
+    template = "clients_registration_metric.html"
 
     # URL для POST запроса формы
     form_url = f"{settings.domain}/admin/clients-registration-metric"
+    export_csv_url = f"{settings.domain}/export-csv/clients-registration/"
     clients_details_url = f"{settings.domain}/admin/clients/details/"
 
     @expose("/clients-registration-metric", methods=["GET"])
     async def select_dates_cli_registration(self, request):
-        context = {
-            "data": None,
-            "form_url": self.form_url,
-            "title": self.title
-        }
-        return await self.templates.TemplateResponse(request, "clients_registration_metric.html", context=context)
+        return await self.form_page(request)
 
     @expose("/clients-registration-metric", methods=["POST"])
     async def metrics_cli_registration(self, request):
         form_data = await request.form()
-        start_date = form_data.get("start_date")
-        end_date = form_data.get("end_date")
+        return await self.metrics_page(request, form_data.get("start_date"), form_data.get("end_date"))
 
-        # Переводим даты из строк в datetime и вычитаем три часа для нормального сравнения в БД
-        start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
-        end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") - timedelta(hours=3)
-
-        async with async_session_factory() as session:
-            stmt = select(Clients, User) \
-                .join(Clients.user) \
-                .where(and_(Clients.created_at > start_date_formatted, Clients.created_at < end_date_formatted)) \
-                .order_by(desc(Clients.created_at))\
-                .options(joinedload(Clients.user))
+    async def load(self, session, start_date: datetime, end_date: datetime, page: int) -> MetricPage:
+        return await clients_registration_metric(session, start_date, end_date, page)
 
-            result = await session.execute(stmt)
-            clients = result.scalars().all()
-
-        # Переводим время на МСК
-        for item in clients:
-            item.created_at = item.created_at.astimezone(tz=pytz.timezone(settings.timezone)).strftime("%d.%m.%Y %H:%M")
-
-        # Готовим путь для скачивания CSV
-        export_csv_path = f"{settings.domain}/export-csv/clients-registration/?start_date={start_date}&end_date={end_date}"
-
-        # Даты для вывода в subtitle
-        start_date_str = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
-        end_date_str = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
-
-        data = {
-            "clients": clients,
-            "clients_count": len(clients),
-        }
-        context = {
-            "data": data,
-            "form_url": self.form_url,
-            "client_details_url": self.clients_details_url,
-            "export_csv_path": export_csv_path,
-            "title": self.title,
-            "subtitle": f"{start_date_str} - {end_date_str}"
-        }
-        return await self.templates.TemplateResponse(request, "clients_registration_metric.html", context=context)
+    def details_urls(self) -> dict[str, str]:
+        return {"client_details_url": self.clients_details_url}
 
 
 # class TaskFilesAdmin(ModelView, model=t.TaskFiles):
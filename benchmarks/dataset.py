@@ -0,0 +1,281 @@
+"""
+    Генератор синтетических данных для локальной БД: пользователи, исполнители с jobs, клиенты, заказы,
+    избранное, просмотры и отклики в объемах, близких к продакшену. Данные загружаются через COPY
+    в таблицы из database/tables.py, на полном наборе бенчмарки и EXPLAIN проверки показывают реальные планы.
+
+    Популярность исполнителей и заказов и количество избранного распределены с длинным хвостом:
+    большинство почти без просмотров и избранного, несколько - с сотнями.
+
+    Запуск (БД после alembic upgrade head):
+        python -m benchmarks.dataset --truncate
+        python -m benchmarks.dataset --users 10000 --executors 2000 --orders 5000 --views 100000 --responses 100000
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import random
+from typing import Iterator
+
+import asyncpg
+
+from benchmarks.utils import connect, Timer
+from database.tables import User, Clients, Executors, ExecutorsJobs, Orders, OrdersJobs, FavoriteExecutors, \
+    FavoriteOrders, OrdersResponses, ExecutorsViews, Availability, UserRoles
+
+# Профессии и jobs, если справочник в БД пустой
+TAXONOMY = {
+    "Разработчик": ["Backend", "Frontend", "Devops", "CloudDev", "SQL"],
+    "Дизайнер": ["UXUI", "Лендинги", "Веб-сайты", "Figma"],
+    "Видео-монтажер": ["Монтаж видео", "Редакция фото", "ReelsMaker"],
+    "SMM": ["SEO", "Продвижение сайтов", "Таргет"],
+}
+
+# Вероятности количества jobs у исполнителя (1..5) и у заказа (1..3)
+EXECUTOR_JOBS_WEIGHTS = (40, 30, 15, 10, 5)
+ORDER_JOBS_WEIGHTS = (60, 30, 10)
+
+# Максимум избранного у одного пользователя
+MAX_FAVORITES = 200
+
+# Таблицы генератора в порядке загрузки, очищаются при --truncate
+TABLES = (
+    User.__tablename__, Clients.__tablename__, Executors.__tablename__, ExecutorsJobs.__tablename__,
+    Orders.__tablename__, OrdersJobs.__tablename__, FavoriteExecutors.__tablename__, FavoriteOrders.__tablename__,
+    ExecutorsViews.__tablename__, OrdersResponses.__tablename__,
+)
+
+
+def zipf_cum_weights(size: int, s: float = 1.1) -> list[float]:
+    """Накопленные веса закона Ципфа для random.choices: первые элементы выбираются намного чаще"""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, size + 1)))
+
+
+def long_tail_count(rng: random.Random, alpha: float = 1.5) -> int:
+    """Количество с длинным хвостом: чаще 0-2, изредка до MAX_FAVORITES"""
+    return min(int(rng.paretovariate(alpha)) - 1, MAX_FAVORITES)
+
+
+def random_time(rng: random.Random, start: datetime.datetime, end: datetime.datetime) -> datetime.datetime:
+    return start + (end - start) * rng.random()
+
+
+def unique_pairs(rng: random.Random, count: int, left: list[int], left_cum_weights: list[float],
+                 right: list[int]) -> Iterator[tuple[int, int]]:
+    """count уникальных пар: левый элемент по популярности, правый равномерно"""
+    count = min(count, len(left) * len(right))
+    seen: set[tuple[int, int]] = set()
+    while len(seen) < count:
+        batch = rng.choices(left, cum_weights=left_cum_weights, k=count - len(seen))
+        for item in batch:
+            pair = (item, rng.choice(right))
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+async def load_taxonomy(conn: asyncpg.Connection) -> dict[int, list[int]]:
+    """Jobs по профессиям из БД, при пустом справочнике создается TAXONOMY"""
+    rows = await conn.fetch("SELECT id, profession_id FROM jobs")
+    if not rows:
+        for profession, jobs in TAXONOMY.items():
+            profession_id = await conn.fetchval(
+                "INSERT INTO professions (title) VALUES ($1) RETURNING id", profession
+            )
+            await conn.execute(
+                "INSERT INTO jobs (title, profession_id) SELECT title, $2 FROM unnest($1::text[]) AS title",
+                jobs, profession_id
+            )
+        rows = await conn.fetch("SELECT id, profession_id FROM jobs")
+
+    taxonomy: dict[int, list[int]] = {}
+    for row in rows:
+        taxonomy.setdefault(row["profession_id"], []).append(row["id"])
+    return taxonomy
+
+
+async def copy(conn: asyncpg.Connection, table: str, columns: list[str], records) -> int:
+    """Загрузка записей через COPY, возвращает количество"""
+    records = list(records)
+    with Timer() as timer:
+        await conn.copy_records_to_table(table, records=records, columns=columns)
+    print(f"{table:<20} | {len(records):>9} | {timer.ms:>8.0f} ms")
+    return len(records)
+
+
+async def generate(conn: asyncpg.Connection, args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    now = datetime.datetime.now()
+    start = now - datetime.timedelta(days=args.days)
+
+    taxonomy = await load_taxonomy(conn)
+    professions_ids = list(taxonomy)
+    professions_cum_weights = zipf_cum_weights(len(professions_ids), s=0.8)
+
+    # Пользователи: сначала исполнители, затем клиенты, остальные без роли
+    executors_count = min(args.executors, args.users)
+    clients_count = int((args.users - executors_count) * 0.9)
+    tg_ids = [str(1_000_000_000 + i) for i in range(args.users)]
+    users_created = [random_time(rng, start, now) for _ in range(args.users)]
+
+    def role(idx: int) -> str | None:
+        if idx < executors_count:
+            return UserRoles.EXECUTOR.value
+        if idx < executors_count + clients_count:
+            return UserRoles.CLIENT.value
+        return None
+
+    await copy(conn, User.__tablename__, ["id", "tg_id", "username", "created_at", "is_banned", "is_admin", "role"], (
+        (i + 1, tg_ids[i], f"user{i}", users_created[i], rng.random() < 0.005, False, role(i))
+        for i in range(args.users)
+    ))
+
+    # Исполнители, id исполнителя = номер пользователя + 1
+    executors_ids = list(range(1, executors_count + 1))
+    executor_profession: dict[int, int] = {}
+    verified_ids: list[int] = []
+    executors = []
+    for executor_id in executors_ids:
+        idx = executor_id - 1
+        verified = rng.random() < 0.85
+        if verified:
+            verified_ids.append(executor_id)
+        executor_profession[executor_id] = rng.choices(professions_ids, cum_weights=professions_cum_weights)[0]
+        executors.append((
+            executor_id, tg_ids[idx], f"Исполнитель {executor_id}", rng.randint(18, 60), "Описание " * 20,
+            "договорная", f"{rng.randint(0, 10)} лет", "https://example.com|https://github.com",
+            Availability.FREE.value if rng.random() < 0.7 else Availability.BUSY.value,
+            "@contact", "Москва", rng.random() < 0.6, verified, users_created[idx] + datetime.timedelta(minutes=5),
+        ))
+    await copy(conn, Executors.__tablename__, [
+        "id", "tg_id", "name", "age", "description", "rate", "experience", "links", "availability", "contacts",
+        "location", "photo", "verified", "created_at",
+    ], executors)
+
+    def pick_jobs(profession_id: int, weights: tuple[int, ...]) -> list[int]:
+        jobs = taxonomy[profession_id]
+        count = min(rng.choices(range(1, len(weights) + 1), weights=weights)[0], len(jobs))
+        return rng.sample(jobs, count)
+
+    await copy(conn, ExecutorsJobs.__tablename__, ["job_id", "executor_id"], (
+        (job_id, executor_id)
+        for executor_id in executors_ids
+        for job_id in pick_jobs(executor_profession[executor_id], EXECUTOR_JOBS_WEIGHTS)
+    ))
+
+    # Клиенты, id клиента = номер клиента среди пользователей + 1
+    clients_ids = list(range(1, clients_count + 1))
+    await copy(conn, Clients.__tablename__, ["id", "tg_id", "name", "created_at"], (
+        (client_id, tg_ids[executors_count + client_id - 1], f"Клиент {client_id}",
+         users_created[executors_count + client_id - 1] + datetime.timedelta(minutes=5))
+        for client_id in clients_ids
+    ))
+
+    # Заказы: несколько клиентов размещают много заказов, большинство - по одному
+    orders_ids = list(range(1, args.orders + 1)) if clients_ids else []
+    orders_clients = rng.choices(clients_ids, cum_weights=zipf_cum_weights(len(clients_ids)), k=len(orders_ids)) \
+        if clients_ids else []
+    orders_created: dict[int, datetime.datetime] = {}
+    orders_profession: dict[int, int] = {}
+    orders = []
+    for order_id, client_id in zip(orders_ids, orders_clients):
+        created_at = random_time(rng, start, now)
+        period = rng.choice((3, 7, 14, 30))
+        orders_created[order_id] = created_at
+        orders_profession[order_id] = rng.choices(professions_ids, cum_weights=professions_cum_weights)[0]
+        orders.append((
+            order_id, tg_ids[executors_count + client_id - 1], f"Заказ {order_id}", "Задача " * 30,
+            f"{rng.randint(1, 100) * 1000} р." if rng.random() < 0.7 else None, None, period, created_at,
+            now - created_at < datetime.timedelta(days=period), client_id,
+        ))
+    await copy(conn, Orders.__tablename__, [
+        "id", "tg_id", "title", "task", "price", "requirements", "period", "created_at", "is_active", "client_id",
+    ], orders)
+
+    await copy(conn, OrdersJobs.__tablename__, ["job_id", "order_id"], (
+        (job_id, order_id)
+        for order_id in orders_ids
+        for job_id in pick_jobs(orders_profession[order_id], ORDER_JOBS_WEIGHTS)
+    ))
+
+    # Популярность: первые в списке исполнители и заказы получают больше просмотров, откликов и избранного
+    popular_executors = verified_ids[:]
+    rng.shuffle(popular_executors)
+    popular_executors_weights = zipf_cum_weights(len(popular_executors))
+    popular_orders = orders_ids[:]
+    rng.shuffle(popular_orders)
+    popular_orders_weights = zipf_cum_weights(len(popular_orders))
+
+    if popular_executors and clients_ids:
+        await copy(conn, FavoriteExecutors.__tablename__, ["client_id", "executor_id"], (
+            (client_id, executor_id)
+            for client_id in clients_ids
+            for executor_id in set(rng.choices(popular_executors, cum_weights=popular_executors_weights,
+                                               k=long_tail_count(rng)))
+        ))
+
+    if popular_orders and verified_ids:
+        await copy(conn, FavoriteOrders.__tablename__, ["executor_id", "order_id"], (
+            (executor_id, order_id)
+            for executor_id in verified_ids
+            for order_id in set(rng.choices(popular_orders, cum_weights=popular_orders_weights,
+                                            k=long_tail_count(rng)))
+        ))
+
+        await copy(conn, OrdersResponses.__tablename__, ["order_id", "executor_id", "text", "created_at"], (
+            (order_id, executor_id, "Готов взяться за заказ",
+             min(orders_created[order_id] + datetime.timedelta(hours=rng.expovariate(1 / 24)), now))
+            for order_id, executor_id in unique_pairs(rng, args.responses, popular_orders, popular_orders_weights,
+                                                      verified_ids)
+        ))
+
+    if popular_executors and clients_ids:
+        await copy(conn, ExecutorsViews.__tablename__, ["executor_id", "client_id", "created_at"], (
+            (executor_id, client_id, random_time(rng, start, now))
+            for executor_id, client_id in unique_pairs(rng, args.views, popular_executors, popular_executors_weights,
+                                                       clients_ids)
+        ))
+
+    # id заданы явно, последовательности продолжают с максимального id
+    for table in (User.__tablename__, Executors.__tablename__, Clients.__tablename__, Orders.__tablename__,
+                  OrdersResponses.__tablename__, ExecutorsViews.__tablename__):
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Синтетические данные для бенчмарков")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--executors", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--views", type=int, default=1_000_000)
+    parser.add_argument("--responses", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365, help="период дат создания записей")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы перед загрузкой")
+    args = parser.parse_args()
+
+    conn = await connect()
+    try:
+        if args.truncate:
+            await conn.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+        elif await conn.fetchval("SELECT exists(SELECT 1 FROM users)"):
+            raise SystemExit("Таблица users не пустая, для перезаписи данных используйте --truncate")
+
+        print(f"{'таблица':<20} | {'строк':>9} | {'COPY':>11}")
+        with Timer() as timer:
+            async with conn.transaction():
+                await generate(conn, args)
+            # Статистика для планировщика сразу после загрузки
+            await conn.execute(f"ANALYZE {', '.join(TABLES)}")
+
+        print(f"Готово за {timer.ms / 1000:.1f} с. Дневные агрегаты метрик: "
+              f"python -m database.rollups backfill {(datetime.date.today() - datetime.timedelta(days=args.days))}")
+
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,393 @@
+"""
+    Сквозной бенчмарк обработки апдейтов: Dispatcher.feed_update с main_router и всеми middleware,
+    как в create_dispatcher, для многих синтетических пользователей одновременно.
+    Запросы к Bot API обрабатывает заглушка в том же процессе (aiohttp), медиа берутся из временного каталога,
+    поэтому S3 и file_id реальных файлов не затрагиваются.
+
+    Сценарии (апдейты одного пользователя идут последовательно, пользователи - параллельно):
+        new_client        /start -> роль заказчика -> имя -> найти исполнителя -> профессия -> jobs -> показать
+                          -> пропуск x20 -> в избранное
+        returning_client  то же для уже зарегистрированных пользователей, начиная с главного меню
+
+    Для каждого сценария выводятся апдейты в секунду, p50/p95/p99 обработки апдейта, запросы к БД на апдейт,
+    занятые соединения пула и запросы к Bot API. Результаты сохраняются в benchmarks/results/e2e-*.json
+    и сравниваются с предыдущим запуском. Созданные пользователи удаляются в конце.
+
+    Запуск (после python -m benchmarks.dataset):
+        python -m benchmarks.e2e --users 200
+        python -m benchmarks.e2e --users 500 --skips 20 --api-latency-ms 30
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import os
+import random
+import shutil
+import socket
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import asyncpg
+from aiohttp import web
+
+import aiogram as io
+from aiogram import BaseMiddleware
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+from aiogram.types import Update, Message, CallbackQuery, Chat, User, TelegramObject
+
+from benchmarks.utils import percentiles, save_results, load_baseline, change
+from database.rollups import rollups_refresher
+from database.views_buffer import executor_views_buffer
+from main import create_dispatcher
+from middlewares.metrics import TelegramMetricsMiddleware
+from routers.buttons import buttons as btn
+from settings import settings
+from utils.media_cache import media_cache
+from utils.metrics import current_update
+from utils.metrics_sampler import metrics_sampler
+
+NAME = "e2e"
+BOT_TOKEN = "42:BENCH"
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+# tg_id синтетических пользователей, не пересекаются с benchmarks.dataset
+FIRST_TG_ID = 8_000_000_000
+# Картинки, которые роутеры отправляют из settings.local_media_path
+STATIC_MEDIA = ("roles.png", "instruction.png", "executor.jpg")
+
+
+class StubBotApi:
+    """
+        Заглушка Bot API: отвечает на любой метод, send*/edit* возвращают сообщение,
+        остальные методы - True. latency - искусственная задержка ответа
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._message_ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        await web.SockSite(self._runner, sock).start()
+        self.url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        method = request.match_info["method"]
+        params = await request.post()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "getMe":
+            result: Any = BOT_USER
+        elif method.startswith(("send", "edit")):
+            result = self.message(method, params)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def message(self, method: str, params: Any) -> dict[str, Any]:
+        message_id = next(self._message_ids)
+        chat_id = int(params.get("chat_id") or 0)
+        message: dict[str, Any] = {
+            "message_id": message_id, "date": int(time.time()), "from": BOT_USER,
+            "chat": {"id": chat_id, "type": "private"},
+        }
+        if method == "sendPhoto":
+            message["photo"] = [{"file_id": f"bench_photo_{message_id}", "file_unique_id": f"bench_{message_id}",
+                                 "width": 1, "height": 1}]
+            message["caption"] = params.get("caption", "")
+        else:
+            message["text"] = params.get("text", "")
+        return message
+
+
+@dataclass
+class ScenarioStats:
+    """Счетчики сценария"""
+    latencies_ms: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    db_time: float = 0.0
+    errors: int = 0
+    # апдейты, для которых не нашелся хендлер: сценарий разошелся с роутерами
+    unhandled: int = 0
+    pool_samples: list[int] = field(default_factory=list)
+
+
+class UpdateStatsCollector(BaseMiddleware):
+    """
+        Внешний middleware апдейтов внутри UpdateMetricsMiddleware:
+        после обработки забирает счетчики апдейта (запросы к БД, хендлер) в текущий сценарий
+    """
+
+    def __init__(self):
+        self.stats = ScenarioStats()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            update_stats = current_update.get()
+            if update_stats is not None:
+                self.stats.queries.append(update_stats.queries)
+                self.stats.db_time += update_stats.db_time
+                if update_stats.handler == "unhandled":
+                    self.stats.unhandled += 1
+
+
+@dataclass
+class SyntheticUser:
+    """Пользователь сценария и поиск, который он выполняет"""
+    tg_id: int
+    profession_id: int
+    jobs_ids: list[int]
+
+
+class UpdateFactory:
+    """Апдейты Message и CallbackQuery от имени синтетических пользователей"""
+
+    def __init__(self):
+        self._update_ids = itertools.count(1)
+
+    def message(self, user: SyntheticUser, text: str) -> Update:
+        update_id = next(self._update_ids)
+        return Update(update_id=update_id, message=Message(
+            message_id=update_id, date=datetime.datetime.now(), chat=Chat(id=user.tg_id, type="private"),
+            from_user=User(id=user.tg_id, is_bot=False, first_name=f"bench{user.tg_id}"), text=text,
+        ))
+
+    def callback(self, user: SyntheticUser, data: str) -> Update:
+        update_id = next(self._update_ids)
+        bot_message = Message(
+            message_id=update_id, date=datetime.datetime.now(), chat=Chat(id=user.tg_id, type="private"),
+            from_user=User(id=BOT_USER["id"], is_bot=True, first_name=BOT_USER["first_name"]), text="...",
+        )
+        return Update(update_id=update_id, callback_query=CallbackQuery(
+            id=str(update_id), chat_instance=str(user.tg_id), data=data, message=bot_message,
+            from_user=User(id=user.tg_id, is_bot=False, first_name=f"bench{user.tg_id}"),
+        ))
+
+    def find_executor(self, user: SyntheticUser, skips: int) -> list[Update]:
+        """Поиск исполнителя из главного меню, пропуски и добавление в избранное"""
+        return [
+            self.callback(user, "main_menu|find_executor"),
+            self.callback(user, f"find_ex_prof|{user.profession_id}"),
+            *(self.callback(user, f"find_ex_job|{job_id}") for job_id in user.jobs_ids),
+            self.callback(user, "find_ex_show|show_executors"),
+            *(self.message(user, btn.SKIP) for _ in range(skips)),
+            self.message(user, btn.TO_FAV),
+        ]
+
+    def new_client(self, user: SyntheticUser, skips: int) -> list[Update]:
+        return [
+            self.message(user, "/start"),
+            self.callback(user, "choose_role|client"),
+            self.message(user, f"Клиент {user.tg_id}"),
+            *self.find_executor(user, skips),
+        ]
+
+    def returning_client(self, user: SyntheticUser, skips: int) -> list[Update]:
+        return [self.message(user, "/start"), *self.find_executor(user, skips)]
+
+
+async def load_users(conn: asyncpg.Connection, rng: random.Random, count: int) -> list[SyntheticUser]:
+    """Пользователи с поиском по jobs существующих верифицированных исполнителей, чтобы лента не была пустой"""
+    rows = await conn.fetch(
+        """
+        SELECT j.profession_id, array_agg(ej.job_id ORDER BY ej.job_id) AS jobs
+        FROM executors AS ex
+        JOIN executors_jobs AS ej ON ej.executor_id = ex.id
+        JOIN jobs AS j ON j.id = ej.job_id
+        WHERE ex.verified
+        GROUP BY ex.id, j.profession_id
+        ORDER BY ex.id
+        LIMIT 10000
+        """
+    )
+    if not rows:
+        raise SystemExit("Нет синтетических данных, сначала выполните python -m benchmarks.dataset")
+
+    users = []
+    for i in range(count):
+        row = rng.choice(rows)
+        users.append(SyntheticUser(tg_id=FIRST_TG_ID + i, profession_id=row["profession_id"],
+                                   jobs_ids=row["jobs"][:3]))
+    return users
+
+
+async def prepare_media(conn: asyncpg.Connection, root: str) -> None:
+    """Временный каталог медиа: статичные картинки и фото всех исполнителей, чтобы не обращаться к S3"""
+    for name in STATIC_MEDIA:
+        with open(os.path.join(root, name), "wb") as file:
+            file.write(b"bench")
+
+    profiles = os.path.join(root, settings.executors_profile_path)
+    os.makedirs(profiles, exist_ok=True)
+    for row in await conn.fetch("SELECT tg_id FROM executors WHERE photo"):
+        with open(os.path.join(profiles, f"{row['tg_id']}.jpg"), "wb") as file:
+            file.write(b"bench")
+
+    settings.local_media_path = root
+    media_cache.root = root
+    media_cache.scan()
+
+
+async def cleanup(pool: asyncpg.Pool, tg_ids: list[str], media_root: str) -> None:
+    """Удаление синтетических пользователей (профили и избранное удаляются каскадно) и file_id временных медиа"""
+    async with pool.acquire() as conn:
+        await conn.execute("DELETE FROM users WHERE tg_id = ANY($1::text[])", tg_ids)
+        await conn.execute("DELETE FROM media_files WHERE path LIKE $1 || '%'", media_root)
+
+
+async def sample_pool(pool: asyncpg.Pool, samples: list[int], stop: asyncio.Event) -> None:
+    """Занятые соединения пула каждые 5 мс"""
+    while not stop.is_set():
+        samples.append(pool.get_size() - pool.get_idle_size())
+        await asyncio.sleep(0.005)
+
+
+async def run_scenario(dp: io.Dispatcher, bot: io.Bot, pool: asyncpg.Pool, collector: UpdateStatsCollector,
+                       sequences: list[list[Update]]) -> tuple[ScenarioStats, float]:
+    """Параллельная обработка последовательностей апдейтов, возвращает счетчики и общее время в секундах"""
+    stats = collector.stats = ScenarioStats()
+
+    async def run_user(updates: list[Update]) -> None:
+        for update in updates:
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                stats.errors += 1
+            stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_pool(pool, stats.pool_samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(updates) for updates in sequences))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    return stats, elapsed
+
+
+def summarize(stats: ScenarioStats, elapsed: float, api_calls: int, pool_max: int) -> dict[str, float]:
+    updates = len(stats.latencies_ms)
+    return {
+        **percentiles(stats.latencies_ms),
+        "updates": updates,
+        "updates_per_s": updates / elapsed if elapsed else 0.0,
+        "errors": stats.errors,
+        "unhandled": stats.unhandled,
+        "queries_per_update": sum(stats.queries) / len(stats.queries) if stats.queries else 0.0,
+        "db_time_share": stats.db_time / sum(stats.latencies_ms) * 1000 if stats.latencies_ms else 0.0,
+        "pool_in_use_mean": sum(stats.pool_samples) / len(stats.pool_samples) if stats.pool_samples else 0.0,
+        "pool_in_use_max": max(stats.pool_samples, default=0),
+        "pool_max_size": pool_max,
+        "api_calls_per_update": api_calls / updates if updates else 0.0,
+    }
+
+
+def report(results: dict[str, dict[str, float]], baseline: dict[str, Any] | None) -> None:
+    previous = baseline["results"] if baseline else {}
+    if baseline:
+        print(f"Сравнение с {baseline['revision']} от {baseline['created_at']}")
+
+    print(f"{'сценарий':<18} | {'upd/s':>7} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7} | {'q/upd':>5} "
+          f"| {'db %':>4} | {'pool':>9} | {'api/upd':>7} | {'err':>3} | {'unh':>3} | {'Δupd/s':>6} | {'Δp95':>6}")
+    for name, result in results.items():
+        before = previous.get(name, {})
+        pool = f"{result['pool_in_use_mean']:.1f}/{result['pool_in_use_max']}/{result['pool_max_size']}"
+        print(f"{name:<18} | {result['updates_per_s']:>7.0f} | {result['p50']:>7.1f} | {result['p95']:>7.1f} "
+              f"| {result['p99']:>7.1f} | {result['queries_per_update']:>5.1f} "
+              f"| {result['db_time_share'] * 100:>4.0f} | {pool:>9} | {result['api_calls_per_update']:>7.1f} "
+              f"| {result['errors']:>3} | {result['unhandled']:>3} "
+              f"| {change(result['updates_per_s'], before.get('updates_per_s')):>6} "
+              f"| {change(result['p95'], before.get('p95')):>6}")
+    print("pool: занято в среднем/максимум/размер пула")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк обработки апдейтов")
+    parser.add_argument("--users", type=int, default=200, help="синтетических пользователей одновременно")
+    parser.add_argument("--skips", type=int, default=20, help="пропусков в ленте исполнителей")
+    parser.add_argument("--api-latency-ms", type=float, default=0, help="задержка ответа заглушки Bot API")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="файл результатов для сравнения, по умолчанию последний запуск")
+    parser.add_argument("--no-save", action="store_true", help="не сохранять результаты")
+    args = parser.parse_args()
+
+    stub = StubBotApi(latency=args.api_latency_ms / 1000)
+    await stub.start()
+    bot = io.Bot(BOT_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(stub.url)),
+                 default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot.session.middleware(TelegramMetricsMiddleware())
+
+    media_root = tempfile.mkdtemp(prefix="bench_media_") + "/"
+    dp, pool, storage = await create_dispatcher()
+    # Пересчет агрегатов метрик не относится к обработке апдейтов и нагружал бы БД во время замеров
+    await rollups_refresher.stop()
+    collector = UpdateStatsCollector()
+    # Регистрируется после UpdateMetricsMiddleware, поэтому видит счетчики апдейта
+    dp.update.outer_middleware(collector)
+
+    users: list[SyntheticUser] = []
+    results = {}
+    try:
+        async with pool.acquire() as conn:
+            users = await load_users(conn, random.Random(args.seed), args.users)
+            await conn.execute("DELETE FROM users WHERE tg_id = ANY($1::text[])", [str(u.tg_id) for u in users])
+            await prepare_media(conn, media_root)
+
+        factory = UpdateFactory()
+        scenarios = {
+            "new_client": factory.new_client,
+            "returning_client": factory.returning_client,
+        }
+        for name, scenario in scenarios.items():
+            calls_before = stub.calls
+            stats, elapsed = await run_scenario(
+                dp, bot, pool, collector, [scenario(user, args.skips) for user in users]
+            )
+            results[name] = summarize(stats, elapsed, stub.calls - calls_before, pool.get_max_size())
+
+    finally:
+        await cleanup(pool, [str(user.tg_id) for user in users], media_root)
+        await metrics_sampler.stop()
+        await executor_views_buffer.stop()
+        await pool.close()
+        await storage.close()
+        await bot.session.close()
+        await stub.stop()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+    report(results, load_baseline(NAME, args.baseline))
+    if not args.no_save:
+        print(f"Результаты сохранены в {save_results(NAME, results)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
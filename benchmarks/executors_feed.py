@@ -0,0 +1,93 @@
+"""
+    Бенчмарк AsyncOrm.get_executors_by_jobs: количество запросов к БД не должно зависеть от числа исполнителей.
+    Тестовые данные создаются внутри транзакции, которая в конце откатывается.
+
+    Запуск: python -m benchmarks.executors_feed
+"""
+import asyncio
+
+import asyncpg
+
+from benchmarks.utils import connect, CountingSession, Timer
+from database.orm import AsyncOrm
+
+SIZES = (5, 50, 500)
+
+
+async def seed_executors(conn: asyncpg.Connection, size: int) -> int:
+    """Создание size верифицированных исполнителей с 3 jobs, возвращает id job для поиска"""
+    profession_id = await conn.fetchval(
+        """
+        INSERT INTO professions (title) VALUES ($1) RETURNING id
+        """,
+        f"bench profession {size}"
+    )
+    jobs_ids = [
+        await conn.fetchval(
+            """
+            INSERT INTO jobs (title, profession_id) VALUES ($1, $2) RETURNING id
+            """,
+            f"bench job {size}-{i}", profession_id
+        )
+        for i in range(3)
+    ]
+    await conn.execute(
+        """
+        INSERT INTO users (tg_id, created_at, is_banned, is_admin, role)
+        SELECT 'bench_' || $1 || '_' || g, now(), false, false, 'исполнитель'
+        FROM generate_series(1, $1::int) AS g
+        """,
+        size
+    )
+    await conn.execute(
+        """
+        INSERT INTO executors (tg_id, name, age, description, rate, experience, links, availability, photo, verified,
+        created_at)
+        SELECT 'bench_' || $1 || '_' || g, 'Исполнитель ' || g, 25, 'Описание', 'договорная', '3 года',
+        'https://example.com', 'свободен', false, true, now()
+        FROM generate_series(1, $1::int) AS g
+        """,
+        size
+    )
+    await conn.execute(
+        """
+        INSERT INTO executors_jobs (job_id, executor_id)
+        SELECT j.id, ex.id
+        FROM executors AS ex
+        CROSS JOIN unnest($2::int[]) AS j(id)
+        WHERE ex.tg_id LIKE 'bench_' || $1 || '_%'
+        """,
+        size, jobs_ids
+    )
+    return jobs_ids[0]
+
+
+async def main() -> None:
+    conn = await connect()
+    session = CountingSession(conn)
+    tr = conn.transaction()
+    await tr.start()
+
+    try:
+        round_trips: dict[int, int] = {}
+        for size in SIZES:
+            job_id = await seed_executors(conn, size)
+
+            session.reset()
+            with Timer() as timer:
+                executors = await AsyncOrm.get_executors_by_jobs([job_id], session)
+
+            round_trips[size] = session.round_trips
+            print(f"executors: {len(executors):>5} | round trips: {session.round_trips} | {timer.ms:.1f} ms")
+            assert len(executors) == size, f"ожидалось {size} исполнителей, получено {len(executors)}"
+
+        assert len(set(round_trips.values())) == 1, f"количество запросов зависит от размера выборки: {round_trips}"
+        print("OK: количество запросов не зависит от размера выборки")
+
+    finally:
+        await tr.rollback()
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+    Проверка планов запросов лент и избранного: ни одна таблица не должна читаться через Seq Scan.
+    На небольших тестовых данных планировщик может предпочесть Seq Scan даже при наличии индекса,
+    поэтому он отключается через enable_seqscan = off: Seq Scan в плане остается только если
+    подходящего индекса нет.
+    Тестовые данные создаются внутри транзакции, которая в конце откатывается.
+
+    Запуск: python -m benchmarks.explain
+"""
+import asyncio
+
+import asyncpg
+
+from benchmarks.executors_feed import seed_executors
+from benchmarks.utils import connect, ExplainSession, seq_scans
+from database.orm import AsyncOrm
+
+SIZE = 500
+
+
+async def seed_orders(conn: asyncpg.Connection, size: int, job_id: int) -> tuple[int, str]:
+    """Создание клиента с size активными заказами по job_id, возвращает id клиента и его tg_id"""
+    tg_id = "bench_client"
+    await conn.execute(
+        """
+        INSERT INTO users (tg_id, created_at, is_banned, is_admin, role)
+        VALUES ($1, now(), false, false, 'клиент')
+        """,
+        tg_id
+    )
+    client_id = await conn.fetchval(
+        """
+        INSERT INTO clients (tg_id, name, created_at) VALUES ($1, 'Клиент', now()) RETURNING id
+        """,
+        tg_id
+    )
+    await conn.execute(
+        """
+        INSERT INTO orders (tg_id, title, task, price, requirements, period, created_at, is_active, client_id)
+        SELECT $1, 'Заказ ' || g, 'Задача', '1000', NULL, 7, now(), true, $2
+        FROM generate_series(1, $3::int) AS g
+        """,
+        tg_id, client_id, size
+    )
+    await conn.execute(
+        """
+        INSERT INTO orders_jobs (job_id, order_id)
+        SELECT $1, id FROM orders WHERE client_id = $2
+        """,
+        job_id, client_id
+    )
+    return client_id, tg_id
+
+
+async def main() -> None:
+    conn = await connect()
+    session = ExplainSession(conn)
+    tr = conn.transaction()
+    await tr.start()
+
+    try:
+        job_id = await seed_executors(conn, SIZE)
+        client_id, client_tg_id = await seed_orders(conn, SIZE, job_id)
+        executor_id, executor_tg_id = await conn.fetchrow(
+            """
+            SELECT id, tg_id FROM executors WHERE tg_id LIKE 'bench_%' ORDER BY id LIMIT 1
+            """
+        )
+        order_id = await conn.fetchval("SELECT id FROM orders WHERE client_id = $1 ORDER BY id LIMIT 1", client_id)
+
+        await conn.execute("ANALYZE")
+        await conn.execute("SET LOCAL enable_seqscan = off")
+
+        calls = {
+            "get_user_context": AsyncOrm.get_user_context(client_tg_id, session),
+            "get_executors_feed_page": AsyncOrm.get_executors_feed_page([job_id], "seed", None, 2, session),
+            "get_executors_feed_page (cursor)": AsyncOrm.get_executors_feed_page([job_id], "seed", executor_id, 2,
+                                                                                 session),
+            "get_executor_by_id": AsyncOrm.get_executor_by_id(executor_id, session),
+            "executor_in_favorites": AsyncOrm.executor_in_favorites(client_id, executor_id, session),
+            "get_favorites_executors_ids": AsyncOrm.get_favorites_executors_ids(client_tg_id, session),
+            "get_orders_ids_by_jobs": AsyncOrm.get_orders_ids_by_jobs([job_id], session),
+            "get_order_by_id": AsyncOrm.get_order_by_id(order_id, session),
+            "is_order_already_in_favorites": AsyncOrm.is_order_already_in_favorites(executor_tg_id, order_id, session),
+            "get_favorites_orders_ids": AsyncOrm.get_favorites_orders_ids(executor_id, session),
+            "check_order_response_already_exists": AsyncOrm.check_order_response_already_exists(executor_tg_id,
+                                                                                                order_id, session),
+        }
+
+        failed: dict[str, list[str]] = {}
+        for name, call in calls.items():
+            session.reset()
+            await call
+
+            tables = sorted({table for _, plan in session.plans for table in seq_scans(plan)})
+            print(f"{name:<40} | queries: {len(session.plans)} | seq scan: {', '.join(tables) or '-'}")
+            if tables:
+                failed[name] = tables
+
+        assert not failed, f"последовательное сканирование в запросах: {failed}"
+        print("OK: запросы лент и избранного используют индексы")
+
+    finally:
+        await tr.rollback()
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
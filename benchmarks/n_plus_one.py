@@ -0,0 +1,74 @@
+"""
+    Проверка поиска N+1 в dev режиме (db.n_plus_one_raise): загрузка избранных исполнителей одним списком
+    (get_favorites_executors, запросы jobs и профессии на каждого исполнителя) должна падать с NPlusOneError,
+    загрузка, которую используют роутеры (id избранных и карточка текущего исполнителя), - нет.
+    Тестовые данные создаются внутри транзакции, которая в конце откатывается.
+
+    Запуск: python -m benchmarks.n_plus_one
+"""
+import asyncio
+
+from benchmarks.executors_feed import seed_executors
+from benchmarks.utils import connect, CountingSession
+from database.instrumentation import NPlusOneError
+from database.orm import AsyncOrm
+from settings import settings
+from utils.metrics import track_update
+
+FAVORITES = settings.db.n_plus_one_threshold * 2
+
+
+async def main() -> None:
+    settings.db.n_plus_one_raise = True
+
+    conn = await connect()
+    session = CountingSession(conn)
+    tr = conn.transaction()
+    await tr.start()
+
+    try:
+        await seed_executors(conn, FAVORITES)
+        client_tg_id = "bench_n_plus_one_client"
+        await conn.execute(
+            """
+            INSERT INTO users (tg_id, created_at, is_banned, is_admin, role)
+            VALUES ($1, now(), false, false, 'клиент')
+            """,
+            client_tg_id
+        )
+        await conn.execute(
+            """
+            WITH client AS (
+                INSERT INTO clients (tg_id, name, created_at) VALUES ($1, 'Клиент', now()) RETURNING id
+            )
+            INSERT INTO favorite_executors (client_id, executor_id)
+            SELECT client.id, ex.id FROM client, executors AS ex WHERE ex.tg_id LIKE 'bench_' || $2 || '_%'
+            """,
+            client_tg_id, str(FAVORITES)
+        )
+
+        # Загрузка, которую используют роутеры
+        with track_update("favorites_by_ids") as stats:
+            executors_ids = await AsyncOrm.get_favorites_executors_ids(client_tg_id, session)
+            await AsyncOrm.get_executor_by_id(executors_ids[0], session)
+        print(f"favorites_by_ids | queries: {stats.queries} | N+1: {len(stats.flagged)}")
+        assert len(executors_ids) == FAVORITES, f"ожидалось {FAVORITES} избранных, получено {len(executors_ids)}"
+
+        # Загрузка с запросами в цикле
+        with track_update("get_favorites_executors") as stats:
+            try:
+                await AsyncOrm.get_favorites_executors(client_tg_id, session)
+            except NPlusOneError as e:
+                print(f"get_favorites_executors | queries: {stats.queries} | {e}")
+            else:
+                raise AssertionError(f"N+1 в get_favorites_executors не найден, запросов: {stats.queries}")
+
+        print("OK: N+1 найден только в загрузке с запросами в цикле")
+
+    finally:
+        await tr.rollback()
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,217 @@
+"""
+    Бенчмарк горячих методов AsyncOrm на синтетических данных (python -m benchmarks.dataset):
+    p50/p95/p99 времени вызова, запросов к БД (round trips) на вызов и строк результата в секунду.
+    Результаты сохраняются в benchmarks/results/orm-*.json и сравниваются с предыдущим запуском,
+    замедление p50 или p95 больше --threshold выводится как регрессия.
+    Записи создаются внутри транзакции, которая в конце откатывается.
+
+    Запуск:
+        python -m benchmarks.orm
+        python -m benchmarks.orm --iterations 500 --baseline benchmarks/results/orm-20260101-120000-abc1234.json
+"""
+import argparse
+import asyncio
+import datetime
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+
+from benchmarks.utils import connect, CountingSession, Timer, percentiles, save_results, load_baseline, change
+from database.orm import AsyncOrm
+from schemas.order import OrderAdd
+from schemas.profession import Job, Profession
+
+NAME = "orm"
+
+
+@dataclass
+class Case:
+    """Метод AsyncOrm и генератор аргументов для i-го вызова"""
+    name: str
+    call: Callable[[int], Awaitable[Any]]
+
+
+@dataclass
+class Inputs:
+    """Аргументы вызовов, выбранные из синтетических данных"""
+    jobs_sets: list[list[int]]
+    users_tg_ids: list[str]
+    executors: list[tuple[int, str]]
+    clients: list[tuple[int, str]]
+    favorites_clients_tg_ids: list[str]
+    favorites_executors_ids: list[int]
+    taxonomy: list[tuple[Profession, list[Job]]]
+
+
+def rows_count(result: Any) -> int:
+    """Количество строк результата: длина списка или 1 для найденного объекта и успешной записи"""
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result else 0
+
+
+async def load_inputs(conn: asyncpg.Connection, rng: random.Random, size: int) -> Inputs:
+    """Случайная выборка size аргументов каждого вида"""
+    def sample(rows: list) -> list:
+        return rng.sample(rows, min(size, len(rows)))
+
+    jobs_sets = await conn.fetch(
+        "SELECT array_agg(job_id ORDER BY job_id) AS jobs FROM executors_jobs GROUP BY executor_id ORDER BY executor_id"
+    )
+    users = await conn.fetch("SELECT tg_id FROM users ORDER BY id")
+    executors = await conn.fetch("SELECT id, tg_id FROM executors WHERE verified ORDER BY id")
+    clients = await conn.fetch("SELECT id, tg_id FROM clients ORDER BY id")
+    favorites_clients = await conn.fetch(
+        "SELECT c.tg_id FROM clients AS c WHERE EXISTS (SELECT 1 FROM favorite_executors WHERE client_id = c.id) "
+        "ORDER BY c.id"
+    )
+    favorites_executors = await conn.fetch("SELECT DISTINCT executor_id FROM favorite_orders ORDER BY executor_id")
+
+    professions = {
+        row["id"]: (Profession(id=row["id"], title=row["title"], emoji=row["emoji"]), [])
+        for row in await conn.fetch("SELECT id, title, emoji FROM professions ORDER BY id")
+    }
+    for row in await conn.fetch("SELECT id, title, profession_id FROM jobs ORDER BY id"):
+        professions[row["profession_id"]][1].append(Job(**dict(row)))
+
+    return Inputs(
+        jobs_sets=[row["jobs"] for row in sample(jobs_sets)],
+        users_tg_ids=[row["tg_id"] for row in sample(users)],
+        executors=[tuple(row) for row in sample(executors)],
+        clients=[tuple(row) for row in sample(clients)],
+        favorites_clients_tg_ids=[row["tg_id"] for row in sample(favorites_clients)],
+        favorites_executors_ids=[row["executor_id"] for row in sample(favorites_executors)],
+        taxonomy=[(profession, jobs) for profession, jobs in professions.values() if jobs],
+    )
+
+
+def build_cases(inputs: Inputs, session: CountingSession) -> list[Case]:
+    def pick(items: list, i: int) -> Any:
+        return items[i % len(items)]
+
+    def order(i: int) -> OrderAdd:
+        client_id, client_tg_id = pick(inputs.clients, i)
+        profession, jobs = pick(inputs.taxonomy, i)
+        return OrderAdd(
+            client_id=client_id, tg_id=client_tg_id, profession=profession, jobs=jobs[:2], title="Заказ",
+            task="Задача", price=None, period=7, requirements=None, created_at=datetime.datetime.now(),
+            is_active=True, files=[]
+        )
+
+    return [
+        Case("get_executors_by_jobs", lambda i: AsyncOrm.get_executors_by_jobs(pick(inputs.jobs_sets, i), session)),
+        Case("get_executors_feed_page",
+             lambda i: AsyncOrm.get_executors_feed_page(pick(inputs.jobs_sets, i), str(i), None, 20, session)),
+        Case("get_orders_by_jobs", lambda i: AsyncOrm.get_orders_by_jobs(pick(inputs.jobs_sets, i), session)),
+        Case("get_orders_ids_by_jobs",
+             lambda i: AsyncOrm.get_orders_ids_by_jobs(pick(inputs.jobs_sets, i), session)),
+        Case("get_favorites_executors",
+             lambda i: AsyncOrm.get_favorites_executors(pick(inputs.favorites_clients_tg_ids, i), session)),
+        Case("get_favorites_executors_ids",
+             lambda i: AsyncOrm.get_favorites_executors_ids(pick(inputs.favorites_clients_tg_ids, i), session)),
+        Case("get_favorites_orders",
+             lambda i: AsyncOrm.get_favorites_orders(pick(inputs.favorites_executors_ids, i), session)),
+        Case("get_favorites_orders_ids",
+             lambda i: AsyncOrm.get_favorites_orders_ids(pick(inputs.favorites_executors_ids, i), session)),
+        Case("get_executor_by_tg_id",
+             lambda i: AsyncOrm.get_executor_by_tg_id(pick(inputs.executors, i)[1], session)),
+        Case("user_is_banned", lambda i: AsyncOrm.user_is_banned(pick(inputs.users_tg_ids, i), session)),
+        Case("create_order", lambda i: AsyncOrm.create_order(order(i), session)),
+        # Соседние индексы дают разные пары исполнитель-клиент, каждый вызов записывает новый просмотр
+        Case("create_executor_view",
+             lambda i: AsyncOrm.create_executor_view(pick(inputs.executors, i)[0],
+                                                     pick(inputs.clients, i * 7 + 1)[0], session)),
+    ]
+
+
+async def run_case(case: Case, session: CountingSession, iterations: int, warmup: int) -> dict[str, float]:
+    for i in range(warmup):
+        await case.call(i)
+
+    samples: list[float] = []
+    round_trips = 0
+    rows = 0
+    for i in range(warmup, warmup + iterations):
+        session.reset()
+        with Timer() as timer:
+            result = await case.call(i)
+        samples.append(timer.ms)
+        round_trips += session.round_trips
+        # create_order ничего не возвращает, записанный заказ - одна строка
+        rows += rows_count(result) if case.name != "create_order" else 1
+
+    total_s = sum(samples) / 1000
+    return {
+        **percentiles(samples),
+        "round_trips": round_trips / iterations,
+        "rows_per_call": rows / iterations,
+        "rows_per_s": rows / total_s if total_s else 0.0,
+    }
+
+
+def report(results: dict[str, dict[str, float]], baseline: dict[str, Any] | None, threshold: float) -> list[str]:
+    """Таблица результатов, возвращает методы с замедлением больше threshold процентов"""
+    previous = baseline["results"] if baseline else {}
+    if baseline:
+        print(f"Сравнение с {baseline['revision']} от {baseline['created_at']}")
+
+    print(f"{'метод':<28} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'trips':>5} | {'rows/s':>10} "
+          f"| {'Δp50':>6} | {'Δp95':>6}")
+    regressions = []
+    for name, result in results.items():
+        before = previous.get(name, {})
+        print(f"{name:<28} | {result['p50']:>8.2f} | {result['p95']:>8.2f} | {result['p99']:>8.2f} "
+              f"| {result['round_trips']:>5.1f} | {result['rows_per_s']:>10.0f} "
+              f"| {change(result['p50'], before.get('p50')):>6} | {change(result['p95'], before.get('p95')):>6}")
+
+        for key in ("p50", "p95"):
+            if before.get(key) and result[key] > before[key] * (1 + threshold / 100):
+                regressions.append(f"{name} {key}")
+        if before.get("round_trips") is not None and result["round_trips"] > before["round_trips"]:
+            regressions.append(f"{name} round trips")
+    return regressions
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк методов AsyncOrm")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="только перечисленные методы")
+    parser.add_argument("--baseline", help="файл результатов для сравнения, по умолчанию последний запуск")
+    parser.add_argument("--threshold", type=float, default=20, help="допустимое замедление p50/p95 в процентах")
+    parser.add_argument("--no-save", action="store_true", help="не сохранять результаты")
+    args = parser.parse_args()
+
+    conn = await connect()
+    session = CountingSession(conn)
+    tr = conn.transaction()
+    await tr.start()
+
+    try:
+        inputs = await load_inputs(conn, random.Random(args.seed), args.iterations + args.warmup)
+        if not (inputs.jobs_sets and inputs.favorites_clients_tg_ids and inputs.favorites_executors_ids
+                and inputs.clients):
+            raise SystemExit("Нет синтетических данных, сначала выполните python -m benchmarks.dataset")
+
+        results = {}
+        for case in build_cases(inputs, session):
+            if args.only and case.name not in args.only:
+                continue
+            results[case.name] = await run_case(case, session, args.iterations, args.warmup)
+
+    finally:
+        await tr.rollback()
+        await conn.close()
+
+    regressions = report(results, load_baseline(NAME, args.baseline), args.threshold)
+    if not args.no_save:
+        print(f"Результаты сохранены в {save_results(NAME, results)}")
+    if regressions:
+        print(f"Регрессии относительно предыдущего запуска: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+    Проверка S3 клиента на локальном S3-совместимом хранилище: загрузка и скачивание маленького и
+    большого (multipart) файла, содержимое должно совпасть, а event loop не должен блокироваться во время передачи.
+
+    Локальное хранилище, например MinIO:
+        docker run -p 9000:9000 -e MINIO_ROOT_USER=minio -e MINIO_ROOT_PASSWORD=minio123 minio/minio server /data
+
+    Запуск: S3_URL=http://localhost:9000 S3_ACCESS_KEY=minio S3_SECRET_KEY=minio123 python -m benchmarks.s3_storage
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from benchmarks.utils import Timer
+from settings import settings
+from utils.s3_storage import s3_storage
+
+SIZES_MB = (1, 40)
+MAX_LOOP_LAG_MS = 100
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    """Максимальная задержка event loop относительно интервала 10 мс"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.01)
+        lags.append((loop.time() - start - 0.01) * 1000)
+
+
+def sha256(filepath: str) -> str:
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+async def main() -> None:
+    # Бакет для проверки создается, если его нет
+    buckets = await s3_storage.run(s3_storage.client.list_buckets)
+    if settings.s3_bucket_name not in {bucket["Name"] for bucket in buckets["Buckets"]}:
+        await s3_storage.run(s3_storage.client.create_bucket, Bucket=settings.s3_bucket_name)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size_mb in SIZES_MB:
+                src = os.path.join(tmp_dir, f"src_{size_mb}.bin")
+                dst = os.path.join(tmp_dir, f"dst_{size_mb}.bin")
+                with open(src, "wb") as f:
+                    f.write(os.urandom(size_mb * 1024 * 1024))
+                key = f"bench/{size_mb}mb.bin"
+
+                stop, lags = asyncio.Event(), []
+                lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+
+                with Timer() as upload:
+                    await s3_storage.upload_file(src, key)
+                with Timer() as download:
+                    await s3_storage.download_file(key, dst)
+
+                stop.set()
+                await lag_task
+                await s3_storage.run(s3_storage.client.delete_object, Bucket=settings.s3_bucket_name, Key=key)
+
+                max_lag = max(lags, default=0)
+                multipart = size_mb >= settings.s3_multipart_threshold_mb
+                print(f"{size_mb:>3} MB | multipart: {multipart} | upload {upload.ms:.0f} ms | "
+                      f"download {download.ms:.0f} ms | max loop lag {max_lag:.1f} ms")
+
+                assert sha256(src) == sha256(dst), f"{size_mb} MB: скачанный файл не совпадает с загруженным"
+                assert max_lag < MAX_LOOP_LAG_MS, f"{size_mb} MB: event loop заблокирован на {max_lag:.1f} мс"
+
+        print("OK: файлы совпадают, event loop не блокируется")
+
+    finally:
+        s3_storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import time
+from typing import Any
+
+import asyncpg
+
+from database.instrumentation import InstrumentedSession
+from settings import settings
+
+# Каталог JSON результатов бенчмарков для сравнения с предыдущим запуском
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+async def connect() -> asyncpg.Connection:
+    """Соединение с локальной БД для бенчмарков"""
+    return await asyncpg.connect(
+        user=settings.db.postgres_user,
+        host=settings.db.postgres_host,
+        password=settings.db.postgres_password,
+        port=settings.db.postgres_port,
+        database=settings.db.postgres_db
+    )
+
+
+class CountingSession(InstrumentedSession):
+    """Обертка над соединением, считает количество запросов (round trips) к БД"""
+
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+        self.round_trips = 0
+
+    def reset(self) -> None:
+        self.round_trips = 0
+
+    async def connection(self) -> asyncpg.Connection:
+        return self.conn
+
+    async def _run(self, method: str, query: str, *args: Any, **kwargs: Any) -> Any:
+        self.round_trips += 1
+        return await super()._run(method, query, *args, **kwargs)
+
+    def transaction(self, **kwargs: Any):
+        return self.conn.transaction(**kwargs)
+
+
+class Timer:
+    """Замер времени выполнения блока в мс"""
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.ms = (time.perf_counter() - self.start) * 1000
+
+
+class ExplainSession(CountingSession):
+    """
+        Обертка над соединением, которая перед каждым запросом на чтение
+        сохраняет его план (EXPLAIN FORMAT JSON) в plans
+    """
+
+    def __init__(self, conn: asyncpg.Connection):
+        super().__init__(conn)
+        self.plans: list[tuple[str, dict]] = []
+
+    def reset(self) -> None:
+        super().reset()
+        self.plans = []
+
+    async def explain(self, query: str, *args: Any) -> None:
+        plan = await self.conn.fetchval("EXPLAIN (FORMAT JSON) " + query, *args)
+        self.plans.append((query, json.loads(plan)[0]["Plan"]))
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> list[asyncpg.Record]:
+        await self.explain(query, *args)
+        return await super().fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> asyncpg.Record | None:
+        await self.explain(query, *args)
+        return await super().fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        await self.explain(query, *args)
+        return await super().fetchval(query, *args, **kwargs)
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Таблицы, которые читаются последовательным сканированием в плане запроса"""
+    tables = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        tables.extend(seq_scans(child))
+    return tables
+
+
+def percentiles(samples_ms: list[float]) -> dict[str, float]:
+    """p50/p95/p99 и среднее по замерам в мс"""
+    if len(samples_ms) < 2:
+        value = samples_ms[0] if samples_ms else 0.0
+        return {"p50": value, "p95": value, "p99": value, "mean": value}
+    cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "mean": statistics.fmean(samples_ms)}
+
+
+def git_revision() -> str:
+    """Короткий хеш текущего коммита для подписи результатов"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(name: str, results: dict[str, Any]) -> str:
+    """Сохранение результатов в results/<name>-<время>-<коммит>.json, возвращает путь к файлу"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    revision = git_revision()
+    created_at = datetime.datetime.now()
+    path = os.path.join(RESULTS_DIR, f"{name}-{created_at:%Y%m%d-%H%M%S}-{revision}.json")
+    with open(path, "w") as file:
+        json.dump({"revision": revision, "created_at": created_at.isoformat(), "results": results}, file,
+                  ensure_ascii=False, indent=2)
+    return path
+
+
+def load_baseline(name: str, path: str | None = None) -> dict[str, Any] | None:
+    """Результаты из path или последний сохраненный запуск бенчмарка name"""
+    if path is None:
+        if not os.path.isdir(RESULTS_DIR):
+            return None
+        files = sorted(f for f in os.listdir(RESULTS_DIR) if f.startswith(f"{name}-") and f.endswith(".json"))
+        if not files:
+            return None
+        path = os.path.join(RESULTS_DIR, files[-1])
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def change(current: float, baseline: float | None) -> str:
+    """Изменение относительно предыдущего запуска в процентах"""
+    if not baseline:
+        return "-"
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
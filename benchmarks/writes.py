@@ -0,0 +1,135 @@
+"""
+    Бенчмарк записи профилей и заказов: количество запросов внутри транзакции
+    не должно зависеть от количества jobs и файлов, время транзакции выводится для каждого размера.
+    Тестовые данные создаются внутри транзакции, которая в конце откатывается.
+
+    Запуск: python -m benchmarks.writes
+"""
+import asyncio
+import datetime
+
+import asyncpg
+
+from benchmarks.utils import connect, CountingSession, Timer
+from database.orm import AsyncOrm
+from database.tables import Availability
+from schemas.executor import ExecutorAdd, Executor
+from schemas.order import OrderAdd, TaskFileAdd
+from schemas.profession import Job, Profession
+
+SIZES = (1, 10)
+
+
+async def seed_jobs(conn: asyncpg.Connection, size: int) -> tuple[Profession, list[Job]]:
+    """Создание профессии с size jobs"""
+    profession_id = await conn.fetchval(
+        """
+        INSERT INTO professions (title) VALUES ($1) RETURNING id
+        """,
+        f"bench writes profession {size}"
+    )
+    jobs = [
+        Job(id=await conn.fetchval(
+            """
+            INSERT INTO jobs (title, profession_id) VALUES ($1, $2) RETURNING id
+            """,
+            f"bench writes job {size}-{i}", profession_id
+        ), title=f"bench writes job {size}-{i}", profession_id=profession_id)
+        for i in range(size)
+    ]
+    return Profession(id=profession_id, title=f"bench writes profession {size}", emoji=None), jobs
+
+
+async def seed_user(conn: asyncpg.Connection, tg_id: str) -> None:
+    """Создание пользователя без роли"""
+    await conn.execute(
+        """
+        INSERT INTO users (tg_id, created_at, is_banned, is_admin)
+        VALUES ($1, now(), false, false)
+        """,
+        tg_id
+    )
+
+
+async def run_writes(conn: asyncpg.Connection, session: CountingSession, size: int) -> dict[str, tuple[int, float]]:
+    """Запись профиля и заказа с size jobs и size файлами, возвращает количество запросов и время каждой операции"""
+    profession, jobs = await seed_jobs(conn, size)
+    files = [TaskFileAdd(file_id=f"bench_file_{size}_{i}", filename=f"file_{i}.pdf") for i in range(size)]
+    results: dict[str, tuple[int, float]] = {}
+
+    async def measure(name: str, call) -> None:
+        session.reset()
+        with Timer() as timer:
+            await call
+        results[name] = (session.round_trips, timer.ms)
+
+    # Исполнитель
+    executor_tg_id = f"bench_writes_ex_{size}"
+    await seed_user(conn, executor_tg_id)
+    executor = ExecutorAdd(
+        tg_id=executor_tg_id, name="Исполнитель", age=25, description="Описание", rate="договорная",
+        experience="3 года", links=["https://example.com"], availability=Availability.FREE.value, contacts=None,
+        location=None, photo=False, profession=profession, jobs=jobs
+    )
+    await measure("create_executor", AsyncOrm.create_executor(executor, session))
+
+    executor_id = await conn.fetchval("SELECT id FROM executors WHERE tg_id = $1", executor_tg_id)
+    await measure("update_executor", AsyncOrm.update_executor(Executor(id=executor_id, **executor.model_dump()),
+                                                              session))
+    await measure("update_profession", AsyncOrm.update_profession(executor_tg_id, [job.id for job in jobs], session))
+
+    # Заказ
+    client_tg_id = f"bench_writes_cl_{size}"
+    await seed_user(conn, client_tg_id)
+    client_id = await conn.fetchval(
+        """
+        INSERT INTO clients (tg_id, name, created_at) VALUES ($1, 'Клиент', now()) RETURNING id
+        """,
+        client_tg_id
+    )
+    order = OrderAdd(
+        client_id=client_id, tg_id=client_tg_id, profession=profession, jobs=jobs, title="Заказ", task="Задача",
+        price=None, period=7, requirements=None, created_at=datetime.datetime.now(), is_active=True, files=files
+    )
+    await measure("create_order", AsyncOrm.create_order(order, session))
+
+    order_id = await conn.fetchval("SELECT id FROM orders WHERE client_id = $1", client_id)
+    await measure("update_order_profession",
+                  AsyncOrm.update_order_profession(order_id, [job.id for job in jobs], session))
+    await measure("update_order_files", AsyncOrm.update_order_files(order_id, files, session))
+
+    files_count = await conn.fetchval("SELECT count(*) FROM taskfiles WHERE order_id = $1", order_id)
+    assert files_count == size, f"ожидалось {size} файлов, получено {files_count}"
+
+    return results
+
+
+async def main() -> None:
+    conn = await connect()
+    session = CountingSession(conn)
+    tr = conn.transaction()
+    await tr.start()
+
+    try:
+        by_size = {size: await run_writes(conn, session, size) for size in SIZES}
+
+        for name in by_size[SIZES[0]]:
+            line = " | ".join(
+                f"{size:>2} jobs/files: {by_size[size][name][0]} round trips, {by_size[size][name][1]:.1f} ms"
+                for size in SIZES
+            )
+            print(f"{name:<25} | {line}")
+
+            round_trips = {size: by_size[size][name][0] for size in SIZES}
+            assert len(set(round_trips.values())) == 1, \
+                f"{name}: количество запросов зависит от количества jobs и файлов: {round_trips}"
+
+        print("OK: количество запросов не зависит от количества jobs и файлов")
+
+    finally:
+        await tr.rollback()
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, List
+
+from logger import logger
+from schemas.profession import Profession, Job
+from settings import settings
+
+
+class TaxonomyCache:
+    """
+        Кэш профессий и jobs в памяти процесса.
+        Сбрасывается через invalidate() после изменений из бота и перечитывается раз в ttl секунд,
+        чтобы подхватывать правки из админ панели
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._professions: dict[int, Profession] = {}
+        self._jobs: dict[int, Job] = {}
+        self._jobs_by_profession: dict[int, List[int]] = {}
+        self._loaded_at: float | None = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        """True если кэш не загружен, сброшен или устарел по ttl"""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def invalidate(self) -> None:
+        """Сброс кэша, при следующем обращении данные будут перечитаны из БД"""
+        self._version += 1
+        self._loaded_at = None
+
+    async def load(self, session: Any) -> None:
+        """Загрузка всех профессий и jobs из БД"""
+        version = self._version
+
+        prof_rows = await session.fetch(
+            """
+            SELECT *
+            FROM professions
+            ORDER BY title
+            """
+        )
+        jobs_rows = await session.fetch(
+            """
+            SELECT *
+            FROM jobs
+            ORDER BY title
+            """
+        )
+
+        professions: dict[int, Profession] = {row["id"]: Profession.model_validate(row) for row in prof_rows}
+        jobs: dict[int, Job] = {row["id"]: Job.model_validate(row) for row in jobs_rows}
+        jobs_by_profession: dict[int, List[int]] = {profession_id: [] for profession_id in professions}
+        for job in jobs.values():
+            jobs_by_profession.setdefault(job.profession_id, []).append(job.id)
+
+        self._professions, self._jobs, self._jobs_by_profession = professions, jobs, jobs_by_profession
+
+        # Если во время загрузки кэш сбросили, данные могли устареть
+        if version == self._version:
+            self._loaded_at = time.monotonic()
+
+        logger.info(f"Загружен кэш профессий: {len(professions)} профессий, {len(jobs)} jobs")
+
+    async def ensure_loaded(self, session: Any) -> None:
+        """Перечитывает кэш если он устарел"""
+        if not self.is_stale:
+            return
+
+        async with self._lock:
+            if self.is_stale:
+                await self.load(session)
+
+    def get_professions(self) -> List[Profession]:
+        """Все профессии, отсортированные по названию"""
+        return list(self._professions.values())
+
+    def get_profession(self, profession_id: int) -> Profession | None:
+        """Профессия по id"""
+        return self._professions.get(profession_id)
+
+    def get_jobs_by_profession(self, profession_id: int) -> List[Job]:
+        """Jobs профессии, отсортированные по названию"""
+        return [self._jobs[job_id] for job_id in self._jobs_by_profession.get(profession_id, [])]
+
+    def get_jobs_by_ids(self, jobs_ids: List[int]) -> List[Job]:
+        """Jobs по списку id"""
+        return [self._jobs[job_id] for job_id in dict.fromkeys(jobs_ids) if job_id in self._jobs]
+
+
+taxonomy_cache = TaxonomyCache(ttl=settings.taxonomy_cache_ttl)
@@ -0,0 +1,121 @@
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any
+
+import asyncpg
+from prometheus_client import Counter, Histogram
+
+from logger import logger
+from settings import settings
+from utils.metrics import LATENCY_BUCKETS, current_update
+
+QUERY_LATENCY = Histogram(
+    "bot_db_query_latency_seconds", "Время запроса к БД по отпечатку запроса", ["query_id"], buckets=LATENCY_BUCKETS
+)
+SLOW_QUERIES = Counter("bot_db_slow_queries", "Запросы дольше db.slow_query_ms", ["query_id"])
+N_PLUS_ONE = Counter("bot_db_n_plus_one", "Апдейты с повторением одного запроса больше db.n_plus_one_threshold раз",
+                     ["handler", "query_id"])
+
+_COMMENTS = re.compile(r"--[^\n]*")
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![$\w])\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+class NPlusOneError(BaseException):
+    """
+        Один и тот же запрос выполнен в апдейте больше db.n_plus_one_threshold раз (db.n_plus_one_raise).
+        Наследуется от BaseException, чтобы не теряться в except Exception методов AsyncOrm, которые логируют ошибку
+        и возвращают None
+    """
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """Нормализованный текст запроса: без комментариев, литералов и лишних пробелов"""
+    query = _COMMENTS.sub(" ", query)
+    query = _STRINGS.sub("?", query)
+    query = _NUMBERS.sub("?", query)
+    query = _IN_LISTS.sub("(...)", query)
+    return _SPACES.sub(" ", query).strip()
+
+
+@lru_cache(maxsize=1024)
+def query_id(query_fingerprint: str) -> str:
+    """Короткий идентификатор отпечатка для меток метрик"""
+    return hashlib.sha1(query_fingerprint.encode()).hexdigest()[:12]
+
+
+def record_query(query: str, elapsed: float) -> None:
+    """
+        Учет выполненного запроса: гистограмма по отпечатку, лог медленных запросов,
+        счетчики текущего апдейта и поиск N+1 (один отпечаток больше n_plus_one_threshold раз за апдейт)
+    """
+    query_fingerprint = fingerprint(query)
+    qid = query_id(query_fingerprint)
+    QUERY_LATENCY.labels(qid).observe(elapsed)
+
+    stats = current_update.get()
+    handler = stats.handler if stats is not None else "-"
+
+    if elapsed * 1000 >= settings.db.slow_query_ms:
+        SLOW_QUERIES.labels(qid).inc()
+        logger.warning(f"Медленный запрос {elapsed * 1000:.0f} мс [{qid}] в {handler}: {query_fingerprint}")
+
+    if stats is None:
+        return
+
+    stats.queries += 1
+    stats.db_time += elapsed
+    stats.fingerprints[qid] += 1
+
+    if stats.fingerprints[qid] > settings.db.n_plus_one_threshold and qid not in stats.flagged:
+        stats.flagged.add(qid)
+        N_PLUS_ONE.labels(handler, qid).inc()
+        msg = f"N+1: запрос [{qid}] выполнен больше {settings.db.n_plus_one_threshold} раз в {handler}: " \
+              f"{query_fingerprint}"
+        logger.warning(msg)
+        if settings.db.n_plus_one_raise:
+            raise NPlusOneError(msg)
+
+
+class InstrumentedSession(ABC):
+    """
+        Методы соединения asyncpg, которые использует AsyncOrm, с замером времени каждого запроса.
+        Наследник определяет, откуда берется соединение
+    """
+
+    @abstractmethod
+    async def connection(self) -> asyncpg.Connection:
+        """Соединение для очередного запроса"""
+
+    async def _run(self, method: str, query: str, *args: Any, **kwargs: Any) -> Any:
+        conn = await self.connection()
+        started = time.perf_counter()
+        try:
+            return await getattr(conn, method)(query, *args, **kwargs)
+        finally:
+            record_query(query if method != "copy_records_to_table" else f"COPY {query}",
+                         time.perf_counter() - started)
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._run("execute", query, *args, **kwargs)
+
+    async def executemany(self, command: str, args: Any, **kwargs: Any) -> None:
+        return await self._run("executemany", command, args, **kwargs)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> list[asyncpg.Record]:
+        return await self._run("fetch", query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> asyncpg.Record | None:
+        return await self._run("fetchrow", query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("fetchval", query, *args, **kwargs)
+
+    async def copy_records_to_table(self, table_name: str, **kwargs: Any) -> str:
+        return await self._run("copy_records_to_table", table_name, **kwargs)
@@ -0,0 +1,64 @@
+"""hot path indexes
+
+Revision ID: 3a9f6c2d1e47
+Revises: 8c1d5e7a4b20
+Create Date: 2026-10-17 14:05:19.812640
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3a9f6c2d1e47"
+down_revision: Union[str, None] = "8c1d5e7a4b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя индекса, таблица, колонки, условие частичного индекса)
+INDEXES = (
+    # job_id уже ведущая колонка первичного ключа (job_id, executor_id), нужен обратный порядок
+    ("ix_executors_jobs_executor_id_job_id", "executors_jobs", ["executor_id", "job_id"], None),
+    ("ix_orders_jobs_order_id_job_id", "orders_jobs", ["order_id", "job_id"], None),
+    ("ix_executors_tg_id", "executors", ["tg_id"], None),
+    ("ix_clients_tg_id", "clients", ["tg_id"], None),
+    ("ix_favorite_executors_executor_id", "favorite_executors", ["executor_id"], None),
+    ("ix_favorite_orders_order_id", "favorite_orders", ["order_id"], None),
+    ("ix_taskfiles_order_id", "taskfiles", ["order_id"], None),
+    ("ix_orders_responses_order_id_executor_id", "orders_responses", ["order_id", "executor_id"], None),
+    ("ix_executors_views_executor_id_client_id", "executors_views", ["executor_id", "client_id"], None),
+    # лента исполнителей
+    ("ix_executors_feed", "executors", ["id"], "verified AND availability = 'свободен'"),
+    # лента заказов
+    ("ix_orders_active_created_at", "orders", ["created_at"], "is_active"),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,61 @@
+"""unique responses and views
+
+Revision ID: 5e2b8d4f7c13
+Revises: 3a9f6c2d1e47
+Create Date: 2026-10-17 15:32:08.104377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2b8d4f7c13"
+down_revision: Union[str, None] = "3a9f6c2d1e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (таблица, имя ограничения, колонки, заменяемый неуникальный индекс)
+CONSTRAINTS = (
+    ("orders_responses", "uq_orders_responses_order_id_executor_id", ("order_id", "executor_id"),
+     "ix_orders_responses_order_id_executor_id"),
+    ("executors_views", "uq_executors_views_executor_id_client_id", ("executor_id", "client_id"),
+     "ix_executors_views_executor_id_client_id"),
+)
+
+
+def upgrade() -> None:
+    for table, _, columns, _ in CONSTRAINTS:
+        # Оставляем самую раннюю запись из дублей, созданных гонкой INSERT ... WHERE NOT EXISTS
+        op.execute(
+            f"""
+            DELETE FROM {table} AS a
+            USING {table} AS b
+            WHERE {" AND ".join(f"a.{column} = b.{column}" for column in columns)} AND a.id > b.id
+            """
+        )
+
+    with op.get_context().autocommit_block():
+        for table, name, columns, _ in CONSTRAINTS:
+            op.create_index(
+                name,
+                table,
+                list(columns),
+                unique=True,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+    for table, name, _, index in CONSTRAINTS:
+        # Уникальный индекс становится ограничением, неуникальный индекс по тем же колонкам больше не нужен
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+        op.drop_index(index, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    for table, name, columns, index in reversed(CONSTRAINTS):
+        op.create_index(index, table, list(columns), unique=False, if_not_exists=True)
+        op.drop_constraint(name, table, type_="unique")
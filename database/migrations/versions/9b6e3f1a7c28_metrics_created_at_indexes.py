@@ -0,0 +1,52 @@
+"""metrics created_at indexes
+
+Revision ID: 9b6e3f1a7c28
+Revises: 5e2b8d4f7c13
+Create Date: 2026-10-17 17:11:42.530918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b6e3f1a7c28"
+down_revision: Union[str, None] = "5e2b8d4f7c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Метрики в админ панели фильтруют период и сортируют страницу строк по created_at
+INDEXES = (
+    ("ix_orders_responses_created_at", "orders_responses"),
+    ("ix_executors_views_created_at", "executors_views"),
+    ("ix_executors_created_at", "executors"),
+    ("ix_clients_created_at", "clients"),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name,
+                table,
+                ["created_at"],
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,76 @@
+"""daily rollups
+
+Revision ID: c4e8a2d6f391
+Revises: 9b6e3f1a7c28
+Create Date: 2026-10-17 18:02:55.217604
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a2d6f391"
+down_revision: Union[str, None] = "9b6e3f1a7c28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_executor_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("executor_id", sa.Integer(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("responses", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["executor_id"], ["executors.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("day", "executor_id"),
+    )
+    op.create_table(
+        "daily_order_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("responses", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("day", "order_id"),
+    )
+    op.create_table(
+        "daily_profession_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("profession_id", sa.Integer(), nullable=False),
+        sa.Column("responses", sa.Integer(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("executors", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["profession_id"], ["professions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("day", "profession_id"),
+    )
+    op.create_table(
+        "daily_registration_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "role"),
+    )
+    op.create_table(
+        "rollups_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("complete_from", sa.Date(), nullable=False),
+        sa.Column(
+            "refreshed_until",
+            sa.DateTime(),
+            nullable=False,
+            comment="UTC, строки раньше уже учтены в агрегатах",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rollups_state")
+    op.drop_table("daily_registration_stats")
+    op.drop_table("daily_profession_stats")
+    op.drop_table("daily_order_stats")
+    op.drop_table("daily_executor_stats")
@@ -0,0 +1,41 @@
+"""media files content version
+
+Revision ID: e5a7c9d1b362
+Revises: c4e8a2d6f391
+Create Date: 2026-10-17 18:04:27.114352
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a7c9d1b362"
+down_revision: Union[str, None] = "c4e8a2d6f391"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "media_files",
+        "version",
+        existing_type=sa.String(),
+        existing_nullable=False,
+        comment="размер и хэш содержимого файла на момент загрузки",
+        existing_comment="mtime и размер файла на момент загрузки",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "media_files",
+        "version",
+        existing_type=sa.String(),
+        existing_nullable=False,
+        comment="mtime и размер файла на момент загрузки",
+        existing_comment="размер и хэш содержимого файла на момент загрузки",
+    )
@@ -1,11 +1,13 @@
 import datetime
+import json
 from collections.abc import Mapping
 from typing import Any, List
 
 import asyncpg
 
+from database.cache import taxonomy_cache
 from database.database import async_engine
-from database.tables import Base, UserRoles, Availability
+from database.tables import Base, UserRoles
 
 from logger import logger
 from schemas.blocked_users import BlockedUserAdd, BlockedUser
@@ -14,11 +16,140 @@ from schemas.executor import ExecutorAdd, Executor
 from schemas.order import OrderAdd, Order, TaskFile, TaskFileAdd
 from schemas.profession import Profession, Job, ProfessionAdd, JobAdd
 from schemas.responses import OrderResponse
-from schemas.user import UserAdd, User
+from schemas.user import UserAdd, User, UserContext
 
 # для model_validate регистрируем возвращаемый из asyncpg.fetchrow класс Record
 Mapping.register(asyncpg.Record)
 
+# Колонки профиля исполнителя вместе с jobs (json массив) и профессией (по первой job)
+EXECUTORS_WITH_JOBS_COLUMNS = """
+    SELECT ex.id, ex.tg_id, ex.name, ex.age, ex.description, ex.rate, ex.experience, ex.links,
+    ex.availability, ex.contacts, ex.location, ex.photo, ex.verified,
+    ex_j.jobs, p.id AS profession_id, p.title AS profession_title, p.emoji AS profession_emoji
+"""
+
+# Агрегация jobs и профессия для каждой строки ex
+EXECUTOR_JOBS_JOIN = """
+    JOIN LATERAL (
+        SELECT json_agg(
+                   json_build_object('id', j.id, 'title', j.title, 'profession_id', j.profession_id) ORDER BY j.id
+               ) AS jobs,
+               (array_agg(j.profession_id ORDER BY j.id))[1] AS profession_id
+        FROM executors_jobs AS ej
+        JOIN jobs AS j ON j.id = ej.job_id
+        WHERE ej.executor_id = ex.id
+    ) AS ex_j ON true
+    JOIN professions AS p ON p.id = ex_j.profession_id
+"""
+
+EXECUTORS_WITH_JOBS_QUERY = EXECUTORS_WITH_JOBS_COLUMNS + "    FROM executors AS ex" + EXECUTOR_JOBS_JOIN
+
+# Файлы заказа из двух параллельных массивов (имена и file_id) одним запросом, порядок файлов сохраняется
+TASKFILES_INSERT_QUERY = """
+    INSERT INTO taskfiles (filename, file_id, order_id)
+    SELECT f.filename, f.file_id, $3
+    FROM unnest($1::varchar[], $2::varchar[]) WITH ORDINALITY AS f(filename, file_id, ord)
+    ORDER BY f.ord
+"""
+
+
+async def hydrate_orders(order_rows: List[asyncpg.Record], session: Any) -> List[Order]:
+    """Сборка моделей заказов: jobs, профессии и файлы запрашиваются сразу для всех заказов"""
+    if not order_rows:
+        return []
+
+    orders_ids = list({order_row["id"] for order_row in order_rows})
+
+    # jobs с профессиями для всех заказов
+    jobs_rows = await session.fetch(
+        """
+        SELECT oj.order_id, j.id, j.title, j.profession_id, p.title AS profession_title, p.emoji AS profession_emoji
+        FROM orders_jobs AS oj
+        JOIN jobs AS j ON j.id = oj.job_id
+        JOIN professions AS p ON p.id = j.profession_id
+        WHERE oj.order_id = ANY($1::int[])
+        ORDER BY oj.order_id, j.id
+        """,
+        orders_ids
+    )
+
+    # Файлы для всех заказов
+    files_rows = await session.fetch(
+        """
+        SELECT *
+        FROM taskfiles
+        WHERE order_id = ANY($1::int[])
+        ORDER BY id
+        """,
+        orders_ids
+    )
+
+    jobs: dict[int, List[Job]] = {}
+    professions: dict[int, Profession] = {}
+    for job_row in jobs_rows:
+        order_id = job_row["order_id"]
+        jobs.setdefault(order_id, []).append(
+            Job(id=job_row["id"], title=job_row["title"], profession_id=job_row["profession_id"])
+        )
+        # профессия заказа по первой job
+        if order_id not in professions:
+            professions[order_id] = Profession(
+                id=job_row["profession_id"],
+                title=job_row["profession_title"],
+                emoji=job_row["profession_emoji"]
+            )
+
+    files: dict[int, List[TaskFile]] = {}
+    for file_row in files_rows:
+        files.setdefault(file_row["order_id"], []).append(TaskFile.model_validate(file_row))
+
+    orders: List[Order] = []
+    for order_row in order_rows:
+        order_id = order_row["id"]
+        orders.append(
+            Order(
+                id=order_id,
+                client_id=order_row["client_id"],
+                tg_id=order_row["tg_id"],
+                profession=professions[order_id],
+                jobs=jobs[order_id],
+                title=order_row["title"],
+                task=order_row["task"],
+                price=order_row["price"],
+                period=order_row["period"],
+                requirements=order_row["requirements"],
+                created_at=order_row["created_at"],
+                is_active=order_row["is_active"],
+                files=files.get(order_id, [])
+            )
+        )
+    return orders
+
+
+def executor_from_row(row: asyncpg.Record) -> Executor:
+    """Сборка модели исполнителя из строки EXECUTORS_WITH_JOBS_QUERY"""
+    return Executor(
+        id=row["id"],
+        tg_id=row["tg_id"],
+        name=row["name"],
+        age=row["age"],
+        description=row["description"],
+        rate=row["rate"],
+        experience=row["experience"],
+        links=row["links"].split("|"),
+        availability=row["availability"],
+        contacts=row["contacts"],
+        location=row["location"],
+        photo=row["photo"],
+        verified=row["verified"],
+        profession=Profession(
+            id=row["profession_id"],
+            title=row["profession_title"],
+            emoji=row["profession_emoji"]
+        ),
+        jobs=[Job.model_validate(job) for job in json.loads(row["jobs"])]
+    )
+
 
 class AsyncOrm:
 
@@ -99,6 +230,37 @@ class AsyncOrm:
         except Exception as e:
             logger.error(f"Ошибка при получении пользователя tg_id {tg_id}: {e}")
 
+    @staticmethod
+    async def get_user_context(tg_id: str, session: Any) -> UserContext:
+        """Пользователь вместе с id профилей клиента/исполнителя и флагами бана, админа и верификации"""
+        try:
+            row = await session.fetchrow(
+                """
+                SELECT u.id AS user_id, u.username, u.role, u.is_banned, u.is_admin,
+                c.id AS client_id, ex.id AS executor_id, ex.verified
+                FROM (SELECT $1::varchar AS tg_id) AS t
+                LEFT JOIN users AS u ON u.tg_id = t.tg_id
+                LEFT JOIN clients AS c ON c.tg_id = t.tg_id
+                LEFT JOIN executors AS ex ON ex.tg_id = t.tg_id
+                """,
+                tg_id
+            )
+            return UserContext(
+                tg_id=tg_id,
+                user_id=row["user_id"],
+                username=row["username"],
+                role=row["role"],
+                is_banned=bool(row["is_banned"]),
+                is_admin=bool(row["is_admin"]),
+                client_id=row["client_id"],
+                executor_id=row["executor_id"],
+                verified=bool(row["verified"])
+            )
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении данных пользователя tg_id {tg_id}: {e}")
+            raise
+
     @staticmethod
     async def user_has_role(tg_id: str, session: Any) -> bool:
         """Проверяет выбрана ли роль исполнитель/заказчик"""
@@ -259,15 +421,14 @@ class AsyncOrm:
                     executor_id
                 )
 
-                # Создание связи ExecutorsJobs
-                for job_id in jobs_ids:
-                    await session.execute(
-                        """
-                        INSERT INTO executors_jobs (job_id, executor_id)
-                        VALUES ($1, $2)
-                        """,
-                        job_id, executor_id
-                    )
+                # Создание связи ExecutorsJobs одним запросом
+                await session.execute(
+                    """
+                    INSERT INTO executors_jobs (job_id, executor_id)
+                    SELECT job_id, $2 FROM unnest($1::int[]) AS job_id
+                    """,
+                    jobs_ids, executor_id
+                )
                 logger.info(f"Профессии исполнителя tg_id {tg_id} изменены на {jobs_ids}")
 
         except Exception as e:
@@ -278,32 +439,19 @@ class AsyncOrm:
     async def get_professions(session: Any) -> List[Profession]:
         """Получение всех профессий"""
         try:
-            rows = await session.fetch(
-                """
-                SELECT *
-                FROM professions
-                ORDER BY title
-                """
-            )
-            professions = [Profession.model_validate(row) for row in rows]
+            await taxonomy_cache.ensure_loaded(session)
+            professions = taxonomy_cache.get_professions()
             return professions
 
         except Exception as e:
             logger.error(f"Ошибка при получении всех профессий: {e}")
 
     @staticmethod
-    async def get_profession(profession_id: int, session: Any) -> Profession:
+    async def get_profession(profession_id: int, session: Any) -> Profession | None:
         """Получение профессии по id"""
         try:
-            row = await session.fetchrow(
-                """
-                SELECT * 
-                FROM professions
-                WHERE id=$1 
-                """,
-                profession_id
-            )
-            return Profession.model_validate(row)
+            await taxonomy_cache.ensure_loaded(session)
+            return taxonomy_cache.get_profession(profession_id)
 
         except Exception as e:
             logger.error(f"Ошибка при получении профессии с id {profession_id}: {e}")
@@ -312,16 +460,8 @@ class AsyncOrm:
     async def get_jobs_by_profession(profession_id: int, session: Any) -> List[Job]:
         """Получение всех работ по выбранной профессии"""
         try:
-            rows = await session.fetch(
-                """
-                SELECT *
-                FROM jobs
-                WHERE profession_id=$1
-                ORDER BY title
-                """,
-                profession_id
-            )
-            jobs = [Job.model_validate(row) for row in rows]
+            await taxonomy_cache.ensure_loaded(session)
+            jobs = taxonomy_cache.get_jobs_by_profession(profession_id)
             return jobs
 
         except Exception as e:
@@ -331,15 +471,8 @@ class AsyncOrm:
     async def get_jobs_by_ids(jobs_ids: List[int], session: Any) -> List[Job]:
         """Получение Jobs по списку id"""
         try:
-            rows = await session.fetch(
-                """
-                SELECT * 
-                FROM jobs
-                WHERE id = ANY($1::int[])
-                """,
-                jobs_ids
-            )
-            jobs = [Job.model_validate(row) for row in rows]
+            await taxonomy_cache.ensure_loaded(session)
+            jobs = taxonomy_cache.get_jobs_by_ids(jobs_ids)
             return jobs
 
         except Exception as e:
@@ -365,15 +498,14 @@ class AsyncOrm:
                     e.location, e.photo, e.verified, created_at
                 )
 
-                # Создание связи ExecutorsJobs
-                for job in e.jobs:
-                    await session.execute(
-                        """
-                        INSERT INTO executors_jobs (job_id, executor_id)
-                        VALUES ($1, $2)
-                        """,
-                        job.id, executor_id
-                    )
+                # Создание связи ExecutorsJobs одним запросом
+                await session.execute(
+                    """
+                    INSERT INTO executors_jobs (job_id, executor_id)
+                    SELECT job_id, $2 FROM unnest($1::int[]) AS job_id
+                    """,
+                    [job.id for job in e.jobs], executor_id
+                )
 
                 # Указываем роль у пользователя
                 await session.execute(
@@ -418,15 +550,14 @@ class AsyncOrm:
                     e.id
                 )
 
-                # Создание связи ExecutorsJobs
-                for job in e.jobs:
-                    await session.execute(
-                        """
-                        INSERT INTO executors_jobs (job_id, executor_id)
-                        VALUES ($1, $2)
-                        """,
-                        job.id, e.id
-                    )
+                # Создание связи ExecutorsJobs одним запросом
+                await session.execute(
+                    """
+                    INSERT INTO executors_jobs (job_id, executor_id)
+                    SELECT job_id, $2 FROM unnest($1::int[]) AS job_id
+                    """,
+                    [job.id for job in e.jobs], e.id
+                )
 
                 # Меняем updated_at у user
                 await session.execute(
@@ -842,73 +973,103 @@ class AsyncOrm:
     async def get_executors_by_jobs(jobs_ids: list[int], session: Any) -> list[Executor]:
         """Подбор исполнителей по jobs"""
         try:
+            # Исполнители, их jobs и профессия одним запросом.
+            # Статус - литерал, а не параметр: иначе generic план подготовленного запроса не использует
+            # частичный индекс ix_executors_feed
             ex_rows = await session.fetch(
+                EXECUTORS_WITH_JOBS_QUERY +
                 """
-                SELECT DISTINCT ex.id, ex.tg_id, ex.name, ex.age, ex.description, ex.rate, ex.experience, ex.links, 
-                ex.availability, ex.contacts, ex.location, ex.photo, ex.verified  
-                FROM executors as ex
-                LEFT JOIN executors_jobs as ex_j ON ex.id = ex_j.executor_id 
-                WHERE ex.verified=true AND ex.availability=$1 AND ex_j.job_id = ANY($2::int[])
+                WHERE ex.verified=true AND ex.availability='свободен' AND EXISTS (
+                    SELECT 1 FROM executors_jobs AS f_ej
+                    WHERE f_ej.executor_id = ex.id AND f_ej.job_id = ANY($1::int[])
+                )
                 """,
-                Availability.FREE.value, jobs_ids
+                jobs_ids
             )
-            executors = []
-
-            for ex_row in ex_rows:
-                jobs_rows = await session.fetch(
-                    """
-                    SELECT j.id, j.title, j.profession_id 
-                    FROM jobs AS j
-                    JOIN executors_jobs AS ej ON j.id = ej.job_id
-                    WHERE ej.executor_id = $1
-                    """,
-                    ex_row["id"]
-                )
+            executors = [executor_from_row(ex_row) for ex_row in ex_rows]
 
-                jobs: list[Job] = []
-
-                for job_row in jobs_rows:
-                    jobs.append(
-                        Job(
-                            id=job_row["id"],
-                            title=job_row["title"],
-                            profession_id=job_row["profession_id"]
-                        )
-                    )
+            return executors
 
-                prof_row = await session.fetchrow(
-                    """
-                    SELECT * FROM professions
-                    WHERE id = $1
-                    """,
-                    jobs[0].profession_id
-                )
-                profession = Profession.model_validate(prof_row)
+        except Exception as e:
+            logger.error(f"Ошибка при получении исполнителей для работ jobs_id {jobs_ids}: {e}")
 
-                executors.append(
-                    Executor(
-                        id=ex_row["id"],
-                        tg_id=ex_row["tg_id"],
-                        name=ex_row["name"],
-                        age=ex_row["age"],
-                        description=ex_row["description"],
-                        rate=ex_row["rate"],
-                        experience=ex_row["experience"],
-                        links=ex_row["links"].split("|"),
-                        availability=ex_row["availability"],
-                        contacts=ex_row["contacts"],
-                        location=ex_row["location"],
-                        photo=ex_row["photo"],
-                        verified=ex_row["verified"],
-                        profession=profession,
-                        jobs=jobs
+    @staticmethod
+    async def get_executors_feed_page(jobs_ids: list[int], seed: str, cursor: int | None, limit: int,
+                                      session: Any) -> list[Executor]:
+        """
+            Страница ленты исполнителей по jobs.
+            Порядок случайный, но стабильный для seed: сортировка по md5(id || seed),
+            cursor - id последнего показанного исполнителя (None для первой страницы)
+        """
+        try:
+            # Сначала выбираются id страницы, jobs агрегируются только для них, а не для всех подходящих.
+            # Статус - литерал для частичного индекса ix_executors_feed (см. get_executors_by_jobs)
+            ex_rows = await session.fetch(
+                """
+                WITH page AS MATERIALIZED (
+                    SELECT ex.id, md5(ex.id::text || $2) AS sort_key
+                    FROM executors AS ex
+                    WHERE ex.verified=true AND ex.availability='свободен' AND EXISTS (
+                        SELECT 1 FROM executors_jobs AS f_ej
+                        WHERE f_ej.executor_id = ex.id AND f_ej.job_id = ANY($1::int[])
                     )
+                    AND ($3::int IS NULL OR (md5(ex.id::text || $2), ex.id) > (md5($3::int::text || $2), $3::int))
+                    ORDER BY md5(ex.id::text || $2), ex.id
+                    LIMIT $4
                 )
+                """ +
+                EXECUTORS_WITH_JOBS_COLUMNS +
+                "    FROM page JOIN executors AS ex ON ex.id = page.id" +
+                EXECUTOR_JOBS_JOIN +
+                """
+                ORDER BY page.sort_key, page.id
+                """,
+                jobs_ids, seed, cursor, limit
+            )
+            executors = [executor_from_row(ex_row) for ex_row in ex_rows]
 
             return executors
 
         except Exception as e:
-            logger.error(f"Ошибка при получении исполнителей для работ jobs_id {jobs_ids}: {e}")
+            logger.error(f"Ошибка при получении страницы ленты исполнителей для работ jobs_id {jobs_ids} "
+                         f"после исполнителя {cursor}: {e}")
+
+    @staticmethod
+    async def get_executor_by_id(executor_id: int, session: Any) -> Executor | None:
+        """Получение профиля исполнителя по id"""
+        try:
+            ex_row = await session.fetchrow(
+                EXECUTORS_WITH_JOBS_QUERY +
+                """
+                WHERE ex.id = $1
+                """,
+                executor_id
+            )
+
+            if not ex_row:
+                return None
+
+            return executor_from_row(ex_row)
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении исполнителя id {executor_id}: {e}")
+
+    @staticmethod
+    async def get_verified_executors_ids(executors_ids: list[int], session: Any) -> list[int]:
+        """id существующих и подтвержденных исполнителей из executors_ids, ошибки БД пробрасываются"""
+        try:
+            rows = await session.fetch(
+                """
+                SELECT id FROM executors
+                WHERE id = ANY($1::int[]) AND verified = true
+                """,
+                executors_ids
+            )
+            return [row["id"] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка при проверке исполнителей id {executors_ids[:10]}...: {e}")
+            raise
 
     @staticmethod
     async def get_favorites_executors(client_tg_id: str, session: Any) -> list[Executor]:
@@ -983,16 +1144,39 @@ class AsyncOrm:
             logger.error(f"Ошибка при получении избранных исполнителей для клиента {client_tg_id}: {e}")
 
     @staticmethod
-    async def add_executor_to_favorite(client_id: int, executor_id: int, session: Any) -> None:
-        """Добавляем исполнителя в список избранных для клиента"""
+    async def get_favorites_executors_ids(client_tg_id: str, session: Any) -> list[int]:
+        """Получаем id избранных исполнителей для клиента"""
         try:
-            await session.execute(
+            rows = await session.fetch(
+                """
+                SELECT DISTINCT ex.id
+                FROM executors AS ex
+                JOIN favorite_executors AS f_ex ON ex.id = f_ex.executor_id
+                JOIN clients AS c ON f_ex.client_id = c.id
+                WHERE ex.verified=true AND c.tg_id = $1
+                ORDER BY ex.id
+                """,
+                client_tg_id
+            )
+            return [row["id"] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении id избранных исполнителей для клиента {client_tg_id}: {e}")
+
+    @staticmethod
+    async def add_executor_to_favorite(client_id: int, executor_id: int, session: Any) -> bool:
+        """Добавляем исполнителя в список избранных для клиента, false если он уже был в избранном"""
+        try:
+            row = await session.fetchrow(
                 """
                 INSERT INTO favorite_executors (client_id, executor_id)
                 VALUES ($1, $2)
+                ON CONFLICT DO NOTHING
+                RETURNING 1
                 """,
                 client_id, executor_id
             )
+            return row is not None
 
         except Exception as e:
             logger.error(f"Ошибка при добавлении исполнителя {executor_id} в список избранных клиента {client_id}")
@@ -1050,24 +1234,20 @@ class AsyncOrm:
                     order.client_id, order.tg_id, order.is_active
                 )
 
-                # Создаем записи в таблице orders_jobs
-                for job in order.jobs:
-                    await session.execute(
-                        """
-                        INSERT INTO orders_jobs (order_id, job_id)
-                        VALUES ($1, $2)
-                        """,
-                        order_id, job.id
-                    )
+                # Создаем записи в таблице orders_jobs одним запросом
+                await session.execute(
+                    """
+                    INSERT INTO orders_jobs (job_id, order_id)
+                    SELECT job_id, $2 FROM unnest($1::int[]) AS job_id
+                    """,
+                    [job.id for job in order.jobs], order_id
+                )
 
-                # Создаем записи в таблице taskfiles
-                for file in order.files:
+                # Создаем записи в таблице taskfiles одним запросом
+                if order.files:
                     await session.execute(
-                        """
-                        INSERT INTO taskfiles (filename, file_id, order_id)
-                        VALUES ($1, $2, $3)
-                        """,
-                        file.filename, file.file_id, order_id
+                        TASKFILES_INSERT_QUERY,
+                        [file.filename for file in order.files], [file.file_id for file in order.files], order_id
                     )
 
                 logger.info(f"Создан заказ id {order_id} пользователем {order.tg_id}, client_id {order.client_id}")
@@ -1080,8 +1260,6 @@ class AsyncOrm:
     async def get_orders_by_client(tg_id: str, session: Any) -> List[Order]:
         """Получение заказов клиента"""
         try:
-            orders = []
-
             order_rows = await session.fetch(
                 """
                 SELECT o.id, o.title, o.task, o.price, o.requirements, o.period, o.created_at, o.client_id, o.tg_id, o.is_active 
@@ -1092,58 +1270,8 @@ class AsyncOrm:
                 tg_id
             )
 
-            for order_row in order_rows:
-                # получаем jobs для заказа
-                jobs_rows = await session.fetch(
-                    """
-                    SELECT j.id, j.title, j.profession_id
-                    FROM jobs AS j
-                    JOIN orders_jobs AS oj ON j.id = oj.job_id
-                    WHERE oj.order_id = $1
-                    """,
-                    order_row["id"]
-                )
-                jobs: List[Job] = [Job.model_validate(job_row) for job_row in jobs_rows]
-
-                # Получаем profession для заказа
-                profession_row = await session.fetchrow(
-                    """
-                    SELECT * 
-                    FROM professions
-                    WHERE id = $1 
-                    """,
-                    jobs[0].profession_id
-                )
-                profession: Profession = Profession.model_validate(profession_row)
-
-                # Получаем файлы для заказа
-                files_rows = await session.fetch(
-                    """
-                        SELECT *
-                        FROM taskfiles
-                        WHERE order_id=$1
-                    """,
-                    order_row["id"]
-                )
-                files: List[TaskFile] = [TaskFile.model_validate(file_row) for file_row in files_rows]
-
-                # Модель заказа
-                order = Order(
-                    id=order_row["id"],
-                    client_id=order_row["client_id"],
-                    tg_id=order_row["tg_id"],
-                    profession=profession,
-                    jobs=jobs,
-                    title=order_row["title"],
-                    task=order_row["task"],
-                    price=order_row["price"],
-                    period=order_row["period"],
-                    requirements=order_row["requirements"],
-                    created_at=order_row["created_at"],
-                    is_active=order_row["is_active"],
-                    files=files
-                )
-                orders.append(order)
+            # jobs, профессии и файлы для всех заказов сразу
+            orders = await hydrate_orders(order_rows, session)
 
             return orders
 
@@ -1164,60 +1292,33 @@ class AsyncOrm:
                 order_id
             )
 
-            # Получаем jobs для заказа
-            jobs_rows = await session.fetch(
-                """
-                SELECT j.id, j.title, j.profession_id
-                FROM jobs AS j
-                JOIN orders_jobs AS oj ON j.id = oj.job_id
-                WHERE oj.order_id = $1
-                """,
-                order_id
-            )
-            jobs: List[Job] = [Job.model_validate(job_row) for job_row in jobs_rows]
+            if not order_row:
+                return None
 
-            # Получаем profession для заказа
-            profession_row = await session.fetchrow(
-                """
-                SELECT * 
-                FROM professions
-                WHERE id = $1 
-                """,
-                jobs[0].profession_id
-            )
-            profession: Profession = Profession.model_validate(profession_row)
+            # jobs, профессия и файлы заказа
+            order = (await hydrate_orders([order_row], session))[0]
+            return order
 
-            # Получаем файлы для заказа
-            files_rows = await session.fetch(
+        except Exception as e:
+            logger.error(f"Ошибка при получении заказа id {order_id}: {e}")
+            raise
+
+    @staticmethod
+    async def get_active_orders_ids(orders_ids: list[int], session: Any) -> list[int]:
+        """id существующих и активных заказов из orders_ids, ошибки БД пробрасываются"""
+        try:
+            rows = await session.fetch(
                 """
-                SELECT *
-                FROM taskfiles
-                WHERE order_id=$1
+                SELECT id FROM orders
+                WHERE id = ANY($1::int[]) AND is_active = true
                 """,
-                order_id
-            )
-            files: List[TaskFile] = [TaskFile.model_validate(file_row) for file_row in files_rows]
-
-            # Модель заказа
-            order = Order(
-                id=order_id,
-                client_id=order_row["client_id"],
-                tg_id=order_row["tg_id"],
-                profession=profession,
-                jobs=jobs,
-                title=order_row["title"],
-                task=order_row["task"],
-                price=order_row["price"],
-                period=order_row["period"],
-                requirements=order_row["requirements"],
-                created_at=order_row["created_at"],
-                is_active=order_row["is_active"],
-                files=files,
+                orders_ids
             )
-            return order
+            return [row["id"] for row in rows]
 
         except Exception as e:
-            logger.error(f"Ошибка при получении заказа id {order_id}: {e}")
+            logger.error(f"Ошибка при проверке активности заказов id {orders_ids[:10]}...: {e}")
+            raise
 
     @staticmethod
     async def delete_order(order_id: int, session: Any) -> None:
@@ -1239,8 +1340,6 @@ class AsyncOrm:
     async def get_orders_by_jobs(jobs_ids: list[int], session: Any, only_active: bool = True) -> list[Order]:
         """Получение списка заказов по jobs_id"""
         try:
-            orders = []
-
             if only_active:
                 order_rows = await session.fetch(
                     """
@@ -1262,64 +1361,32 @@ class AsyncOrm:
                     jobs_ids
                 )
 
-            for order_row in order_rows:
-                # получаем jobs для заказа
-                jobs_rows = await session.fetch(
-                    """
-                    SELECT j.id, j.title, j.profession_id
-                    FROM jobs AS j
-                    JOIN orders_jobs AS oj ON j.id = oj.job_id
-                    WHERE oj.order_id = $1
-                    """,
-                    order_row["id"]
-                )
-                jobs: List[Job] = [Job.model_validate(job_row) for job_row in jobs_rows]
-
-                # Получаем profession для заказа
-                profession_row = await session.fetchrow(
-                    """
-                    SELECT * 
-                    FROM professions
-                    WHERE id = $1 
-                    """,
-                    jobs[0].profession_id
-                )
-                profession: Profession = Profession.model_validate(profession_row)
-
-                # Получаем файлы для заказа
-                files_rows = await session.fetch(
-                    """
-                        SELECT *
-                        FROM taskfiles
-                        WHERE order_id=$1
-                    """,
-                    order_row["id"]
-                )
-                files: List[TaskFile] = [TaskFile.model_validate(file_row) for file_row in files_rows]
-
-                # Модель заказа
-                order = Order(
-                    id=order_row["id"],
-                    client_id=order_row["client_id"],
-                    tg_id=order_row["tg_id"],
-                    profession=profession,
-                    jobs=jobs,
-                    title=order_row["title"],
-                    task=order_row["task"],
-                    price=order_row["price"],
-                    period=order_row["period"],
-                    requirements=order_row["requirements"],
-                    created_at=order_row["created_at"],
-                    is_active=order_row["is_active"],
-                    files=files
-                )
-                orders.append(order)
+            # jobs, профессии и файлы для всех заказов сразу
+            orders = await hydrate_orders(order_rows, session)
 
             return orders
 
         except Exception as e:
             logger.error(f"Ошибка при получении заказов для jobs id {jobs_ids}: {e}")
 
+    @staticmethod
+    async def get_orders_ids_by_jobs(jobs_ids: list[int], session: Any) -> list[int]:
+        """Получение id активных заказов по jobs_id"""
+        try:
+            rows = await session.fetch(
+                """
+                SELECT DISTINCT oj.order_id
+                FROM orders_jobs AS oj
+                JOIN orders AS o ON o.id = oj.order_id
+                WHERE oj.job_id = ANY($1::int[]) AND o.is_active = true
+                """,
+                jobs_ids
+            )
+            return [row["order_id"] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении id заказов для jobs id {jobs_ids}: {e}")
+
     @staticmethod
     async def update_order_profession(order_id: int, jobs_ids: List[int], session) -> None:
         """Изменение профессии заказа"""
@@ -1333,15 +1400,14 @@ class AsyncOrm:
                     """,
                     order_id)
 
-                # Создание связи OrdersJobs
-                for job_id in jobs_ids:
-                    await session.execute(
-                        """
-                        INSERT INTO orders_jobs (job_id, order_id)
-                        VALUES ($1, $2)
-                        """,
-                        job_id, order_id
-                    )
+                # Создание связи OrdersJobs одним запросом
+                await session.execute(
+                    """
+                    INSERT INTO orders_jobs (job_id, order_id)
+                    SELECT job_id, $2 FROM unnest($1::int[]) AS job_id
+                    """,
+                    jobs_ids, order_id
+                )
                 logger.info(f"Профессии заказа id {order_id} изменены на {jobs_ids}")
 
         except Exception as e:
@@ -1454,15 +1520,11 @@ class AsyncOrm:
                         order_id
                     )
 
-                    # Создание taskfiles
-                    for file in files:
-                        await session.execute(
-                            """
-                            INSERT INTO taskfiles (filename, file_id, order_id)
-                            VALUES ($1, $2, $3)
-                            """,
-                            file.filename, file.file_id, order_id
-                        )
+                    # Создание taskfiles одним запросом
+                    await session.execute(
+                        TASKFILES_INSERT_QUERY,
+                        [file.filename for file in files], [file.file_id for file in files], order_id
+                    )
                     files_text = ', '.join([f.filename for f in files])
                     logger.info(f"Файлы заказа id {order_id} изменены на {files_text}")
 
@@ -1489,16 +1551,19 @@ class AsyncOrm:
                 raise
 
     @staticmethod
-    async def add_order_to_favorites(executor_id: int, order_id: int, session: Any):
-        """Добавление заказа в избранное"""
+    async def add_order_to_favorites(executor_id: int, order_id: int, session: Any) -> bool:
+        """Добавление заказа в избранное, false если он уже был в избранном"""
         try:
-            await session.execute(
+            row = await session.fetchrow(
                 """
                 INSERT INTO favorite_orders(executor_id, order_id)
                 VALUES($1, $2)
+                ON CONFLICT DO NOTHING
+                RETURNING 1
                 """,
                 executor_id, order_id
             )
+            return row is not None
 
         except Exception as e:
             logger.error(f"Ошибка при добавлении заказа {order_id} для исполнителя {executor_id}: {e}")
@@ -1525,8 +1590,6 @@ class AsyncOrm:
     async def get_favorites_orders(executor_id: int, session: Any, only_active: bool = True) -> list[Order]:
         """Получаем избранные заказы для исполнителя"""
         try:
-            orders = []
-
             if only_active:
                 order_rows = await session.fetch(
                     """
@@ -1549,64 +1612,33 @@ class AsyncOrm:
                     executor_id
                 )
 
-            for order_row in order_rows:
-                # получаем jobs для заказа
-                jobs_rows = await session.fetch(
-                    """
-                    SELECT j.id, j.title, j.profession_id
-                    FROM jobs AS j
-                    JOIN orders_jobs AS oj ON j.id = oj.job_id
-                    WHERE oj.order_id = $1
-                    """,
-                    order_row["id"]
-                )
-                jobs: List[Job] = [Job.model_validate(job_row) for job_row in jobs_rows]
-
-                # Получаем profession для заказа
-                profession_row = await session.fetchrow(
-                    """
-                    SELECT * 
-                    FROM professions
-                    WHERE id = $1 
-                    """,
-                    jobs[0].profession_id
-                )
-                profession: Profession = Profession.model_validate(profession_row)
-
-                # Получаем файлы для заказа
-                files_rows = await session.fetch(
-                    """
-                        SELECT *
-                        FROM taskfiles
-                        WHERE order_id=$1
-                    """,
-                    order_row["id"]
-                )
-                files: List[TaskFile] = [TaskFile.model_validate(file_row) for file_row in files_rows]
-
-                # Модель заказа
-                order = Order(
-                    id=order_row["id"],
-                    client_id=order_row["client_id"],
-                    tg_id=order_row["tg_id"],
-                    profession=profession,
-                    jobs=jobs,
-                    title=order_row["title"],
-                    task=order_row["task"],
-                    price=order_row["price"],
-                    period=order_row["period"],
-                    requirements=order_row["requirements"],
-                    created_at=order_row["created_at"],
-                    is_active=order_row["is_active"],
-                    files=files
-                )
-                orders.append(order)
+            # jobs, профессии и файлы для всех заказов сразу
+            orders = await hydrate_orders(order_rows, session)
 
             return orders
 
         except Exception as e:
             logger.error(f"Ошибка при получении избранных заказов исполнителя {executor_id}: {e}")
 
+    @staticmethod
+    async def get_favorites_orders_ids(executor_id: int, session: Any) -> list[int]:
+        """Получаем id активных избранных заказов для исполнителя"""
+        try:
+            rows = await session.fetch(
+                """
+                SELECT DISTINCT o.id
+                FROM orders AS o
+                JOIN favorite_orders AS fav_o ON o.id = fav_o.order_id
+                WHERE o.is_active = true AND fav_o.executor_id = $1
+                ORDER BY o.id
+                """,
+                executor_id
+            )
+            return [row["id"] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении id избранных заказов исполнителя {executor_id}: {e}")
+
     @staticmethod
     async def delete_order_from_favorites(executor_tg_id: str, order_id: int, session: Any) -> None:
         """Удаление заказа из списка избранных"""
@@ -1698,23 +1730,57 @@ class AsyncOrm:
             logger.error(f"Ошибка при обновлении срока блокировки пользователя tg_id {tg_id} до {expire_date}: {e}")
 
     @staticmethod
-    async def create_order_response(text: str, order_id: int, executor_id: int, session: Any) -> None:
-        """Создание отклика исполнителя на заказ"""
+    async def get_media_file_id(path: str, version: str, session: Any) -> str | None:
+        """Получение telegram file_id загруженного файла для его текущей версии"""
+        try:
+            file_id = await session.fetchval(
+                """
+                SELECT file_id
+                FROM media_files
+                WHERE path = $1 AND version = $2
+                """,
+                path, version
+            )
+            return file_id
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении file_id файла {path}: {e}")
+
+    @staticmethod
+    async def save_media_file_id(path: str, version: str, file_id: str, session: Any) -> None:
+        """Сохранение telegram file_id загруженного файла"""
+        try:
+            created_at = datetime.datetime.now()
+            await session.execute(
+                """
+                INSERT INTO media_files (path, version, file_id, created_at)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (path) DO UPDATE
+                SET version = EXCLUDED.version, file_id = EXCLUDED.file_id, created_at = EXCLUDED.created_at
+                """,
+                path, version, file_id, created_at
+            )
+
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении file_id файла {path}: {e}")
+
+    @staticmethod
+    async def create_order_response(text: str, order_id: int, executor_id: int, session: Any) -> bool:
+        """Создание отклика исполнителя на заказ, false если отклик уже был"""
         try:
             created_at = datetime.datetime.now()
-            result = await session.execute(
+            response_id = await session.fetchval(
                 """
                 INSERT INTO orders_responses (created_at, text, order_id, executor_id)
-                SELECT $1, $2, $3, $4
-                WHERE NOT EXISTS (
-                    SELECT 1 FROM orders_responses 
-                    WHERE order_id = $3 AND executor_id = $4
-                )
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (order_id, executor_id) DO NOTHING
+                RETURNING id
                 """,
                 created_at, text, order_id, executor_id
             )
-            if result == "INSERT 0 1":
+            if response_id:
                 logger.info(f"Создан отклик на заказ {order_id} от исполнителя {executor_id}")
+            return response_id is not None
 
         except Exception as e:
             logger.error(f"Ошибка при создании отклика на заказ {order_id} от исполнителя {executor_id}: {e}")
@@ -1739,24 +1805,65 @@ class AsyncOrm:
             logger.error(f"Ошибка при проверке существования отклика пользователя {executor_tg_id} на заказ {order_id}: {e}")
 
     @staticmethod
-    async def create_executor_view(executor_id: int, client_id: int, session: Any) -> None:
-        """Создает запись о просмотре контактов исполнителя"""
+    async def create_executor_view(executor_id: int, client_id: int, session: Any) -> bool:
+        """Создает запись о просмотре контактов исполнителя, false если клиент уже смотрел контакты"""
         try:
             created_at = datetime.datetime.now()
-            result = await session.execute(
+            view_id = await session.fetchval(
                 """
                 INSERT INTO executors_views (created_at, executor_id, client_id)
-                SELECT $1, $2, $3
-                WHERE NOT EXISTS (
-                    SELECT 1 FROM executors_views
-                    WHERE executor_id = $2 AND client_id = $3 
-                )
+                VALUES ($1, $2, $3)
+                ON CONFLICT (executor_id, client_id) DO NOTHING
+                RETURNING id
                 """,
                 created_at, executor_id, client_id
             )
-            if result == "INSERT 0 1":
+            if view_id:
                 logger.info(f"Создана запись о просмотре контактов исполнителя {executor_id} заказчиком {client_id}")
+            return view_id is not None
 
         except Exception as e:
             logger.error(f"Ошибка при создании записи о просмотре контактов исполнителя {executor_id} заказчиком "
-                         f"{client_id}: {e}")
\ No newline at end of file
+                         f"{client_id}: {e}")
+
+    @staticmethod
+    async def create_executor_views(views: List[tuple[datetime.datetime, int, int]], session: Any) -> int:
+        """
+            Запись пачки просмотров контактов исполнителей (created_at, executor_id, client_id) через COPY.
+            Повторные просмотры и просмотры удаленных профилей пропускаются, возвращает количество новых записей
+        """
+        try:
+            async with session.transaction():
+                # COPY не поддерживает ON CONFLICT, поэтому пишем во временную таблицу соединения
+                await session.execute(
+                    """
+                    CREATE TEMP TABLE IF NOT EXISTS executors_views_staging (
+                        created_at timestamp NOT NULL,
+                        executor_id int NOT NULL,
+                        client_id int NOT NULL
+                    ) ON COMMIT DELETE ROWS
+                    """
+                )
+                await session.copy_records_to_table(
+                    "executors_views_staging",
+                    records=views,
+                    columns=["created_at", "executor_id", "client_id"]
+                )
+                result = await session.execute(
+                    """
+                    INSERT INTO executors_views (created_at, executor_id, client_id)
+                    SELECT DISTINCT ON (s.executor_id, s.client_id) s.created_at, s.executor_id, s.client_id
+                    FROM executors_views_staging AS s
+                    JOIN executors AS ex ON ex.id = s.executor_id
+                    JOIN clients AS c ON c.id = s.client_id
+                    ORDER BY s.executor_id, s.client_id, s.created_at
+                    ON CONFLICT (executor_id, client_id) DO NOTHING
+                    """
+                )
+                created = int(result.split()[-1])
+                logger.info(f"Записано просмотров контактов исполнителей: {created} из {len(views)}")
+                return created
+
+        except Exception as e:
+            logger.error(f"Ошибка при записи {len(views)} просмотров контактов исполнителей: {e}")
+            raise
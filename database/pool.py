@@ -0,0 +1,75 @@
+from typing import Any
+
+import asyncpg
+
+from database.instrumentation import InstrumentedSession
+from logger import logger
+from settings import settings
+
+
+async def create_pool() -> asyncpg.Pool:
+    """Создание пула соединений с БД на весь процесс"""
+    pool = await asyncpg.create_pool(
+        user=settings.db.postgres_user,
+        host=settings.db.postgres_host,
+        password=settings.db.postgres_password,
+        port=settings.db.postgres_port,
+        database=settings.db.postgres_db,
+        min_size=settings.db.pool_min_size,
+        max_size=settings.db.pool_max_size,
+        max_inactive_connection_lifetime=settings.db.pool_max_inactive_connection_lifetime,
+        command_timeout=settings.db.pool_command_timeout,
+    )
+    logger.info(f"Создан пул соединений с БД (min {settings.db.pool_min_size}, max {settings.db.pool_max_size})")
+    return pool
+
+
+class LazySession(InstrumentedSession):
+    """
+        Сессия БД на время обработки одного апдейта.
+        Соединение берется из пула только при первом запросе и возвращается в пул
+        в release() после завершения обработки. Запросы замеряются (database/instrumentation.py)
+    """
+
+    def __init__(self, pool: asyncpg.Pool, timeout: float | None = None):
+        self._pool = pool
+        self._timeout = timeout if timeout is not None else settings.db.pool_acquire_timeout
+        self._conn: asyncpg.Connection | None = None
+
+    @property
+    def acquired(self) -> bool:
+        """True если соединение уже взято из пула"""
+        return self._conn is not None
+
+    async def connection(self) -> asyncpg.Connection:
+        """Получение соединения, при первом обращении берется из пула"""
+        if self._conn is None:
+            self._conn = await self._pool.acquire(timeout=self._timeout)
+        return self._conn
+
+    async def release(self) -> None:
+        """Возврат соединения в пул"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await self._pool.release(conn)
+
+    def transaction(self, **kwargs: Any) -> "_LazyTransaction":
+        """Транзакция, аналог asyncpg.Connection.transaction()"""
+        return _LazyTransaction(self, kwargs)
+
+
+class _LazyTransaction:
+    """Берет соединение из пула при входе в блок async with"""
+
+    def __init__(self, session: LazySession, kwargs: dict[str, Any]):
+        self._session = session
+        self._kwargs = kwargs
+        self._tr = None
+
+    async def __aenter__(self):
+        conn = await self._session.connection()
+        self._tr = conn.transaction(**self._kwargs)
+        return await self._tr.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._tr.__aexit__(exc_type, exc, tb)
@@ -0,0 +1,236 @@
+"""
+    Дневные агрегаты для метрик админ панели (daily_*_stats).
+    Бот раз в rollups_refresh_interval пересчитывает дни с прошлого пересчета по сегодня,
+    старые дни заполняются командой backfill:
+
+        python -m database.rollups backfill 2025-01-01 [2025-06-01]
+        python -m database.rollups refresh
+"""
+import argparse
+import asyncio
+import datetime
+
+import asyncpg
+import pytz
+
+from database.pool import create_pool
+from database.tables import UserRoles
+from logger import logger
+from settings import settings
+
+# Ключ pg_advisory_xact_lock, пересчет агрегатов выполняет одно соединение
+ROLLUPS_LOCK_ID = 7301
+
+# Дней пересчета в одной транзакции при backfill
+BACKFILL_CHUNK_DAYS = 31
+
+ROLLUP_TABLES = ("daily_executor_stats", "daily_order_stats", "daily_profession_stats", "daily_registration_stats")
+
+
+def local_day(alias: str) -> str:
+    """День created_at (UTC без таймзоны) по таймзоне $3"""
+    return f"({alias}.created_at AT TIME ZONE 'UTC' AT TIME ZONE $3::text)::date"
+
+
+def in_days(alias: str) -> str:
+    """created_at внутри дней [$1, $2) по таймзоне $3, условие использует индекс по created_at"""
+    return f"{alias}.created_at >= ($1::date::timestamp AT TIME ZONE $3::text) AT TIME ZONE 'UTC' " \
+           f"AND {alias}.created_at < ($2::date::timestamp AT TIME ZONE $3::text) AT TIME ZONE 'UTC'"
+
+
+EXECUTOR_STATS_QUERY = f"""
+    INSERT INTO daily_executor_stats (day, executor_id, views, responses)
+    SELECT day, executor_id, sum(views), sum(responses)
+    FROM (
+        SELECT {local_day("v")} AS day, v.executor_id, 1 AS views, 0 AS responses
+        FROM executors_views AS v
+        WHERE {in_days("v")}
+        UNION ALL
+        SELECT {local_day("r")}, r.executor_id, 0, 1
+        FROM orders_responses AS r
+        WHERE {in_days("r")}
+    ) AS events
+    GROUP BY day, executor_id
+    """
+
+ORDER_STATS_QUERY = f"""
+    INSERT INTO daily_order_stats (day, order_id, responses)
+    SELECT {local_day("r")} AS day, r.order_id, count(*)
+    FROM orders_responses AS r
+    WHERE {in_days("r")}
+    GROUP BY day, r.order_id
+    """
+
+# Профессия отклика берется из jobs заказа, просмотра и регистрации - из jobs исполнителя
+PROFESSION_STATS_QUERY = f"""
+    INSERT INTO daily_profession_stats (day, profession_id, responses, views, executors)
+    SELECT day, profession_id, count(DISTINCT response_id), count(DISTINCT view_id), count(DISTINCT executor_id)
+    FROM (
+        SELECT {local_day("r")} AS day, j.profession_id, r.id AS response_id, NULL::int AS view_id,
+               NULL::int AS executor_id
+        FROM orders_responses AS r
+        JOIN orders_jobs AS oj ON oj.order_id = r.order_id
+        JOIN jobs AS j ON j.id = oj.job_id
+        WHERE {in_days("r")}
+        UNION ALL
+        SELECT {local_day("v")}, j.profession_id, NULL, v.id, NULL
+        FROM executors_views AS v
+        JOIN executors_jobs AS ej ON ej.executor_id = v.executor_id
+        JOIN jobs AS j ON j.id = ej.job_id
+        WHERE {in_days("v")}
+        UNION ALL
+        SELECT {local_day("e")}, j.profession_id, NULL, NULL, e.id
+        FROM executors AS e
+        JOIN executors_jobs AS ej ON ej.executor_id = e.id
+        JOIN jobs AS j ON j.id = ej.job_id
+        WHERE {in_days("e")}
+    ) AS events
+    GROUP BY day, profession_id
+    """
+
+REGISTRATION_STATS_QUERY = f"""
+    INSERT INTO daily_registration_stats (day, role, count)
+    SELECT day, role, count(*)
+    FROM (
+        SELECT {local_day("e")} AS day, $4::text AS role
+        FROM executors AS e
+        WHERE {in_days("e")}
+        UNION ALL
+        SELECT {local_day("c")}, $5::text
+        FROM clients AS c
+        WHERE {in_days("c")}
+    ) AS registrations
+    GROUP BY day, role
+    """
+
+
+def local_date(utc_time: datetime.datetime) -> datetime.date:
+    """День по settings.timezone для времени UTC без таймзоны"""
+    return pytz.utc.localize(utc_time).astimezone(pytz.timezone(settings.timezone)).date()
+
+
+async def refresh_days(conn: asyncpg.Connection, start_day: datetime.date, end_day: datetime.date) -> None:
+    """Пересчет агрегатов за дни [start_day, end_day), выполняется внутри транзакции"""
+    for table in ROLLUP_TABLES:
+        await conn.execute(f"DELETE FROM {table} WHERE day >= $1 AND day < $2", start_day, end_day)
+
+    await conn.execute(EXECUTOR_STATS_QUERY, start_day, end_day, settings.timezone)
+    await conn.execute(ORDER_STATS_QUERY, start_day, end_day, settings.timezone)
+    await conn.execute(PROFESSION_STATS_QUERY, start_day, end_day, settings.timezone)
+    await conn.execute(REGISTRATION_STATS_QUERY, start_day, end_day, settings.timezone,
+                       UserRoles.EXECUTOR.value, UserRoles.CLIENT.value)
+
+
+async def refresh_recent(conn: asyncpg.Connection, wait: bool = False) -> bool:
+    """
+        Пересчет дней с прошлого пересчета по сегодня.
+        Если пересчет уже выполняет другой процесс, при wait=False возвращает False сразу
+    """
+    async with conn.transaction():
+        if wait:
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", ROLLUPS_LOCK_ID)
+        elif not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", ROLLUPS_LOCK_ID):
+            return False
+
+        state = await conn.fetchrow("SELECT complete_from, refreshed_until FROM rollups_state WHERE id = 1")
+
+        # Строки, записанные с задержкой (отложенная запись просмотров), попадут в следующий пересчет
+        now = datetime.datetime.now(pytz.utc).replace(tzinfo=None)
+        refreshed_until = now - datetime.timedelta(seconds=settings.rollups_lag)
+        today = local_date(now)
+
+        start_day = local_date(state["refreshed_until"]) if state else today - datetime.timedelta(days=1)
+        await refresh_days(conn, start_day, today + datetime.timedelta(days=1))
+
+        await conn.execute(
+            """
+            INSERT INTO rollups_state (id, complete_from, refreshed_until)
+            VALUES (1, $1, $2)
+            ON CONFLICT (id) DO UPDATE SET refreshed_until = excluded.refreshed_until
+            """,
+            start_day, refreshed_until
+        )
+
+    return True
+
+
+async def backfill(conn: asyncpg.Connection, start_day: datetime.date, end_day: datetime.date | None = None) -> None:
+    """Пересчет агрегатов за дни [start_day, end_day), по умолчанию до начала уже посчитанного периода"""
+    await refresh_recent(conn, wait=True)
+    complete_from = await conn.fetchval("SELECT complete_from FROM rollups_state WHERE id = 1")
+    end_day = end_day or complete_from
+
+    day = start_day
+    while day < end_day:
+        chunk_end = min(day + datetime.timedelta(days=BACKFILL_CHUNK_DAYS), end_day)
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", ROLLUPS_LOCK_ID)
+            await refresh_days(conn, day, chunk_end)
+        logger.info(f"Агрегаты метрик пересчитаны за {day} - {chunk_end}")
+        day = chunk_end
+
+    # Период полных агрегатов расширяется, только если пересчитанные дни примыкают к нему
+    if end_day >= complete_from:
+        await conn.execute(
+            "UPDATE rollups_state SET complete_from = least(complete_from, $1) WHERE id = 1", start_day
+        )
+
+
+class RollupsRefresher:
+    """Периодический пересчет агрегатов в процессе бота"""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._pool: asyncpg.Pool | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+        self._task = asyncio.create_task(self._run(), name="rollups_refresher")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self._pool.acquire() as conn:
+                    await refresh_recent(conn)
+            except Exception as e:
+                # Метрики не должны ронять бота, админ панель считает по исходным таблицам
+                logger.error(f"Ошибка при пересчете агрегатов метрик: {e}")
+
+            await asyncio.sleep(self.interval)
+
+
+rollups_refresher = RollupsRefresher(interval=settings.rollups_refresh_interval)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Дневные агрегаты метрик")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("refresh", help="пересчет дней с прошлого пересчета по сегодня")
+    backfill_parser = commands.add_parser("backfill", help="пересчет старых дней")
+    backfill_parser.add_argument("start_day", type=datetime.date.fromisoformat)
+    backfill_parser.add_argument("end_day", type=datetime.date.fromisoformat, nargs="?")
+    args = parser.parse_args()
+
+    pool = await create_pool()
+    try:
+        async with pool.acquire() as conn:
+            if args.command == "refresh":
+                await refresh_recent(conn, wait=True)
+            else:
+                await backfill(conn, args.start_day, args.end_day)
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,7 +2,7 @@ import datetime
 from enum import Enum
 
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, relationship
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint, text
 
 
 class ClientType(Enum):
@@ -62,9 +62,9 @@ class Clients(Base):
     __tablename__ = "clients"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    tg_id: Mapped[str] = mapped_column(ForeignKey("users.tg_id", ondelete="CASCADE"))
+    tg_id: Mapped[str] = mapped_column(ForeignKey("users.tg_id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False, comment="Имя пользователя должно содержать не более 50 символов")
-    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False, index=True)
 
     user: Mapped["User"] = relationship(back_populates="client_profile")
 
@@ -85,9 +85,13 @@ class Clients(Base):
 class Executors(Base):
     """Таблица с полями профиля исполнителя"""
     __tablename__ = "executors"
+    __table_args__ = (
+        # лента исполнителей
+        Index("ix_executors_feed", "id", postgresql_where=text("verified AND availability = 'свободен'")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    tg_id: Mapped[str] = mapped_column(ForeignKey("users.tg_id", ondelete="CASCADE"))
+    tg_id: Mapped[str] = mapped_column(ForeignKey("users.tg_id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False, comment="Имя пользователя должно содержать не более 50 символов")
     age: Mapped[int] = mapped_column(nullable=True, default=None)
     description: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -99,7 +103,7 @@ class Executors(Base):
     location: Mapped[str] = mapped_column(nullable=True, default=None)
     photo: Mapped[bool] = mapped_column(nullable=False, default=False)
     verified: Mapped[bool] = mapped_column(default=False)
-    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False, index=True)
 
     user: Mapped["User"] = relationship(back_populates="executor_profile")
 
@@ -158,6 +162,9 @@ class ExecutorsJobs(Base):
         Many-to-many relationship
     """
     __tablename__ = "executors_jobs"
+    __table_args__ = (
+        Index("ix_executors_jobs_executor_id_job_id", "executor_id", "job_id"),
+    )
 
     job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
     executor_id: Mapped[int] = mapped_column(ForeignKey("executors.id", ondelete="CASCADE"), primary_key=True)
@@ -176,6 +183,10 @@ class RejectReasons(Base):
 class Orders(Base):
     """Заказы размещаемые клиентами"""
     __tablename__ = "orders"
+    __table_args__ = (
+        # лента заказов
+        Index("ix_orders_active_created_at", "created_at", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     tg_id: Mapped[str] = mapped_column(nullable=False, index=True)
@@ -210,7 +221,8 @@ class FavoriteExecutors(Base):
     __tablename__ = "favorite_executors"
 
     client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
-    executor_id: Mapped[int] = mapped_column(ForeignKey("executors.id", ondelete="CASCADE"), primary_key=True)
+    executor_id: Mapped[int] = mapped_column(ForeignKey("executors.id", ondelete="CASCADE"), primary_key=True,
+                                             index=True)
 
     # Added
     client: Mapped["Clients"] = relationship(backref="favorite_executors_associations")
@@ -222,7 +234,7 @@ class FavoriteOrders(Base):
     __tablename__ = "favorite_orders"
 
     executor_id: Mapped[int] = mapped_column(ForeignKey("executors.id", ondelete="CASCADE"), primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True, index=True)
 
     # Added
     executor: Mapped["Executors"] = relationship(backref="favorite_orders_associations")
@@ -235,6 +247,9 @@ class OrdersJobs(Base):
         Many-to-many relationship
     """
     __tablename__ = "orders_jobs"
+    __table_args__ = (
+        Index("ix_orders_jobs_order_id_job_id", "order_id", "job_id"),
+    )
 
     job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
@@ -248,7 +263,7 @@ class TaskFiles(Base):
     filename: Mapped[str] = mapped_column(nullable=False, index=True)
     file_id: Mapped[str] = mapped_column(nullable=False)
 
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), index=True)
     order: Mapped["Orders"] = relationship(back_populates="files")
 
     def __str__(self):
@@ -273,9 +288,13 @@ class BlockedUsers(Base):
 class OrdersResponses(Base):
     """Таблица с откликами"""
     __tablename__ = "orders_responses"
+    __table_args__ = (
+        # один отклик исполнителя на заказ
+        UniqueConstraint("order_id", "executor_id", name="uq_orders_responses_order_id_executor_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False, index=True)
     text: Mapped[str] = mapped_column(nullable=False)
 
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
@@ -291,12 +310,77 @@ class OrdersResponses(Base):
 class ExecutorsViews(Base):
     """Таблица просмотров исполнителей"""
     __tablename__ = "executors_views"
+    __table_args__ = (
+        # один просмотр контактов исполнителя клиентом
+        UniqueConstraint("executor_id", "client_id", name="uq_executors_views_executor_id_client_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False, index=True)
 
     executor_id: Mapped[int] = mapped_column(ForeignKey("executors.id", ondelete="CASCADE"))
     executor: Mapped["Executors"] = relationship(back_populates="views")
 
     client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"))
     client: Mapped["Clients"] = relationship(back_populates="views")
+
+
+class MediaFiles(Base):
+    """file_id загруженных в телеграм файлов, чтобы не отправлять файл повторно"""
+    __tablename__ = "media_files"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(nullable=False, index=True, unique=True)
+    version: Mapped[str] = mapped_column(nullable=False, comment="размер и хэш содержимого файла на момент загрузки")
+    file_id: Mapped[str] = mapped_column(nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+
+
+# Дневные агрегаты для метрик, день по settings.timezone. Пересчитываются database/rollups.py
+class DailyExecutorStats(Base):
+    """Просмотры и отклики исполнителя за день"""
+    __tablename__ = "daily_executor_stats"
+
+    day: Mapped[datetime.date] = mapped_column(primary_key=True)
+    executor_id: Mapped[int] = mapped_column(ForeignKey("executors.id", ondelete="CASCADE"), primary_key=True)
+    views: Mapped[int] = mapped_column(nullable=False, default=0)
+    responses: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class DailyOrderStats(Base):
+    """Отклики на заказ за день"""
+    __tablename__ = "daily_order_stats"
+
+    day: Mapped[datetime.date] = mapped_column(primary_key=True)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+    responses: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class DailyProfessionStats(Base):
+    """Отклики, просмотры и регистрации исполнителей по профессии за день"""
+    __tablename__ = "daily_profession_stats"
+
+    day: Mapped[datetime.date] = mapped_column(primary_key=True)
+    profession_id: Mapped[int] = mapped_column(ForeignKey("professions.id", ondelete="CASCADE"), primary_key=True)
+    responses: Mapped[int] = mapped_column(nullable=False, default=0)
+    views: Mapped[int] = mapped_column(nullable=False, default=0)
+    executors: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class DailyRegistrationStats(Base):
+    """Регистрации по роли за день"""
+    __tablename__ = "daily_registration_stats"
+
+    day: Mapped[datetime.date] = mapped_column(primary_key=True)
+    role: Mapped[UserRoles] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class RollupsState(Base):
+    """Период, за который дневные агрегаты полные: с complete_from до дня refreshed_until не включительно"""
+    __tablename__ = "rollups_state"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    complete_from: Mapped[datetime.date] = mapped_column(nullable=False)
+    refreshed_until: Mapped[datetime.datetime] = mapped_column(nullable=False,
+                                                               comment="UTC, строки раньше уже учтены в агрегатах")
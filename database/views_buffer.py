@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+
+import asyncpg
+
+from database.orm import AsyncOrm
+from logger import logger
+from settings import settings
+from utils.metrics import WRITE_BEHIND_DROPPED
+
+
+class ExecutorViewsBuffer:
+    """
+        Отложенная запись просмотров контактов исполнителей.
+        Хендлер только кладет событие в ограниченную очередь, фоновая задача пишет их в БД пачками
+        каждые flush_interval_ms или при накоплении batch_size событий.
+        Если очередь заполнена, хендлер ждет не дольше put_timeout, после чего событие отбрасывается
+    """
+
+    def __init__(self, flush_interval_ms: int, batch_size: int, max_size: int, put_timeout: float):
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.dropped = 0
+        self._queue: asyncio.Queue[tuple[datetime.datetime, int, int]] = asyncio.Queue(maxsize=max_size)
+        self._pool: asyncpg.Pool | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, pool: asyncpg.Pool) -> None:
+        """Запуск фоновой записи"""
+        self._pool = pool
+        self._task = asyncio.create_task(self._run(), name="executor_views_buffer")
+
+    async def stop(self) -> None:
+        """Остановка фоновой записи, оставшиеся в очереди события записываются"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain([]))
+
+    @property
+    def depth(self) -> int:
+        """Событий в очереди"""
+        return self._queue.qsize()
+
+    async def add(self, executor_id: int, client_id: int) -> None:
+        """Добавление просмотра контактов исполнителя клиентом"""
+        event = (datetime.datetime.now(), executor_id, client_id)
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Запись не успевает, ненадолго притормаживаем хендлер
+            try:
+                await asyncio.wait_for(self._queue.put(event), timeout=self.put_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                WRITE_BEHIND_DROPPED.labels("executor_views").inc()
+                logger.warning(f"Очередь просмотров исполнителей заполнена, просмотр исполнителя {executor_id} "
+                               f"заказчиком {client_id} не записан, всего отброшено {self.dropped}")
+
+    def _drain(self, batch: list[tuple[datetime.datetime, int, int]]) -> list[tuple[datetime.datetime, int, int]]:
+        """Забирает из очереди события без ожидания, пока пачка не заполнится"""
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch: list[tuple[datetime.datetime, int, int]] = []
+        try:
+            while True:
+                # Ждем первое событие, затем добираем пачку до batch_size или до конца интервала
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.flush_interval
+
+                while len(self._drain(batch)) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._flush(batch)
+                batch = []
+
+        except asyncio.CancelledError:
+            # При остановке дописываем собранную пачку, повторная запись не создаст дублей
+            await self._flush(batch)
+            raise
+
+    async def _flush(self, batch: list[tuple[datetime.datetime, int, int]]) -> None:
+        if not batch:
+            return
+
+        try:
+            async with self._pool.acquire() as conn:
+                await AsyncOrm.create_executor_views(batch, conn)
+        except Exception as e:
+            # Аналитика не должна ронять бота, пачка теряется
+            logger.error(f"Ошибка при записи {len(batch)} просмотров исполнителей: {e}")
+
+
+executor_views_buffer = ExecutorViewsBuffer(
+    flush_interval_ms=settings.views_flush_interval_ms,
+    batch_size=settings.views_flush_batch_size,
+    max_size=settings.views_queue_size,
+    put_timeout=settings.views_put_timeout,
+)
@@ -1,19 +1,38 @@
 import asyncio
+import multiprocessing
+import os
+import signal
+import sys
 from datetime import datetime
+
+import asyncpg
+from aiohttp import web
 from database.orm import AsyncOrm
+from database.cache import taxonomy_cache
+from database.pool import create_pool
+from database.rollups import rollups_refresher
+from database.views_buffer import executor_views_buffer
 
 import aiogram as io
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.types import BotCommand, BotCommandScopeDefault
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from middlewares.banned import BanedMiddleware
 from middlewares.database import DatabaseMiddleware
+from middlewares.user_context import UserContextMiddleware
 from middlewares.admin import AdminMiddleware
+from middlewares.metrics import UpdateMetricsMiddleware, HandlerNameMiddleware, TelegramMetricsMiddleware
+from logger import logger
 from settings import settings
 from routers import main_router
 from routers.buttons import commands as cmd
+from utils.fsm_storage import create_fsm_storage
+from utils.metrics import start_metrics_server, process_exited
+from utils.metrics_sampler import metrics_sampler
+from utils.s3_storage import s3_storage
 
 
 # from database.database import async_engine
@@ -43,21 +62,49 @@ async def set_description(bot: io.Bot):
     )
 
 
-async def start_bot() -> None:
-    """Запуск бота"""
+def create_bot() -> io.Bot:
+    """Экземпляр бота"""
     bot = io.Bot(settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    await set_commands(bot)
-    # await set_description(bot)
+    # Время и ошибки запросов к Bot API
+    bot.session.middleware(TelegramMetricsMiddleware())
+    return bot
+
 
-    storage = MemoryStorage()
+async def create_dispatcher() -> tuple[io.Dispatcher, asyncpg.Pool, BaseStorage]:
+    """Диспетчер с роутерами и middlewares, пул соединений с БД и FSM хранилище"""
+    storage = create_fsm_storage()
     dp = io.Dispatcher(storage=storage)
 
     # ROUTERS
     dp.include_router(main_router)
 
+    # DATABASE POOL
+    pool = await create_pool()
+
+    # Загружаем кэш профессий и jobs
+    async with pool.acquire() as conn:
+        await taxonomy_cache.load(conn)
+
+    # Фоновая запись просмотров исполнителей
+    executor_views_buffer.start(pool)
+
+    # Пересчет дневных агрегатов метрик
+    rollups_refresher.start(pool)
+
+    # Замеры пула БД, FSM хранилища и очередей для /metrics
+    metrics_sampler.start(pool, storage)
+
     # MIDDLEWARES
-    dp.message.middleware(DatabaseMiddleware())
-    dp.callback_query.middleware(DatabaseMiddleware())
+    # Метрики апдейта снаружи всех middleware, имя хендлера известно только после выбора хендлера
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
+
+    dp.message.middleware(DatabaseMiddleware(pool))
+    dp.callback_query.middleware(DatabaseMiddleware(pool))
+
+    dp.message.middleware(UserContextMiddleware())
+    dp.callback_query.middleware(UserContextMiddleware())
 
     dp.message.middleware(BanedMiddleware())
     dp.callback_query.middleware(BanedMiddleware())
@@ -65,8 +112,132 @@ async def start_bot() -> None:
     # TODO create tables DEV
     # await AsyncOrm.create_tables()
 
-    await dp.start_polling(bot)
+    return dp, pool, storage
+
+
+async def start_bot() -> None:
+    """Запуск бота в режиме long polling"""
+    bot = create_bot()
+    await set_commands(bot)
+    # await set_description(bot)
+
+    dp, pool, storage = await create_dispatcher()
+    start_metrics_server(settings.metrics_port)
+
+    try:
+        # Если ранее был установлен webhook, getUpdates вернет ошибку
+        await bot.delete_webhook()
+        await dp.start_polling(bot)
+    finally:
+        await metrics_sampler.stop()
+        await rollups_refresher.stop()
+        await executor_views_buffer.stop()
+        await pool.close()
+        await storage.close()
+        s3_storage.close()
+
+
+async def run_webhook_worker(index: int) -> None:
+    """Процесс, принимающий апдейты от телеграм через aiohttp сервер, index - номер воркера"""
+    bot = create_bot()
+    dp, pool, storage = await create_dispatcher()
+    # У каждого воркера свои метрики в памяти, поэтому свой порт
+    start_metrics_server(settings.metrics_port + index if settings.metrics_port else 0)
+
+    app = web.Application()
+    # Проверяет заголовок X-Telegram-Bot-Api-Secret-Token и закрывает сессию бота при остановке
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=settings.webhook_secret).register(
+        app, path=settings.webhook_path
+    )
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    # С reuse_port несколько процессов слушают один порт, ядро распределяет соединения между ними
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port,
+                       reuse_port=settings.webhook_workers > 1)
+    await site.start()
+    logger.info(f"Webhook воркер {os.getpid()} слушает {settings.webhook_host}:{settings.webhook_port}"
+                f"{settings.webhook_path}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
+        await metrics_sampler.stop()
+        await rollups_refresher.stop()
+        await executor_views_buffer.stop()
+        await pool.close()
+        await storage.close()
+        s3_storage.close()
+
+
+def webhook_worker(index: int = 0) -> None:
+    """Точка входа процесса воркера"""
+    asyncio.run(run_webhook_worker(index))
+
+
+async def set_webhook() -> None:
+    """Регистрация webhook в телеграм, выполняется один раз перед запуском воркеров"""
+    bot = create_bot()
+    try:
+        await set_commands(bot)
+        await bot.set_webhook(
+            settings.webhook_url,
+            secret_token=settings.webhook_secret,
+            allowed_updates=main_router.resolve_used_update_types(),
+            max_connections=max(40, settings.webhook_workers * 10),
+        )
+    finally:
+        await bot.session.close()
+
+
+def start_webhook() -> None:
+    """Запуск бота в режиме webhook на settings.webhook_workers процессах"""
+    if not settings.webhook_secret:
+        raise RuntimeError("Для webhook режима необходимо задать WEBHOOK_SECRET")
+
+    # Апдейты пользователя обрабатывают разные воркеры, поэтому состояние должно быть в общем хранилище.
+    # Данные FSM в Redis хранятся в JSON (utils/fsm_storage.py): в них допустимы только ссылки на сообщения
+    # (utils/messages.py), модели schemas и даты, иначе запись упадет с TypeError
+    if settings.webhook_workers > 1 and settings.fsm_storage != "redis":
+        raise RuntimeError(f"Для WEBHOOK_WORKERS={settings.webhook_workers} необходимо FSM_STORAGE=redis, "
+                           f"сейчас FSM_STORAGE={settings.fsm_storage}")
+
+    asyncio.run(set_webhook())
+
+    if settings.webhook_workers == 1:
+        webhook_worker()
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=webhook_worker, args=(i,), name=f"webhook-worker-{i}")
+               for i in range(settings.webhook_workers)]
+    for worker in workers:
+        worker.start()
+
+    # При остановке контейнера останавливаем воркеры
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        # Значения gauges остановленных воркеров больше не учитываются в /metrics админки
+        for worker in workers:
+            worker.join()
+            process_exited(worker.pid)
 
 
 if __name__ == "__main__":
-    asyncio.run(start_bot())
+    if settings.bot_mode == "webhook":
+        start_webhook()
+    else:
+        asyncio.run(start_bot())
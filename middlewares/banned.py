@@ -4,14 +4,14 @@ from typing import Any
 from aiogram import BaseMiddleware, Bot
 from aiogram.types import TelegramObject, CallbackQuery, Message
 
-from database.orm import AsyncOrm
+from schemas.user import UserContext
 from routers.buttons import buttons as btn
 
 
 class BanedMiddleware(BaseMiddleware):
     """
         Проверяет забанен ли пользователь в таблице Users БД
-        Использовать после middleware с DB
+        Использовать после UserContextMiddleware
     """
     async def __call__(
         self,
@@ -20,12 +20,11 @@ class BanedMiddleware(BaseMiddleware):
         data: dict[str, Any],
     ) -> Any:
 
-        # получаем сессию базы данных из контекста
-        session: Any = data["session"]
+        # получаем данные пользователя из контекста
+        user_context: UserContext | None = data.get("user_context")
 
-        # проверяем есть ли бан у пользователя
-        is_banned: bool = await self._check_user_is_banned(event, session)
-        # user_already_has_role: bool = await self._check_user_has_role(event, session)
+        # проверяем есть ли бан у пользователя, в случае ошибок при загрузке - пользователь в бане
+        is_banned: bool = user_context is None or user_context.is_banned
 
         if not is_banned:
             # для НЕ заблокированных пользователей
@@ -36,13 +35,6 @@ class BanedMiddleware(BaseMiddleware):
             bot: Bot = data["bot"]
             return await send_banned_message(event, bot)
 
-    async def _check_user_is_banned(self, event: TelegramObject, session: Any) -> bool:
-        try:
-            user_is_banned: bool = await AsyncOrm.user_is_banned(str(event.from_user.id), session)
-            return user_is_banned
-        except:
-            return True     # в случае ошибок возвращаем True - пользователь в бане
-
 
 async def send_banned_message(event: CallbackQuery | Message, bot: Bot) -> None:
     """Сообщение для заблокированных пользователей"""
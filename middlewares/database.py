@@ -4,25 +4,27 @@ from typing import Any
 import asyncpg
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from settings import settings
+
+from database.pool import LazySession
 
 
 class DatabaseMiddleware(BaseMiddleware):
+    """
+        Передает в хендлеры сессию БД поверх общего пула соединений.
+        Соединение берется из пула только если в процессе обработки апдейта был запрос к БД
+    """
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        conn = await asyncpg.connect(
-            user=settings.db.postgres_user,
-            host=settings.db.postgres_host,
-            password=settings.db.postgres_password,
-            port=settings.db.postgres_port,
-            database=settings.db.postgres_db
-        )
+        session = LazySession(self.pool)
         try:
-            data["session"] = conn
+            data["session"] = session
             return await handler(event, data)
         finally:
-            await conn.close()
\ No newline at end of file
+            await session.release()
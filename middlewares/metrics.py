@@ -0,0 +1,75 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType, Response
+from aiogram.types import TelegramObject
+
+from utils.metrics import UpdateStats, UPDATES_IN_FLIGHT, current_update, observe_update, record_telegram_request
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+        Внешний middleware апдейтов: замеряет полное время обработки апдейта,
+        время и количество запросов к БД и время запросов к Bot API по имени хендлера, апдейты в обработке.
+        Регистрируется на dp.update.outer_middleware
+    """
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        stats = UpdateStats()
+        token = current_update.set(stats)
+        started = time.perf_counter()
+        failed = False
+        UPDATES_IN_FLIGHT.inc()
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            UPDATES_IN_FLIGHT.dec()
+            current_update.reset(token)
+            observe_update(stats, started, failed)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Записывает имя выбранного хендлера в счетчики апдейта, регистрируется как обычный middleware событий"""
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        stats = current_update.get()
+        handler_object = data.get("handler")
+        if stats is not None and handler_object is not None:
+            callback = handler_object.callback
+            stats.handler = f"{callback.__module__}.{callback.__qualname__}"
+
+        return await handler(event, data)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время и ошибки запросов к Bot API"""
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            record_telegram_request(type(method).__name__, time.perf_counter() - started, failed)
@@ -5,13 +5,13 @@ from aiogram import BaseMiddleware, Bot
 from aiogram.types import TelegramObject, CallbackQuery, Message, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from database.orm import AsyncOrm
+from schemas.user import UserContext
 
 
 class RegisteredMiddleware(BaseMiddleware):
     """
         Проверяет определена уже роль у пользователя или нет.
-        Использовать после middleware с DB
+        Использовать после UserContextMiddleware
     """
     async def __call__(
         self,
@@ -20,11 +20,11 @@ class RegisteredMiddleware(BaseMiddleware):
         data: dict[str, Any],
     ) -> Any:
 
-        # получаем сессию базы данных из контекста
-        session: Any = data["session"]
+        # получаем данные пользователя из контекста
+        user_context: UserContext | None = data.get("user_context")
 
         # проверяем выбрал ли пользователь роль
-        user_already_has_role: bool = await self._check_user_has_role(event, session)
+        user_already_has_role: bool = user_context is not None and user_context.role is not None
 
         if user_already_has_role:
             # для зарегистрированных пользователей
@@ -35,13 +35,6 @@ class RegisteredMiddleware(BaseMiddleware):
             bot: Bot = data["bot"]
             return await send_empty_role_message(event, bot)
 
-    async def _check_user_has_role(self, event: TelegramObject, session: Any) -> bool:
-        try:
-            user_has_role: bool = await AsyncOrm.user_has_role(str(event.from_user.id), session)
-            return user_has_role
-        except Exception:
-            return False
-
 
 async def send_empty_role_message(event: CallbackQuery | Message, bot: Bot) -> None:
     """Сообщение для пользователей не выбравших роль"""
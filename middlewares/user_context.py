@@ -0,0 +1,34 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from database.orm import AsyncOrm
+from schemas.user import UserContext
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+        Загружает данные пользователя (роль, бан, админ, id профилей, верификация) одним запросом
+        и передает их в хендлеры и следующие middleware как user_context.
+        Использовать после middleware с DB
+    """
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+
+        # получаем сессию базы данных из контекста
+        session: Any = data["session"]
+
+        data["user_context"] = await self._get_user_context(event, session)
+        return await handler(event, data)
+
+    async def _get_user_context(self, event: TelegramObject, session: Any) -> UserContext | None:
+        try:
+            return await AsyncOrm.get_user_context(str(event.from_user.id), session)
+        except Exception:
+            return None     # в случае ошибок данные пользователя недоступны
@@ -1,11 +1,6 @@
-from typing import Any
+from schemas.user import UserContext
 
-from database.orm import AsyncOrm
-from schemas.executor import Executor
 
-
-async def check_verified_executor(tg_id: str, session: Any) -> bool:
+async def check_verified_executor(user_context: UserContext) -> bool:
     """Проверка верифицирован ли исполнитель"""
-    executor: Executor = await AsyncOrm.get_executor_by_tg_id(tg_id, session)
-
-    return executor.verified
\ No newline at end of file
+    return user_context.executor_id is not None and user_context.verified
@@ -4,6 +4,7 @@ from aiogram import Router, F, Bot
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from database.cache import taxonomy_cache
 from database.orm import AsyncOrm
 
 from middlewares.database import DatabaseMiddleware
@@ -13,6 +14,8 @@ from routers.keyboards import admin as kb
 from routers.buttons import buttons as btn
 from routers.states.professions import AddProfession, AddJob
 from schemas.profession import Profession, ProfessionAdd, Job, JobAdd
+from schemas.user import UserContext
+from utils.messages import message_ref, remove_reply_markup
 
 # Роутер для использования в ЛС
 router = Router()
@@ -25,11 +28,10 @@ router.callback_query.middleware.register(CheckPrivateMessageMiddleware())
 
 
 @router.callback_query(F.data.split("|")[1] == "admin_menu")
-async def admin_menu(callback: CallbackQuery, session: Any) -> None:
+async def admin_menu(callback: CallbackQuery, session: Any, user_context: UserContext) -> None:
     """Админ меню"""
     # Проверяем админ или нет
-    tg_id = str(callback.from_user.id)
-    is_admin: bool = await AsyncOrm.check_is_admin(tg_id, session)
+    is_admin: bool = user_context.is_admin
 
     if not is_admin:
         keyboard = kb.back_to_main_menu_keyboard()
@@ -55,7 +57,7 @@ async def add_profession_start(callback: CallbackQuery, state: FSMContext) -> No
     msg = "Отправьте название профессии"
     await callback.answer()
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.cancel_keyboard().as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(AddProfession.title)
@@ -63,17 +65,14 @@ async def get_profession_title(message: Message, state: FSMContext, session: Any
     """Получение названия профессии, запрос emoji"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text, disable_web_page_preview=True)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Проверяем есть ли уже такое название
@@ -83,7 +82,7 @@ async def get_profession_title(message: Message, state: FSMContext, session: Any
         prev_mess = await message.answer(f"Название \"{message.text}\" уже существует, отправьте другое название",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем название
@@ -95,7 +94,7 @@ async def get_profession_title(message: Message, state: FSMContext, session: Any
     # Отправляем сообщение
     msg = "Отправьте emoji для указанного названия"
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(AddProfession.emoji)
@@ -103,17 +102,14 @@ async def get_profession_emoji(message: Message, state: FSMContext, session: Any
     """Получение emoji, запрос подтверждения"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text, disable_web_page_preview=True)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем emoji
@@ -126,7 +122,7 @@ async def get_profession_emoji(message: Message, state: FSMContext, session: Any
     data = await state.get_data()
     msg = f"Добавить профессию <b>{data['emoji']} {data['title']}</b>?"
     prev_mess = await message.answer(msg, reply_markup=kb.yes_no_keyboard().as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data == "confirm", AddProfession.confirmation)
@@ -146,6 +142,7 @@ async def add_profession_confirmed(callback: CallbackQuery, session: Any, state:
 
     try:
         await AsyncOrm.create_profession(profession, session)
+        taxonomy_cache.invalidate()
     except:
         await callback.answer()
         await callback.message.edit_text(f"{btn.INFO} Ошибка при сохранении профессии. Повторите запрос позже")
@@ -172,7 +169,7 @@ async def add_job_start(callback: CallbackQuery, state: FSMContext, session: Any
     await callback.answer()
     keyboard = kb.profession_keyboard(professions)
     prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "choose_profession", AddJob.profession)
@@ -202,7 +199,7 @@ async def get_profession(callback: CallbackQuery, state: FSMContext, session: An
 
     await callback.answer()
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.cancel_keyboard().as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(AddJob.title)
@@ -210,17 +207,14 @@ async def get_job_title(message: Message, state: FSMContext) -> None:
     """Получаем job title"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].html_text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Проверяем есть ли уже такое название
@@ -230,7 +224,7 @@ async def get_job_title(message: Message, state: FSMContext) -> None:
         prev_mess = await message.answer(f"Название \"{message.text}\" уже существует, отправьте другое название",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем название
@@ -242,7 +236,7 @@ async def get_job_title(message: Message, state: FSMContext) -> None:
     # Отправляем сообщение
     msg = f"Добавить раздел <b>{message.text}</b> в профессию {data['profession'].emoji + ' ' if data['profession'].emoji else ''}{data['profession'].title}?"
     prev_mess = await message.answer(msg, reply_markup=kb.yes_no_keyboard().as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data == "confirm", AddJob.confirmation)
@@ -262,6 +256,7 @@ async def add_job_confirmed(callback: CallbackQuery, session: Any, state: FSMCon
 
     try:
         await AsyncOrm.create_job(job, session)
+        taxonomy_cache.invalidate()
     except:
         await callback.answer()
         await callback.message.edit_text(f"{btn.INFO} Ошибка при сохранении раздела профессии. Повторите запрос позже")
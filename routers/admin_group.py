@@ -16,6 +16,7 @@ from routers.messages.executor import executor_card_for_admin_verification, inst
 from routers.states.registration import Reject, RejectEdit
 from schemas.blocked_users import BlockedUser, BlockedUserAdd
 from schemas.executor import RejectReason, Executor
+from schemas.user import UserContext
 from routers.keyboards import admin as kb
 from settings import settings
 from utils.datetime_service import convert_date_and_time_to_str
@@ -32,9 +33,9 @@ group_router.callback_query.middleware.register(CheckGroupMessageMiddleware())
 
 # Подтверждение верификации исполнителя
 @group_router.callback_query(F.data.split("|")[0] == "executor_confirm")
-async def confirm_executor_registration(callback: CallbackQuery, session: Any, bot: Bot) -> None:
+async def confirm_executor_registration(callback: CallbackQuery, session: Any, bot: Bot, user_context: UserContext) -> None:
     """Верификация новой анкеты исполнителя в группе"""
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -76,13 +77,13 @@ async def confirm_executor_registration(callback: CallbackQuery, session: Any, b
 
 # Отказ в верификации исполнителя
 @group_router.callback_query(F.data.split("|")[0] == "executor_cancel")
-async def cancel_verification(callback: CallbackQuery, session: Any, state: FSMContext) -> None:
+async def cancel_verification(callback: CallbackQuery, session: Any, state: FSMContext, user_context: UserContext) -> None:
     """Выбор причины отказа в верификации профиля"""
     # Убираем клавиатуру сразу после нажатия
     await callback.message.edit_reply_markup(reply_markup=None)
 
     # Проверяем админа
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -113,10 +114,10 @@ async def cancel_verification(callback: CallbackQuery, session: Any, state: FSMC
 
 
 @group_router.callback_query(F.data.split("|")[0] == "reject_reason", Reject.reason)
-async def select_reasons(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def select_reasons(callback: CallbackQuery, state: FSMContext, session: Any, user_context: UserContext) -> None:
     """Вспомогательный хендлер для мультиселекта"""
     # Проверяем админа
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -154,10 +155,10 @@ async def select_reasons(callback: CallbackQuery, state: FSMContext, session: An
 
 
 @group_router.callback_query(F.data.split("|")[0] == "reject_reasons_done", Reject.reason)
-async def send_reject_to_user(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
+async def send_reject_to_user(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot, user_context: UserContext) -> None:
     """Отправка сообщения об отказе в верификации"""
     # Проверяем админа
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -226,9 +227,9 @@ async def send_reject_to_user(callback: CallbackQuery, state: FSMContext, sessio
 
 # Подтверждение изменения анкеты исполнителя
 @group_router.callback_query(F.data.split("|")[0] == "executor_edit_confirm")
-async def confirm_executor_registration(callback: CallbackQuery, session: Any, bot: Bot) -> None:
+async def confirm_executor_registration(callback: CallbackQuery, session: Any, bot: Bot, user_context: UserContext) -> None:
     """Верификация новой анкеты исполнителя в группе"""
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -259,12 +260,12 @@ async def confirm_executor_registration(callback: CallbackQuery, session: Any, b
 
 # Отклонение изменений анкеты исполнителя
 @group_router.callback_query(F.data.split("|")[0] == "executor_edit_cancel")
-async def cancel_executor_registration(callback: CallbackQuery, session: Any, state: FSMContext) -> None:
+async def cancel_executor_registration(callback: CallbackQuery, session: Any, state: FSMContext, user_context: UserContext) -> None:
     """Отклонение верификации изменений анкеты пользователя"""
     # Убираем клавиатуру сразу после нажатия
     await callback.message.edit_reply_markup(reply_markup=None)
 
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -295,9 +296,9 @@ async def cancel_executor_registration(callback: CallbackQuery, session: Any, st
 
 
 @group_router.callback_query(F.data.split("|")[0] == "reject_reason", RejectEdit.reason)
-async def select_reasons(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def select_reasons(callback: CallbackQuery, state: FSMContext, session: Any, user_context: UserContext) -> None:
     """Вспомогательный хендлер для мультиселекта"""
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
@@ -335,9 +336,9 @@ async def select_reasons(callback: CallbackQuery, state: FSMContext, session: An
 
 
 @group_router.callback_query(F.data.split("|")[0] == "reject_reasons_done", RejectEdit.reason)
-async def send_reject_to_user(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
+async def send_reject_to_user(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot, user_context: UserContext) -> None:
     """Отправка сообщения об отказе в верификации изменений"""
-    is_admin = await AsyncOrm.check_is_admin(str(callback.from_user.id), session)
+    is_admin = user_context.is_admin
 
     # Проверяем админа
     if not is_admin:
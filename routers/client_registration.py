@@ -18,13 +18,14 @@ from routers.menu import main_menu
 from database.orm import AsyncOrm
 from schemas.blocked_users import BlockedUser
 from schemas.client import ClientAdd
-from schemas.user import User
+from schemas.user import User, UserContext
 from settings import settings
 from routers.keyboards import client_reg as kb
 from utils.datetime_service import convert_date_and_time_to_str
 from utils.download_files import load_photo_from_tg, get_photo_path
 from logger import logger
 from utils.s3_storage import save_file_to_s3_storage
+from utils.messages import message_ref, remove_reply_markup
 
 router = Router()
 
@@ -36,7 +37,8 @@ router.callback_query.middleware.register(CheckPrivateMessageMiddleware())
 
 
 @router.callback_query(and_f(F.data.split("|")[0] == "choose_role", F.data.split("|")[1] == "client"))
-async def start_registration(callback: CallbackQuery, session: Any, state: FSMContext) -> None:
+async def start_registration(callback: CallbackQuery, session: Any, state: FSMContext,
+                             user_context: UserContext) -> None:
     """Начало регистрации клиента"""
     # Удаляем предыдущее сообщение
     try:
@@ -46,7 +48,7 @@ async def start_registration(callback: CallbackQuery, session: Any, state: FSMCo
 
     # Проверка уже выбранной роли у пользователя
     tg_id = str(callback.from_user.id)
-    role: str | None = await AsyncOrm.get_user_role(tg_id, session)
+    role: str | None = user_context.role
     if role:
         role_text = role.capitalize()
         msg = f"У тебя уже выбрана роль \"{role_text}\""
@@ -73,7 +75,7 @@ async def start_registration(callback: CallbackQuery, session: Any, state: FSMCo
     keyboard = kb.cancel_keyboard()
 
     prev_mess = await callback.message.answer(msg, reply_markup=keyboard.as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Client.name)
@@ -82,17 +84,14 @@ async def get_client_name(message: Message, state: FSMContext, session: Any) ->
     data = await state.get_data()
 
     # Меняем предыдущее сообщение
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Формируем модель клиента
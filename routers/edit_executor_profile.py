@@ -27,8 +27,10 @@ from schemas.profession import Profession, Job
 from schemas.user import User
 from settings import settings
 from utils.datetime_service import convert_date_and_time_to_str
-from utils.download_files import load_photo_from_tg, get_photo_path
+from utils.download_files import load_photo_from_tg
+from utils.media_cache import get_executor_photo_path
 from utils.validations import is_valid_url
+from utils.messages import message_ref, remove_reply_markup
 
 router = Router()
 
@@ -60,7 +62,7 @@ async def edit_photo(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditPhoto.photo)
@@ -68,17 +70,14 @@ async def get_photo(message: Message, bot: Bot, state: FSMContext) -> None:
     """Получение фото"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Проверяем что отправлено фото
     if not message.photo:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить фотографию",
                                          reply_markup=kb.cancel_edit_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Очищаем стейт
@@ -120,7 +119,7 @@ async def edit_profession(callback: CallbackQuery, session: Any, state: FSMConte
     prev_mess = await callback.message.answer(msg, reply_markup=kb.profession_keyboard(professions).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "choose_profession", EditExecutor.profession)
@@ -232,7 +231,7 @@ async def edit_rate(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditExecutor.rate)
@@ -240,17 +239,14 @@ async def get_rate(message: Message, state: FSMContext) -> None:
     """Получаем ставку"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Меняем old_executor, если это первое изменение и нет new_executor
@@ -287,7 +283,7 @@ async def edit_experience(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditExecutor.experience)
@@ -295,17 +291,14 @@ async def get_experience(message: Message, state: FSMContext, session: Any) -> N
     """Получаем опыт"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Меняем old_executor, если это первое изменение и нет new_executor
@@ -342,7 +335,7 @@ async def edit_description(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditExecutor.description)
@@ -350,17 +343,14 @@ async def get_description(message: Message, state: FSMContext, session: Any) ->
     """Получаем описание"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если текст длиннее 500 символов
@@ -369,7 +359,7 @@ async def get_description(message: Message, state: FSMContext, session: Any) ->
             f"Текст должен быть не более 500 символов, вы отправили {len(message.text)}",
             reply_markup=kb.cancel_edit_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Меняем old_executor, если это первое изменение и нет new_executor
@@ -407,7 +397,7 @@ async def edit_contacts(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.skip_cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditExecutor.contacts)
@@ -415,17 +405,14 @@ async def get_contacts(message: Message, state: FSMContext, session: Any) -> Non
     """Получаем контакты"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.skip_cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Меняем old_executor, если это первое изменение и нет new_executor
@@ -484,7 +471,7 @@ async def edit_location(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.skip_cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditExecutor.location)
@@ -492,17 +479,14 @@ async def get_location(message: Message, state: FSMContext, session: Any) -> Non
     """Получаем location"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.skip_cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Меняем old_executor, если это первое изменение и нет new_executor
@@ -564,7 +548,7 @@ async def edit_links(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditExecutor.links)
@@ -572,10 +556,7 @@ async def get_link(message: Message, state: FSMContext) -> None:
     """Вспомогательный хэндлер для получения ссылок на портфолио"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text, disable_web_page_preview=True)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
@@ -588,7 +569,7 @@ async def get_link(message: Message, state: FSMContext) -> None:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если ссылка не валидна
@@ -603,7 +584,7 @@ async def get_link(message: Message, state: FSMContext) -> None:
                                          "без дополнительных символов\nОтправьте ссылку заново",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Записываем ссылку
@@ -619,7 +600,7 @@ async def get_link(message: Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.continue_cancel_keyboard().as_markup(), disable_web_page_preview=True)
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data == "continue", EditExecutor.links)
@@ -715,14 +696,16 @@ async def send_to_verification_confirmed(callback: CallbackQuery, state: FSMCont
     # Сообщение админам в группу
     admin_msg = edited_executor_card_for_admin_verification(executor)
     admin_group_id = settings.admin_group_id
-    filepath = get_photo_path(settings.executors_profile_path, tg_id)
-    profile_image = FSInputFile(filepath)
-    await bot.send_photo(
-        admin_group_id,
-        photo=profile_image,
-        caption=admin_msg,
-        reply_markup=confirm_edit_executor_keyboard(tg_id).as_markup(),
-    )
+    filepath = await get_executor_photo_path(executor)
+    try:
+        await bot.send_photo(
+            admin_group_id,
+            photo=FSInputFile(filepath),
+            caption=admin_msg,
+            reply_markup=confirm_edit_executor_keyboard(tg_id).as_markup(),
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при отправке измененной анкеты исполнителя {tg_id} на проверку {filepath}: {e}")
 
 
 # ОТМЕНА ИЗМЕНЕНИЯ АНКЕТЫ
@@ -16,6 +16,7 @@ from schemas.order import TaskFileAdd
 from schemas.profession import Profession, Job
 from routers.buttons import buttons as btn
 from utils.validations import is_valid_price, is_valid_deadline
+from utils.messages import message_ref, remove_reply_markup
 
 router = Router()
 
@@ -54,7 +55,7 @@ async def edit_profession(callback: CallbackQuery, session: Any, state: FSMConte
     prev_mess = await callback.message.answer(msg, reply_markup=kb.profession_keyboard(professions, order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "choose_profession", EditOrderProfession.profession)
@@ -86,7 +87,7 @@ async def get_profession(callback: CallbackQuery, session: Any, state: FSMContex
     keyboard = kb.jobs_keyboard(jobs, selected_jobs, order_id=data["order_id"])
     await callback.answer()
     prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "choose_jobs", EditOrderProfession.jobs)
@@ -167,7 +168,7 @@ async def edit_title(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_order_keyboard(order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditOrderTitle.title)
@@ -175,17 +176,14 @@ async def get_title(message: Message, state: FSMContext, session: Any) -> None:
     """Получаем название"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Очищаем стейт
@@ -227,7 +225,7 @@ async def edit_task(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_order_keyboard(order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditOrderTask.task)
@@ -235,17 +233,14 @@ async def get_task(message: Message, state: FSMContext, session: Any) -> None:
     """Получаем ТЗ"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если текст длиннее 1000 символов
@@ -253,7 +248,7 @@ async def get_task(message: Message, state: FSMContext, session: Any) -> None:
         prev_mess = await message.answer(f"Текст должен быть не более 1000 символов, вы отправили {len(message.text)}",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Очищаем стейт
@@ -298,7 +293,7 @@ async def edit_price(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_skip_edit_order_keyboard(order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditOrderPrice.price)
@@ -306,17 +301,14 @@ async def get_price(message: Message, state: FSMContext, session: Any) -> None:
     """Получаем цену"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если ввели не корректное число
@@ -326,7 +318,7 @@ async def get_price(message: Message, state: FSMContext, session: Any) -> None:
             reply_markup=kb.cancel_skip_edit_order_keyboard(data["order_id"]).as_markup()
         )
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Очищаем стейт
@@ -392,7 +384,7 @@ async def edit_deadline(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_edit_order_keyboard(order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditOrderDeadline.deadline)
@@ -400,17 +392,14 @@ async def get_deadline(message: Message, state: FSMContext, session: Any) -> Non
     """Получаем ТЗ"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если невалидный срок
@@ -418,7 +407,7 @@ async def get_deadline(message: Message, state: FSMContext, session: Any) -> Non
         prev_mess = await message.answer(f"Необходимо отправить количество дней цифрой без других символов. Срок не может быть меньше 1 дня.",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Очищаем стейт
@@ -463,7 +452,7 @@ async def edit_requirements(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_skip_edit_order_keyboard(order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditOrderRequirements.requirements)
@@ -471,17 +460,14 @@ async def get_requirements(message: Message, state: FSMContext, session: Any) ->
     """Получаем требования"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_edit_order_keyboard(data["order_id"]).as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Очищаем стейт
@@ -551,7 +537,7 @@ async def edit_files(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_skip_edit_order_keyboard(order_id).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(EditOrderFiles.files)
@@ -559,10 +545,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
     """Вспомогательный хендлер для получения файлов"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].html_text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не файл
     if not message.document:
@@ -576,7 +559,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
                                          ".pdf, .docx, .xlsx, .txt, либо jpeg/jpg/png (отправленные файлом)",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если фал больше 10МБ
@@ -590,7 +573,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
         prev_mess = await message.answer("Размер файла не должен быть более 100МБ. Отправьте файл или нажми \"Продолжить\"",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Проверяем если уже есть три файла
@@ -600,7 +583,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
             reply_markup=kb.continue_cancel_keyboard(data["order_id"]).as_markup()
         )
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем ids файл в стейт
@@ -620,7 +603,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.continue_cancel_keyboard(data["order_id"]).as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(or_f(F.data == "continue", F.data == "skip"), EditOrderFiles.files)
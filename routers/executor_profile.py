@@ -23,9 +23,13 @@ from routers.states.executor_profile import EditExecutor
 from routers.states.registration import UploadCV
 
 from schemas.executor import Executor
+from schemas.user import UserContext
 
 from settings import settings
-from utils.download_files import get_photo_path, get_cv_path, check_cv_file, load_cv_from_tg
+from utils.download_files import get_cv_path, check_cv_file, load_cv_from_tg
+from utils.media_cache import get_executor_photo_path
+from utils.telegram_media import answer_photo_cached
+from utils.messages import message_ref, remove_reply_markup
 
 router = Router()
 
@@ -92,8 +96,7 @@ async def executor_profile_menu(callback: CallbackQuery, session: Any, state: FS
         caption += f"\n\n❗ <i>Чтобы изменения анкеты вступили в силу, необходимо отправить анкету на проверку администратору</i>"
 
     # Получаем фотографию
-    filepath = get_photo_path(settings.executors_profile_path, executor.tg_id)
-    profile_image = FSInputFile(filepath)
+    filepath = await get_executor_photo_path(executor)
 
     # Проверяем есть ли резюме
     cv_exists: bool = check_cv_file(executor.tg_id)
@@ -106,8 +109,10 @@ async def executor_profile_menu(callback: CallbackQuery, session: Any, state: FS
 
     # Отправляем сообщение
     keyboard = kb.executor_profile_keyboard(edited, cv_exists=cv_exists)
-    await callback.message.answer_photo(
-        profile_image,
+    await answer_photo_cached(
+        callback.message.answer_photo,
+        filepath,
+        session,
         caption=caption,
         reply_markup=keyboard.as_markup()
     )
@@ -130,7 +135,7 @@ async def upload_resume_start(callback: CallbackQuery, state: FSMContext) -> Non
 
     # Отправляем сообщение
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_upload_cv_keyboard().as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(UploadCV.cv)
@@ -138,17 +143,14 @@ async def get_cv_file(message: Message, state: FSMContext, bot: Bot) -> None:
     """Получение файла резюме"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].html_text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не файл
     if not message.document:
         prev_mess = await message.answer("Неверный формат данных. Необходимо отправить файл расширения <b>.pdf</b>",
                                          reply_markup=kb.cancel_upload_cv_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Проверяем что файл расширения pdf
@@ -156,7 +158,7 @@ async def get_cv_file(message: Message, state: FSMContext, bot: Bot) -> None:
         prev_mess = await message.answer("Неверный формат данных. Необходимо отправить файл расширения <b>.pdf</b>",
                                          reply_markup=kb.cancel_upload_cv_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем файл
@@ -236,13 +238,13 @@ async def cancel_upload_cv(callback: CallbackQuery, state: FSMContext, session:
 
 # ИЗМЕНЕНИЕ СТАТУСА ДОТСПУНОСТИ ДЛЯ ИСПОЛНИТЕЛЯ
 @router.callback_query(F.data == "main_menu|change_ex_status")
-async def my_active_status(callback: CallbackQuery, session: Any) -> None:
+async def my_active_status(callback: CallbackQuery, session: Any, user_context: UserContext) -> None:
     """Показывается статус исполнителя, принимает / не принимает заказы"""
     await callback.answer()
 
     # Проверям верификацию исполнителя
     tg_id = str(callback.from_user.id)
-    verified: bool = await check_verified_executor(tg_id, session)
+    verified: bool = await check_verified_executor(user_context)
 
     # Если пользователь не верифицирован
     if not verified:
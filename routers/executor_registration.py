@@ -17,15 +17,18 @@ from routers.buttons.buttons import WAIT_MSG, INFO
 from routers.keyboards.admin import confirm_registration_executor_keyboard
 
 from database.orm import AsyncOrm
+from logger import logger
 from schemas.blocked_users import BlockedUser
 from schemas.executor import ExecutorAdd
 from schemas.profession import Job, Profession
-from schemas.user import User
+from schemas.user import User, UserContext
 from utils.datetime_service import convert_date_and_time_to_str
-from utils.download_files import load_photo_from_tg, get_photo_path
+from utils.download_files import load_photo_from_tg
+from utils.media_cache import get_executor_photo_path
 from settings import settings
 from routers.keyboards import executor_registration as kb
 from utils.validations import is_valid_age, is_valid_url
+from utils.messages import message_ref, remove_reply_markup
 
 router = Router()
 router.message.middleware.register(CheckPrivateMessageMiddleware())
@@ -35,7 +38,8 @@ router.callback_query.middleware.register(CheckPrivateMessageMiddleware())
 
 
 @router.callback_query(and_f(F.data.split("|")[0] == "choose_role", F.data.split("|")[1] == "executor"))
-async def start_registration(callback: types.CallbackQuery, session: Any, state: FSMContext) -> None:
+async def start_registration(callback: types.CallbackQuery, session: Any, state: FSMContext,
+                             user_context: UserContext) -> None:
     """Начало регистрации исполнителя"""
     # Удаляем предыдущее сообщение
     try:
@@ -45,7 +49,7 @@ async def start_registration(callback: types.CallbackQuery, session: Any, state:
 
     # Проверка уже выбранной роли у пользователя
     tg_id = str(callback.from_user.id)
-    role: str | None = await AsyncOrm.get_user_role(tg_id, session)
+    role: str | None = user_context.role
     if role:
         role_text = settings.roles[role]
         msg = f"У тебя уже выбрана роль {role_text}"
@@ -78,7 +82,7 @@ async def start_registration(callback: types.CallbackQuery, session: Any, state:
     prev_mess = await callback.message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.name)
@@ -86,17 +90,14 @@ async def get_name(message: types.Message, state: FSMContext) -> None:
     """Запись имени, запрос возраста"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем имя
@@ -110,7 +111,7 @@ async def get_name(message: types.Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.photo)
@@ -118,17 +119,14 @@ async def get_photo(message: types.Message, bot: Bot, state: FSMContext) -> None
     """Получение фото, запрос возраста"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Проверяем что отправлено фото
     if not message.photo:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить фотографию",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем фото локально
@@ -145,7 +143,7 @@ async def get_photo(message: types.Message, bot: Bot, state: FSMContext) -> None
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.age)
@@ -153,17 +151,14 @@ async def get_age(message: types.Message, session: Any, state: FSMContext) -> No
     """Получение возраста, запрос профессии"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если возраст введен некорректный
@@ -171,7 +166,7 @@ async def get_age(message: types.Message, session: Any, state: FSMContext) -> No
         prev_mess = await message.answer("Необходимо отправить возраст одним числом от 18 до 100",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем возраст
@@ -188,7 +183,7 @@ async def get_age(message: types.Message, session: Any, state: FSMContext) -> No
     prev_mess = await message.answer(msg, reply_markup=kb.profession_keyboard(professions).as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "choose_profession", Executor.profession)
@@ -261,7 +256,7 @@ async def get_jobs(callback: types.CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.description)
@@ -269,17 +264,14 @@ async def get_description(message: types.Message, state: FSMContext) -> None:
     """Получение описания, запрос ставки"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если текст длиннее 500 символов
@@ -287,7 +279,7 @@ async def get_description(message: types.Message, state: FSMContext) -> None:
         prev_mess = await message.answer(f"Текст должен быть не более 500 символов, вы отправили {len(message.text)}",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем текст
@@ -301,7 +293,7 @@ async def get_description(message: types.Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.rate)
@@ -309,17 +301,14 @@ async def get_rate(message: types.Message, state: FSMContext) -> None:
     """Получаем ставку, запрашиваем опыт"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Записываем ставку
@@ -333,7 +322,7 @@ async def get_rate(message: types.Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.experience)
@@ -341,17 +330,14 @@ async def get_experience(message: types.Message, state: FSMContext) -> None:
     """Получаем опыт, запрашиваем ссылки на портфолио"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Записываем опыт
@@ -368,7 +354,7 @@ async def get_experience(message: types.Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(Executor.links)
@@ -376,10 +362,7 @@ async def get_link(message: types.Message, state: FSMContext) -> None:
     """Вспомогательный хэндлер для получения ссылок на портфолио"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text, disable_web_page_preview=True)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
@@ -392,7 +375,7 @@ async def get_link(message: types.Message, state: FSMContext) -> None:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если ссылка не валидна
@@ -407,7 +390,7 @@ async def get_link(message: types.Message, state: FSMContext) -> None:
                                          "Отправь ссылку заново",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Записываем ссылку
@@ -423,7 +406,7 @@ async def get_link(message: types.Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.continue_cancel_keyboard().as_markup(), disable_web_page_preview=True)
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data == "continue", Executor.links)
@@ -444,7 +427,7 @@ async def get_links(callback: types.CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.skip_cancel_keyboard().as_markup())
 
     # Сохраняем последнее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 # @router.message(Executor.contacts)
@@ -503,17 +486,14 @@ async def get_location(message: types.Message | types.CallbackQuery, state: FSMC
     if type(message) == types.Message:
         # Меняем предыдущее сообщение
         data = await state.get_data()
-        try:
-            await data["prev_mess"].edit_text(data["prev_mess"].text)
-        except Exception:
-            pass
+        await remove_reply_markup(message.bot, data.get("prev_mess"))
 
         # Если отправлен не текст
         if not message.text:
             prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                              reply_markup=kb.skip_cancel_keyboard().as_markup())
             # Сохраняем предыдущее сообщение
-            await state.update_data(prev_mess=prev_mess)
+            await state.update_data(prev_mess=message_ref(prev_mess))
             return
 
         # Записываем город
@@ -558,10 +538,9 @@ async def get_location(message: types.Message | types.CallbackQuery, state: FSMC
     await state.update_data(executor=executor)
     await state.update_data(questionnaire=questionnaire)
 
-    # Получаем фотографию
-    filepath = get_photo_path(settings.executors_profile_path, executor.tg_id)
+    # Получаем фотографию (из кэша медиа или S3, дефолтную если фото нет)
+    filepath = await get_executor_photo_path(executor)
     profile_image = FSInputFile(filepath)
-    await state.update_data(filepath=filepath)
 
     # Удаляем сообщение об ожидании
     try:
@@ -589,7 +568,7 @@ async def get_location(message: types.Message | types.CallbackQuery, state: FSMC
         )
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data == "confirm_registration", Executor.verification)
@@ -616,15 +595,19 @@ async def registration_confirmation(callback: types.CallbackQuery, state: FSMCon
         return
 
     # Отправляем в группу анкету на согласование
+    # Фото могло быть вытеснено из кэша медиа, пока исполнитель проверял анкету
     admin_group_id = settings.admin_group_id
-    profile_image = FSInputFile(data["filepath"])
+    filepath = await get_executor_photo_path(executor)
     admin_msg = data["questionnaire"]
-    await bot.send_photo(
-        admin_group_id,
-        photo=profile_image,
-        caption=admin_msg,
-        reply_markup=confirm_registration_executor_keyboard(executor.tg_id).as_markup(),
-    )
+    try:
+        await bot.send_photo(
+            admin_group_id,
+            photo=FSInputFile(filepath),
+            caption=admin_msg,
+            reply_markup=confirm_registration_executor_keyboard(executor.tg_id).as_markup(),
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при отправке анкеты исполнителя {executor.tg_id} на проверку {filepath}: {e}")
 
 
 @router.callback_query(F.data == "cancel_executor_registration", StateFilter("*"))
@@ -1,15 +1,16 @@
 from typing import Any
 
-from aiogram import Router, F
+from aiogram import Router, F, Bot
 from aiogram.filters import or_f
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message, FSInputFile
+from aiogram.types import CallbackQuery, Message
 
 from middlewares.registered import RegisteredMiddleware
 from middlewares.database import DatabaseMiddleware
 from middlewares.private import CheckPrivateMessageMiddleware
 
 from database.orm import AsyncOrm
+from database.views_buffer import executor_views_buffer
 
 from routers.buttons import buttons as btn
 from routers.keyboards import favorites as kb
@@ -20,6 +21,10 @@ from routers.messages.find_executor import contact_with_executor
 from routers.states.favorites import FavoriteExecutors
 
 from schemas.executor import Executor
+from schemas.user import UserContext
+from utils.messages import message_ref, delete_message
+from utils.media_cache import get_executor_photo_path
+from utils.telegram_media import answer_photo_cached
 
 from logger import logger
 from settings import settings
@@ -47,13 +52,13 @@ async def favorites_executors(callback: CallbackQuery, session: Any, state: FSMC
     # Начинаем state
     await state.set_state(FavoriteExecutors.feed)
 
-    # Получаем избранных исполнителей у клиента
-    executors: list[Executor] = await AsyncOrm.get_favorites_executors(client_tg_id, session)
+    # Получаем id избранных исполнителей у клиента
+    executors_ids: list[int] = await AsyncOrm.get_favorites_executors_ids(client_tg_id, session) or []
     current_index = 0
 
-    # Записываем в стейт всех исполнителей и текущего
+    # Записываем в стейт id всех исполнителей и текущий индекс
     await state.update_data(
-        executors=executors,
+        executors=executors_ids,
         current_index=current_index
     )
 
@@ -64,95 +69,89 @@ async def favorites_executors(callback: CallbackQuery, session: Any, state: FSMC
         pass
 
     # Отправляем сообщение с профилем
-    await send_executor_profile(executors, current_index, callback, state, is_first=True)
+    await send_executor_profile(executors_ids, current_index, callback, state, session, is_first=True)
 
 
 @router.callback_query(or_f(F.data == "prev_ex", F.data == "next_ex"), FavoriteExecutors.feed)
-async def show_executor(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_executor(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Показывает следующего или предыдущего исполнителя"""
     data = await state.get_data()
     current_index = data["current_index"]
-    executors = data["executors"]
-    prev_mess = data["prev_mess"]
+    executors_ids: list[int] = data["executors"]
 
     # При нажатии влево
     if callback.data == "prev_ex":
         # Меняем текущий индекс
         if current_index == 0:
-            current_index = len(executors) - 1
+            current_index = len(executors_ids) - 1
         else:
             current_index -= 1
 
     # При нажатии вправо
     elif callback.data == "next_ex":
         # Меняем текущий индекс
-        if current_index == len(executors) - 1:
+        if current_index == len(executors_ids) - 1:
             current_index = 0
         else:
             current_index += 1
 
     # Сохраняем текущий индекс
     await state.update_data(current_index=current_index)
-    # Отправляем сообщение
-    await send_executor_profile(executors, current_index, prev_mess, state)
+    # Редактируем карточку, на которой нажали кнопку
+    await send_executor_profile(executors_ids, current_index, callback, state, session)
 
 
 @router.callback_query(F.data.split("|")[0] == "write_fav_ex", FavoriteExecutors.feed)
-async def write_to_fav_executor(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def write_to_fav_executor(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot,
+                                user_context: UserContext) -> None:
     data = await state.get_data()
-    client_tg_id = str(callback.from_user.id)
 
     # Получаем данные для формирования сообщения
-    current_index = data["current_index"]
-    executors = data["executors"]
-    executor = executors[current_index]
+    executor_id = int(callback.data.split("|")[1])
+    executor: Executor = await AsyncOrm.get_executor_by_id(executor_id, session)
+
+    # Исполнитель мог удалить профиль во время просмотра ленты
+    if not executor:
+        await callback.answer(f"{btn.INFO} Профиль исполнителя больше недоступен", show_alert=True)
+        return
 
     ex_username = await AsyncOrm.get_username(executor.tg_id, session)
-    client_id = await AsyncOrm.get_client_id(client_tg_id, session)
+    client_id = user_context.client_id
 
     ms = contact_with_executor(executor, ex_username)
     keyboard = kb.back_to_feed_keyboard()
 
     # Удаляем предыдудщее сообщение
-    try:
-        await data["prev_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("prev_mess"))
 
     prev_mess = await callback.message.answer(ms, reply_markup=keyboard.as_markup(), disable_web_page_preview=True)
 
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
-    # Сохраняем запись о просмотре контактов исполнителя
-    await AsyncOrm.create_executor_view(executor.id, client_id, session)
+    # Сохраняем запись о просмотре контактов исполнителя (запись в БД в фоне)
+    await executor_views_buffer.add(executor.id, client_id)
 
 
 @router.callback_query(F.data == "back_to_fav_feed", FavoriteExecutors.feed)
-async def back_to_favorites_feed(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def back_to_favorites_feed(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
     """Возвращение в ленту избранных"""
     data = await state.get_data()
 
-    executors = data["executors"]
+    executors_ids: list[int] = data["executors"]
     current_index = data["current_index"]
 
-    try:
-        await data["prev_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("prev_mess"))
 
-    await send_executor_profile(executors, current_index, callback, state, is_first=True)
+    await send_executor_profile(executors_ids, current_index, callback, state, session, is_first=True)
 
 
 @router.callback_query(F.data == "back_from_favorites_feed", FavoriteExecutors.feed)
-async def back_from_favorites_feed(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def back_from_favorites_feed(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
     """Возвращение из ленты избранных"""
     data = await state.get_data()
 
     # Удаляем сообщение
-    try:
-        await data["prev_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("prev_mess"))
 
     # Очищаем стейт
     await state.clear()
@@ -162,17 +161,14 @@ async def back_from_favorites_feed(callback: CallbackQuery, state: FSMContext, s
 
 
 @router.callback_query(F.data.split("|")[0] == "delete_fav", FavoriteExecutors.feed)
-async def delete_from_favorite(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def delete_from_favorite(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
     """Удаление исполнителя из списка избранных у клиента"""
     client_tg_id = str(callback.from_user.id)
     executor_id = int(callback.data.split("|")[1])
     data = await state.get_data()
 
     # Удаляем предыдущее сообщение
-    try:
-        await data["prev_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("prev_mess"))
 
     # Удаляем исполнителя из избранных в БД
     try:
@@ -183,30 +179,40 @@ async def delete_from_favorite(callback: CallbackQuery, state: FSMContext, sessi
 
     prev_mess = await callback.message.answer(f"{btn.SUCCESS} Исполнитель удален из избранных")
 
-    # Формируем данные для новой ленты исполнителей
-    executors = data["executors"]
-
-    # Удаляем из стейта этого исполнителя
-    for executor in executors:
-        if executor.id == executor_id:
-            executors.remove(executor)
+    # Удаляем из стейта id этого исполнителя
+    executors_ids: list[int] = [ex_id for ex_id in data["executors"] if ex_id != executor_id]
 
     # Обновляем список исполнителей
     current_index = 0  # обнуляем текущий индекс
     await state.update_data(
-        executors=executors,
+        executors=executors_ids,
         current_index=current_index
     )
 
     # Отправляем ленту
-    await send_executor_profile(executors, current_index, prev_mess, state, is_first=True)
-
+    await send_executor_profile(executors_ids, current_index, prev_mess, state, session, is_first=True)
+
+
+async def send_executor_profile(executors_ids: list[int], current_index: int, prev_mess: Message | CallbackQuery,
+                                state: FSMContext, session: Any, is_first: bool = False) -> None:
+    """
+        Отправка сообщения с карточкой исполнителя.
+        Профиль текущего исполнителя загружается по id из списка в стейте
+    """
+    # Удаленные и неподтвержденные профили убираются из ленты одним запросом, ошибки БД пробрасываются
+    available = set(await AsyncOrm.get_verified_executors_ids(executors_ids, session)) if executors_ids else set()
+    if len(available) != len(executors_ids):
+        current_index = sum(ex_id in available for ex_id in executors_ids[:current_index])
+        executors_ids = [ex_id for ex_id in executors_ids if ex_id in available]
+        current_index = min(current_index, max(len(executors_ids) - 1, 0))
+        await state.update_data(executors=executors_ids, current_index=current_index)
+
+    executor: Executor | None = None
+    if executors_ids:
+        executor = await AsyncOrm.get_executor_by_id(executors_ids[current_index], session)
 
-async def send_executor_profile(executors: list[Executor], current_index: int, prev_mess: Message | CallbackQuery,
-                                state: FSMContext, is_first: bool = False) -> None:
-    """Отправка сообщения с карточкой исполнителя"""
     # Если еще нет исполнителей или их удалили в ленте
-    if len(executors) == 0:
+    if not executor:
         # Если исполнитель был 1 и его удалили
         msg = "У тебя еще нет избранных исполнителей"
         keyboard = kb.back_keyboard()
@@ -218,51 +224,37 @@ async def send_executor_profile(executors: list[Executor], current_index: int, p
             await prev_mess.delete()
         return
 
-    executor = executors[current_index]
-
     # Формируем сообщение
-    msg = executor_profile_to_show(executors[current_index])
-    keyboard = kb.favorites_executor_keyboard(executors, current_index)
-
-    # Получаем фото
-    if executor.photo:
-        filepath = settings.local_media_path + settings.executors_profile_path + f"{executor.tg_id}.jpg"
-    else:
-        # берем дефолтную, если нет фотографии пользователя
-        filepath = settings.local_media_path + f"executor.jpg"
-    try:
-        profile_image = FSInputFile(filepath)
+    msg = executor_profile_to_show(executor)
+    keyboard = kb.favorites_executor_keyboard(executor, current_index, len(executors_ids))
+
+    # Получаем фото, при вытеснении из локального кэша оно скачивается из S3
+    filepath = await get_executor_photo_path(executor)
 
+    message: Message = prev_mess.message if isinstance(prev_mess, CallbackQuery) else prev_mess
+    try:
         # Для отправки первого сообщения в ленте
         if is_first:
-            if isinstance(prev_mess, CallbackQuery):
-                prev_mess = await prev_mess.message.answer_photo(
-                    photo=profile_image,
-                    caption=msg,
-                    reply_markup=keyboard.as_markup(),
-                    disable_web_page_preview=True
-                )
-            else:
-                prev_mess = await prev_mess.answer_photo(
-                    photo=profile_image,
-                    caption=msg,
-                    reply_markup=keyboard.as_markup(),
-                    disable_web_page_preview=True
-                )
-        # Для всех последующих
-        else:
-            prev_mess = await prev_mess.edit_caption(
-                photo=profile_image,
+            card = await answer_photo_cached(
+                message.answer_photo,
+                filepath,
+                session,
                 caption=msg,
                 reply_markup=keyboard.as_markup(),
                 disable_web_page_preview=True
             )
+        # Для всех последующих
+        else:
+            card = await message.edit_caption(
+                caption=msg,
+                reply_markup=keyboard.as_markup()
+            )
 
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(card))
 
     except Exception as e:
         logger.error(f"Ошибка при загрузке фото исполнителя {filepath} {executor.tg_id}: {e}")
         msg = f"Сервис временно недоступен, попробуйте позже или обратитесь " \
               f"к администратору @{settings.admin_tg_username}"
         keyboard = to_main_menu()
-        await prev_mess.answer(msg, reply_markup=keyboard.as_markup())
+        await message.answer(msg, reply_markup=keyboard.as_markup())
@@ -21,6 +21,7 @@ from routers.states.favorites import FavoriteOrders
 from schemas.client import Client
 from schemas.executor import Executor
 from schemas.order import Order
+from utils.messages import message_ref, delete_message
 
 
 router = Router()
@@ -57,11 +58,11 @@ async def favorites_orders(callback: CallbackQuery, session: Any, state: FSMCont
     # Начинаем state
     await state.set_state(FavoriteOrders.feed)
 
-    # Получаем избранных исполнителей у клиента
-    orders: list[Order] = await AsyncOrm.get_favorites_orders(executor.id, session)
+    # Получаем id избранных заказов у исполнителя
+    orders_ids: list[int] = await AsyncOrm.get_favorites_orders_ids(executor.id, session)
 
     # Если заказов пока нет
-    if not orders:
+    if not orders_ids:
         msg = "У тебя еще нет избранных заказов"
         keyboard = kb.back_keyboard()
         await wait_mess.edit_text(msg, reply_markup=keyboard.as_markup())
@@ -69,9 +70,9 @@ async def favorites_orders(callback: CallbackQuery, session: Any, state: FSMCont
 
     current_index = 0
 
-    # Записываем в стейт все заказы и текущий
+    # Записываем в стейт id всех заказов и текущий индекс
     await state.update_data(
-        orders=orders,
+        orders=orders_ids,
         current_index=current_index
     )
 
@@ -82,30 +83,29 @@ async def favorites_orders(callback: CallbackQuery, session: Any, state: FSMCont
         pass
 
     # Отправляем сообщение с профилем
-    await send_order_card(orders, current_index, callback, state, is_first=True)
+    await send_order_card(orders_ids, current_index, callback, state, session, is_first=True)
 
 
 # Для листания вправо, влево
 @router.callback_query(or_f(F.data == "prev", F.data == "next"), FavoriteOrders.feed)
-async def show_order(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_order(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Показывает следующий или предыдущий заказ"""
     data = await state.get_data()
     current_index = data["current_index"]
-    orders = data["orders"]
-    prev_mess = data["prev_mess"]
+    orders_ids: list[int] = data["orders"]
 
     # При нажатии влево
     if callback.data == "prev":
         # Меняем текущий индекс
         if current_index == 0:
-            current_index = len(orders) - 1
+            current_index = len(orders_ids) - 1
         else:
             current_index -= 1
 
     # При нажатии вправо
     elif callback.data == "next":
         # Меняем текущий индекс
-        if current_index == len(orders) - 1:
+        if current_index == len(orders_ids) - 1:
             current_index = 0
         else:
             current_index += 1
@@ -114,7 +114,7 @@ async def show_order(callback: CallbackQuery, state: FSMContext) -> None:
     await state.update_data(current_index=current_index)
     # Отправляем сообщение
     try:
-        await send_order_card(orders, current_index, prev_mess, state)
+        await send_order_card(orders_ids, current_index, callback, state, session)
     except:
         pass
 
@@ -123,11 +123,14 @@ async def show_order(callback: CallbackQuery, state: FSMContext) -> None:
 @router.callback_query(F.data.split("|")[0] == "write_fav_order", FavoriteOrders.feed)
 async def write_to_client_from_favorite(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Написать заказчику из избранного"""
-    data = await state.get_data()
     executor_tg_id = str(callback.from_user.id)
 
-    orders: list[Order] = data["orders"]
-    order: Order = orders[data["current_index"]]
+    order: Order = await AsyncOrm.get_order_by_id(int(callback.data.split("|")[1]), session)
+
+    # Заказ могли удалить во время просмотра ленты
+    if not order:
+        await callback.answer(f"{btn.INFO} Заказ больше недоступен", show_alert=True)
+        return
 
     # Проверяем есть ли уже такой отклик
     response_exists: bool = await AsyncOrm.check_order_response_already_exists(executor_tg_id, order.id, session)
@@ -144,26 +147,23 @@ async def write_to_client_from_favorite(callback: CallbackQuery, state: FSMConte
     await callback.answer()
 
     prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup(), disable_web_page_preview=True)
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess), current_order_id=order.id)
 
 
 @router.message(FavoriteOrders.contact)
-async def get_cover_letter(message: Message, state: FSMContext) -> None:
+async def get_cover_letter(message: Message, state: FSMContext, bot: Bot) -> None:
     """Получение сопроводительного письма от исполнителя"""
     data = await state.get_data()
 
     #  Удаляем предыдущее сообщение если было
-    try:
-        await data["prev_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                                reply_markup=kb.back_to_feed_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Меняем стейт на подтверждение отправки
@@ -192,20 +192,25 @@ async def send_cover_letter(callback: CallbackQuery, state: FSMContext, session:
     executor = await AsyncOrm.get_executor_by_tg_id(executor_tg_id, session)
 
     # Получаем заказ и сопроводительное письмо
-    orders: list[Order] = data["orders"]
-    order: Order = orders[data["current_index"]]
+    order: Order = await AsyncOrm.get_order_by_id(data["current_order_id"], session)
     cover_letter = data["cover_letter"]
 
     keyboard = kb.back_to_feed_keyboard()
 
     # Сохраняем отклик в БД
     try:
-        await AsyncOrm.create_order_response(cover_letter, order.id, executor.id, session)
+        created: bool = await AsyncOrm.create_order_response(cover_letter, order.id, executor.id, session)
     except:
         error_msg = f"{btn.INFO} Ошибка при отправке отклика, попробуй позже"
         await callback.message.edit_text(error_msg, reply_markup=keyboard.as_markup())
         return
 
+    # Отклик уже был (например, повторное нажатие кнопки), заказчику повторно не отправляем
+    if not created:
+        msg = f"{btn.INFO} Ты уже откликался на заказ <b>\"{order.title}\"</b>\n\nПосмотри другие заказы"
+        await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
+        return
+
     msg = f"{btn.SUCCESS} Твой отклик по заказу \"<i>{order.title}</i>\" отправлен заказчику!"
 
     # Отвечаем исполнителю
@@ -225,17 +230,14 @@ async def send_cover_letter(callback: CallbackQuery, state: FSMContext, session:
 
 # Удалить из избранного
 @router.callback_query(F.data.split("|")[0] == "delete_fav_order", FavoriteOrders.feed)
-async def delete_from_favorite(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def delete_from_favorite(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
     """Удаление заказа из списка избранных у исполнителя"""
     executor_tg_id = str(callback.from_user.id)
     order_id = int(callback.data.split("|")[1])
     data = await state.get_data()
 
     # Удаляем предыдущее сообщение
-    try:
-        await data["prev_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("prev_mess"))
 
     # Удаляем исполнителя из избранных в БД
     try:
@@ -246,29 +248,24 @@ async def delete_from_favorite(callback: CallbackQuery, state: FSMContext, sessi
 
     prev_mess = await callback.message.answer(f"{btn.SUCCESS} Заказ удален из избранных")
 
-    # Формируем данные для новой ленты исполнителей
-    orders = data["orders"]
+    # Удаляем из стейта id этого заказа
+    orders_ids: list[int] = [o_id for o_id in data["orders"] if o_id != order_id]
 
-    # Удаляем из стейта этого исполнителя
-    for order in orders:
-        if order.id == order_id:
-            orders.remove(order)
-
-    # Обновляем список исполнителей
+    # Обновляем список заказов
     current_index = 0  # обнуляем текущий индекс
     await state.update_data(
-        orders=orders,
+        orders=orders_ids,
         current_index=current_index
     )
 
     # Отправляем ленту
-    await send_order_card(orders, current_index, prev_mess, state, is_first=True)
+    await send_order_card(orders_ids, current_index, prev_mess, state, session, is_first=True)
 
 
 # Для отлавливания кнопок назад и отправки текущей ленты
 @router.callback_query(F.data == "back_to_fav_feed",
                        StateFilter(FavoriteOrders.feed, FavoriteOrders.contact, FavoriteOrders.send_confirm))
-async def back_to_current_feed(callback: CallbackQuery, state: FSMContext) -> None:
+async def back_to_current_feed(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Выводим текущий заказ в ленте"""
     current_state = await state.get_state()
 
@@ -277,18 +274,33 @@ async def back_to_current_feed(callback: CallbackQuery, state: FSMContext) -> No
 
     data = await state.get_data()
 
-    orders: list[Order] = data["orders"]
+    orders_ids: list[int] = data["orders"]
     current_index = data["current_index"]
 
-    await send_order_card(orders, current_index, callback, state)
+    await send_order_card(orders_ids, current_index, callback, state, session)
 
 
 # Универсальная отправка карточки заказа
-async def send_order_card(orders: list[Order], current_index: int, message: CallbackQuery | Message,
-                          state: FSMContext, is_first: bool = False) -> None:
-    """Отправка сообщения с карточкой заказа"""
-    # Если еще нет исполнителей или их удалили в ленте
-    if len(orders) == 0:
+async def send_order_card(orders_ids: list[int], current_index: int, message: CallbackQuery | Message,
+                          state: FSMContext, session: Any, is_first: bool = False) -> None:
+    """
+        Отправка сообщения с карточкой заказа.
+        Текущий заказ загружается по id из списка в стейте
+    """
+    # Удаленные и закрытые заказы убираются из ленты одним запросом, ошибки БД пробрасываются
+    available = set(await AsyncOrm.get_active_orders_ids(orders_ids, session)) if orders_ids else set()
+    if len(available) != len(orders_ids):
+        current_index = sum(order_id in available for order_id in orders_ids[:current_index])
+        orders_ids = [order_id for order_id in orders_ids if order_id in available]
+        current_index = min(current_index, max(len(orders_ids) - 1, 0))
+        await state.update_data(orders=orders_ids, current_index=current_index)
+
+    order: Order | None = None
+    if orders_ids:
+        order = await AsyncOrm.get_order_by_id(orders_ids[current_index], session)
+
+    # Если еще нет заказов или их удалили в ленте
+    if not order:
         # Если заказ был 1 и его удалили
         msg = "У тебя еще нет избранных заказов"
         keyboard = kb.back_keyboard()
@@ -303,12 +315,9 @@ async def send_order_card(orders: list[Order], current_index: int, message: Call
             await message.message.edit_text(msg, reply_markup=keyboard.as_markup())
         return
 
-    # Получаем отображаемый заказ
-    order = orders[current_index]
-
     # Формируем сообщение
     msg = order_card_to_show(order)
-    keyboard = kb.favorites_orders_keyboard(orders, current_index)
+    keyboard = kb.favorites_orders_keyboard(order, current_index, len(orders_ids))
 
     # Отправляем карточки заказа
     if is_first:
@@ -327,11 +336,11 @@ async def send_order_card(orders: list[Order], current_index: int, message: Call
             else:
                 prev_mess = await message.message.edit_text(msg, reply_markup=keyboard.as_markup())
 
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "files_for_order")
-async def download_files(callback: CallbackQuery, state: FSMContext) -> None:
+async def download_files(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Отправка пользователю файлов заказа"""
     # Удаляем предыдущее сообщение
     try:
@@ -342,19 +351,17 @@ async def download_files(callback: CallbackQuery, state: FSMContext) -> None:
 
     data = await state.get_data()
 
-    orders = data["orders"]
+    orders_ids: list[int] = data["orders"]
     current_index = data["current_index"]
 
     # Получаем заказ
-    order = orders[current_index]
+    order: Order = await AsyncOrm.get_order_by_id(int(callback.data.split("|")[1]), session)
 
     # Отправляем файлы
-    files = [InputMediaDocument(media=file.file_id) for file in order.files]
     try:
+        files = [InputMediaDocument(media=file.file_id) for file in order.files]
         await callback.message.answer_media_group(media=files)
     except Exception:
         await callback.message.answer(f"{btn.INFO} Ошибка при отправке файлов. Повторите запрос позже")
     finally:
-        await send_order_card(orders, current_index, callback, state, is_first=False)
-
-
+        await send_order_card(orders_ids, current_index, callback, state, session, is_first=False)
@@ -1,15 +1,17 @@
+import secrets
 from typing import Any
 
 from aiogram import Router, F, Bot
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message, FSInputFile, InputFile, ReplyKeyboardRemove
+from aiogram.types import CallbackQuery, Message, InputFile, ReplyKeyboardRemove
 
 from middlewares.registered import RegisteredMiddleware
 from middlewares.database import DatabaseMiddleware
 from middlewares.private import CheckPrivateMessageMiddleware
 
 from database.orm import AsyncOrm
+from database.views_buffer import executor_views_buffer
 
 from routers.keyboards import find_executor as kb
 from routers.keyboards.client_reg import to_main_menu
@@ -21,7 +23,11 @@ from routers.buttons import buttons as btn
 from schemas.client import Client
 from schemas.profession import Profession, Job
 from schemas.executor import Executor
-from utils.shuffle import shuffle_executors
+from schemas.user import UserContext
+
+from utils.messages import message_ref, delete_message
+from utils.media_cache import get_executor_photo_path
+from utils.telegram_media import answer_photo_cached
 
 from settings import settings
 from logger import logger
@@ -70,7 +76,7 @@ async def select_jobs_in_profession(callback: CallbackQuery, session: Any, state
 
     # Записываем необходимые данные
     selected = []
-    await state.update_data(jobs=jobs, selected=selected)
+    await state.update_data(profession_id=profession_id, selected=selected)
 
     msg = "Выбери категории (до 3 вариантов)"
     keyboard = kb.jobs_keyboard(jobs, selected)
@@ -80,10 +86,10 @@ async def select_jobs_in_profession(callback: CallbackQuery, session: Any, state
 
 
 @router.callback_query(F.data.split("|")[0] == "find_ex_job", SelectJobs.jobs)
-async def pick_jobs(callback: CallbackQuery, state: FSMContext) -> None:
+async def pick_jobs(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Мультиселект выбора jobs"""
     data = await state.get_data()
-    jobs: list[Job] = data["jobs"]
+    jobs: list[Job] = await AsyncOrm.get_jobs_by_profession(data["profession_id"], session)
     selected = data["selected"]
 
     # Получаем jobs (которую выбрали)
@@ -102,32 +108,34 @@ async def pick_jobs(callback: CallbackQuery, state: FSMContext) -> None:
     keyboard = kb.jobs_keyboard(jobs, selected)
 
     await callback.answer()
-    prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
+    await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
 
     # Обновляем данные с выбранными jobs
     await state.update_data(selected=selected)
-    await state.update_data(prev_mess=prev_mess)
 
 
 @router.callback_query(F.data == "find_ex_show|show_executors", SelectJobs.jobs)
 @router.callback_query(F.data == "find_ex_show|show_executors", ExecutorsFeed.show)     # Для повторного показа
-async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: Any,
+                          user_context: UserContext) -> None:
     """Завершение мультиселекта и подбор подходящих исполнителей"""
     # Отправляем сообщение об ожидании
     wait_mess = await callback.message.edit_text(btn.WAIT_MSG)
 
-    client_tg_id: str = str(callback.from_user.id)
+    client_id: int = user_context.client_id
 
     # Получаем все данные
     data = await state.get_data()
     jobs_ids: list[int] = data["selected"]
 
-    # Получаем список подходящих исполнителей
-    executors: list[Executor] = await AsyncOrm.get_executors_by_jobs(jobs_ids, session)
-    is_last: bool = len(executors) == 1
+    # Seed случайного порядка ленты на время просмотра
+    seed: str = secrets.token_hex(8)
+
+    # Получаем первого подходящего исполнителя
+    executor, is_last = await get_next_executor(jobs_ids, seed, None, session)
 
     # Если исполнителей нет
-    if not executors:
+    if not executor:
         # Очищаем стейт
         await state.clear()
 
@@ -147,35 +155,23 @@ async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: A
     # Меняем стейт
     await state.set_state(ExecutorsFeed.show)
 
-    # Сортируем список в случайный порядок
-    shuffled_executors: list[Executor] = shuffle_executors(executors)
-
-    # Получаем первого исполнителя
-    executor = shuffled_executors.pop()
-
-    # Остальных исполнителей сохраняем в память
-    await state.update_data(executors=shuffled_executors)
-    # Записываем текущего исполнителя
-    await state.update_data(current_ex=executor)
+    # Сохраняем seed и курсор ленты, курсор - id текущего исполнителя
+    await state.update_data(feed_seed=seed, feed_cursor=executor.id, feed_is_last=is_last)
 
     # Проверяем есть ли исполнитель уже в избранном
-    already_in_fav: bool = await check_is_executor_in_favorites(client_tg_id, executor.id, session)
+    already_in_fav: bool = await check_is_executor_in_favorites(client_id, executor.id, session)
 
     # Выводим первого исполнителя
     msg = executor_profile_to_show(executor, already_in_fav)
     keyboard = kb.executor_show_keyboard(is_last)
 
-    # Получаем фото
-    if executor.photo:
-        filepath = settings.local_media_path + settings.executors_profile_path + f"{executor.tg_id}.jpg"
-    else:
-        # берем дефолтную, если нет фотографии пользователя
-        filepath = settings.local_media_path + f"executor.jpg"
+    # Получаем фото, при вытеснении из локального кэша оно скачивается из S3
+    filepath = await get_executor_photo_path(executor)
     try:
-        profile_image = FSInputFile(filepath)
-
-        await callback.message.answer_photo(
-            photo=profile_image,
+        await answer_photo_cached(
+            callback.message.answer_photo,
+            filepath,
+            session,
             caption=msg,
             reply_markup=keyboard,
             disable_web_page_preview=True
@@ -191,27 +187,20 @@ async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: A
 
 # ПРОПУСТИТЬ
 @router.message(F.text == f"{btn.SKIP}", ExecutorsFeed.show)
-async def executors_feed(message: Message, state: FSMContext, session: Any) -> None:
+async def executors_feed(message: Message, state: FSMContext, session: Any, bot: Bot,
+                         user_context: UserContext) -> None:
     """Лента исполнителей при нажатии кнопки пропуск"""
     data = await state.get_data()
-    client_tg_id = str(message.from_user.id)
+    client_id: int = user_context.client_id
 
     # Удаляем функциональные сообщения
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
-    # Получаем исполнителей из памяти
-    executors = data["executors"]
-    is_last: bool = len(executors) == 1
-
-    # Берем крайнего
-    try:
-        executor = executors.pop()
+    # Получаем следующего исполнителя после курсора
+    executor, is_last = await get_next_executor(data["selected"], data["feed_seed"], data["feed_cursor"], session)
 
     # Если больше нет исполнителей
-    except IndexError:
+    if not executor:
         # Очищаем стейт
         # await state.clear()
 
@@ -224,27 +213,21 @@ async def executors_feed(message: Message, state: FSMContext, session: Any) -> N
         return
 
     # Проверяем есть ли исполнитель уже в избранном
-    already_in_fav: bool = await check_is_executor_in_favorites(client_tg_id, executor.id, session)
+    already_in_fav: bool = await check_is_executor_in_favorites(client_id, executor.id, session)
 
-    # Записываем оставшихся исполнителей обратно
-    await state.update_data(executors=executors)
-    # Записываем текущего исполнителя
-    await state.update_data(current_ex=executor)
+    # Сдвигаем курсор ленты на текущего исполнителя
+    await state.update_data(feed_cursor=executor.id, feed_is_last=is_last)
 
     msg = executor_profile_to_show(executor, already_in_fav)
     keyboard = kb.executor_show_keyboard(is_last)
 
-    # Получаем фото
-    if executor.photo:
-        filepath = settings.local_media_path + settings.executors_profile_path + f"{executor.tg_id}.jpg"
-    else:
-        # берем дефолтную, если нет фотографии пользователя
-        filepath = settings.local_media_path + f"executor.jpg"
+    # Получаем фото, при вытеснении из локального кэша оно скачивается из S3
+    filepath = await get_executor_photo_path(executor)
     try:
-        profile_image = FSInputFile(filepath)
-
-        await message.answer_photo(
-            photo=profile_image,
+        await answer_photo_cached(
+            message.answer_photo,
+            filepath,
+            session,
             caption=msg,
             reply_markup=keyboard,
             disable_web_page_preview=True
@@ -259,56 +242,45 @@ async def executors_feed(message: Message, state: FSMContext, session: Any) -> N
 
 # ДОБАВИТЬ В ИЗБРАННОЕ
 @router.message(F.text == f"{btn.TO_FAV}", ExecutorsFeed.show)
-async def add_executor_to_favorites(message: Message, state: FSMContext, session: Any) -> None:
+async def add_executor_to_favorites(message: Message, state: FSMContext, session: Any, bot: Bot,
+                                    user_context: UserContext) -> None:
     """Лента исполнителей при нажатии кнопки избранное"""
     data = await state.get_data()
-    client_tg_id = str(message.from_user.id)
+    client_id: int = user_context.client_id
 
     # Удаляем функциональные сообщения
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
-
-    # Получаем id клинета
-    client_id: int = await AsyncOrm.get_client_id(client_tg_id, session)
+    await delete_message(bot, data.get("functional_mess"))
 
     # Получаем текущего исполнителя
-    executor: Executor = data["current_ex"]
-    # Получаем всех исполнителей
-    executors: list[Executor] = data["executors"]
-
-    # Проверяем есть ли он уже в исполнителях
-    already_in_fav: bool = await check_is_executor_in_favorites(client_tg_id, executor.id, session)
-    if already_in_fav:
-        await message.answer(f"{btn.INFO} Этот исполнитель уже есть у тебя в списке избранных")
-        # return
+    executor: Executor = await AsyncOrm.get_executor_by_id(data["feed_cursor"], session)
+    # Исполнитель мог удалить профиль во время просмотра ленты
+    if not executor:
+        await message.answer(f"{btn.INFO} Профиль исполнителя больше недоступен, посмотри других исполнителей")
+        return
 
-    else:
-        # Сохраняем исполнителя в избранное у клиента
-        try:
-            await AsyncOrm.add_executor_to_favorite(client_id, executor.id, session)
-        except:
-            await message.answer(f"Ошибка при добавлении исполнителя в избранное, попробуй позже")
-            return
+    # Сохраняем исполнителя в избранное у клиента, если его там еще нет
+    try:
+        added: bool = await AsyncOrm.add_executor_to_favorite(client_id, executor.id, session)
+    except:
+        await message.answer(f"Ошибка при добавлении исполнителя в избранное, попробуй позже")
+        return
 
+    if added:
         await message.answer("Исполнитель сохранен в ⭐ избранное")
+    else:
+        await message.answer(f"{btn.INFO} Этот исполнитель уже есть у тебя в списке избранных")
 
-    is_last: bool = len(executors) == 1
+    is_last: bool = data["feed_is_last"]
     msg = executor_profile_to_show(executor, in_favorites=True)
     keyboard = kb.executor_show_keyboard(is_last)
 
-    # Получаем фото
-    if executor.photo:
-        filepath = settings.local_media_path + settings.executors_profile_path + f"{executor.tg_id}.jpg"
-    else:
-        # берем дефолтную, если нет фотографии пользователя
-        filepath = settings.local_media_path + f"executor.jpg"
+    # Получаем фото, при вытеснении из локального кэша оно скачивается из S3
+    filepath = await get_executor_photo_path(executor)
     try:
-        profile_image = FSInputFile(filepath)
-
-        await message.answer_photo(
-            photo=profile_image,
+        await answer_photo_cached(
+            message.answer_photo,
+            filepath,
+            session,
             caption=msg,
             reply_markup=keyboard,
             disable_web_page_preview=True
@@ -323,69 +295,65 @@ async def add_executor_to_favorites(message: Message, state: FSMContext, session
 
 # НАПИСАТЬ ИСПОЛНИТЕЛЮ
 @router.message(F.text == f"{btn.WRITE}", ExecutorsFeed.show)
-async def connect_with_executor(message: Message, state: FSMContext, session: Any) -> None:
+async def connect_with_executor(message: Message, state: FSMContext, session: Any, bot: Bot,
+                                user_context: UserContext) -> None:
     """Связаться с исполнителем"""
     data = await state.get_data()
-    client_tg_id = str(message.from_user.id)
+    client_id: int = user_context.client_id
 
     # Удаляем функциональные сообщения
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
     # Получаем текущего исполнителя
-    executor: Executor = data["current_ex"]
+    executor: Executor = await AsyncOrm.get_executor_by_id(data["feed_cursor"], session)
+    # Исполнитель мог удалить профиль во время просмотра ленты
+    if not executor:
+        await message.answer(f"{btn.INFO} Профиль исполнителя больше недоступен, посмотри других исполнителей")
+        return
     # Получаем username исполнителя для формирования ссылки
     username: str = await AsyncOrm.get_username(executor.tg_id, session)
-    # Получаем id клиента по tg_id
-    client_id: int = await AsyncOrm.get_client_id(client_tg_id, session)
 
     msg = ms.contact_with_executor(executor, username)
     keyboard = kb.contact_with_executor()
 
     functional_mess = await message.answer(msg, reply_markup=keyboard.as_markup(), disable_web_page_preview=True)
-    await state.update_data(functional_mess=functional_mess)
+    await state.update_data(functional_mess=message_ref(functional_mess))
 
-    # Сохраняем запись о просмотре контактов исполнителя
-    await AsyncOrm.create_executor_view(executor.id, client_id, session)
+    # Сохраняем запись о просмотре контактов исполнителя (запись в БД в фоне)
+    await executor_views_buffer.add(executor.id, client_id)
 
 
 # ОТМЕНА И ВОЗВРАЩЕНИЕ ИЗ РАЗНЫХ ТОЧЕК В ЛЕНТУ ИСПОЛНИТЕЛЕЙ
 @router.callback_query(F.data == "cancel_executors_feed", StateFilter("*"))
-async def back_to_executor_feed(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def back_to_executor_feed(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot,
+                                user_context: UserContext) -> None:
     """Для отмены различных callback"""
     data = await state.get_data()
-    client_tg_id: str = str(callback.from_user.id)
+    client_id: int = user_context.client_id
 
     # Удаляем предыдущее сообщение
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
     # Получаем текущего исполнителя
-    executor: Executor = data["current_ex"]
+    executor: Executor = await AsyncOrm.get_executor_by_id(data["feed_cursor"], session)
+    # Исполнитель мог удалить профиль во время просмотра ленты
+    if not executor:
+        await callback.message.answer(f"{btn.INFO} Профиль исполнителя больше недоступен, посмотри других исполнителей")
+        return
 
-    # Получаем исполнителей из памяти
-    executors: list[Executor] = data["executors"]
-    is_last: bool = len(executors) == 1
+    is_last: bool = data["feed_is_last"]
 
-    already_in_fav = await check_is_executor_in_favorites(client_tg_id, executor.id, session)
+    already_in_fav = await check_is_executor_in_favorites(client_id, executor.id, session)
     msg = executor_profile_to_show(executor, already_in_fav)
     keyboard = kb.executor_show_keyboard(is_last)
 
-    # Получаем фото
-    if executor.photo:
-        filepath = settings.local_media_path + settings.executors_profile_path + f"{executor.tg_id}.jpg"
-    else:
-        # берем дефолтную, если нет фотографии пользователя
-        filepath = settings.local_media_path + f"executor.jpg"
+    # Получаем фото, при вытеснении из локального кэша оно скачивается из S3
+    filepath = await get_executor_photo_path(executor)
     try:
-        profile_image = FSInputFile(filepath)
-
-        await callback.message.answer_photo(
-            photo=profile_image,
+        await answer_photo_cached(
+            callback.message.answer_photo,
+            filepath,
+            session,
             caption=msg,
             reply_markup=keyboard,
             disable_web_page_preview=True
@@ -398,9 +366,20 @@ async def back_to_executor_feed(callback: CallbackQuery, state: FSMContext, sess
         await callback.message.answer(msg, reply_markup=keyboard.as_markup())
 
 
-async def check_is_executor_in_favorites(client_tg_id: str, executor_id: int, session: Any) -> bool:
+async def get_next_executor(jobs_ids: list[int], seed: str, cursor: int | None,
+                            session: Any) -> tuple[Executor | None, bool]:
+    """Следующий исполнитель ленты после cursor и флаг, что он последний"""
+    # Берем на одного больше, чтобы узнать есть ли исполнители дальше
+    executors: list[Executor] = await AsyncOrm.get_executors_feed_page(jobs_ids, seed, cursor, 2, session) or []
+
+    if not executors:
+        return None, True
+
+    return executors[0], len(executors) == 1
+
+
+async def check_is_executor_in_favorites(client_id: int, executor_id: int, session: Any) -> bool:
     """Возвращает true если исполнитель в избранному, иначе false"""
-    client_id: int = await AsyncOrm.get_client_id(client_tg_id, session)
     ex_in_favorites: bool = await AsyncOrm.executor_in_favorites(client_id, executor_id, session)
     return ex_in_favorites
 
@@ -22,6 +22,8 @@ from routers.buttons import buttons as btn
 from schemas.executor import Executor
 from schemas.order import Order
 from schemas.profession import Profession, Job
+from schemas.user import UserContext
+from utils.messages import message_ref, delete_message, remove_reply_markup
 from utils.shuffle import shuffle_orders
 
 from logger import logger
@@ -39,7 +41,7 @@ router.callback_query.middleware.register(CheckPrivateMessageMiddleware())
 
 
 @router.callback_query(F.data == "main_menu|find_order")
-async def select_profession(callback: CallbackQuery, session: Any, state: FSMContext):
+async def select_profession(callback: CallbackQuery, session: Any, state: FSMContext, user_context: UserContext):
     """Выбор профессии для дальнейшего подбора заказа"""
     # Чистим стейт в случае нажатия кнопки назад
     try:
@@ -48,8 +50,7 @@ async def select_profession(callback: CallbackQuery, session: Any, state: FSMCon
         pass
 
     # Проверям верификацию исполнителя
-    tg_id = str(callback.from_user.id)
-    verified: bool = await check_verified_executor(tg_id, session)
+    verified: bool = await check_verified_executor(user_context)
 
     # Если пользователь не верифицирован
     if not verified:
@@ -83,7 +84,7 @@ async def select_jobs_in_profession(callback: CallbackQuery, session: Any, state
 
     # Записываем необходимые данные
     selected = []
-    await state.update_data(jobs=jobs, selected=selected)
+    await state.update_data(profession_id=profession_id, selected=selected)
 
     msg = f"Выбери категории для поиска"
     keyboard = kb.jobs_keyboard(jobs, selected)
@@ -93,10 +94,10 @@ async def select_jobs_in_profession(callback: CallbackQuery, session: Any, state
 
 
 @router.callback_query(F.data.split("|")[0] == "find_cl_job", SelectJobs.jobs)
-async def pick_jobs(callback: CallbackQuery, state: FSMContext) -> None:
+async def pick_jobs(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
     """Мультиселект выбора jobs"""
     data = await state.get_data()
-    jobs: list[Job] = data["jobs"]
+    jobs: list[Job] = await AsyncOrm.get_jobs_by_profession(data["profession_id"], session)
     selected = data["selected"]
 
     # Получаем jobs (которую выбрали)
@@ -111,11 +112,10 @@ async def pick_jobs(callback: CallbackQuery, state: FSMContext) -> None:
     keyboard = kb.jobs_keyboard(jobs, selected)
 
     await callback.answer()
-    prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
+    await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
 
     # Обновляем данные с выбранными jobs
     await state.update_data(selected=selected)
-    await state.update_data(prev_mess=prev_mess)
 
 
 @router.callback_query(F.data == "find_cl_show|show_orders", SelectJobs.jobs)
@@ -133,12 +133,14 @@ async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: A
     data = await state.get_data()
     jobs_ids: list[int] = data["selected"]
 
-    # Получаем список подходящих заказов
-    orders: list[Order] = await AsyncOrm.get_orders_by_jobs(jobs_ids, session)
-    is_last: bool = len(orders) == 1
+    # Получаем id подходящих заказов в случайном порядке
+    orders_ids: list[int] = shuffle_orders(await AsyncOrm.get_orders_ids_by_jobs(jobs_ids, session) or [])
+
+    # Получаем первый заказ
+    order, is_last = await get_next_order(orders_ids, session)
 
     # Если заказов нет
-    if not orders:
+    if not order:
         # Очищаем стейт
         await state.clear()
 
@@ -157,16 +159,10 @@ async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: A
     # Меняем стейт
     await state.set_state(OrdersFeed.show)
 
-    # Сортируем список в случайный порядок
-    shuffled_orders: list[orders] = shuffle_orders(orders)
-
-    # Получаем первый заказ
-    order = shuffled_orders.pop()
-
-    # Остальные заказы сохраняем в память
-    await state.update_data(orders=shuffled_orders)
-    # Записываем текущий заказ
-    await state.update_data(current_or=order)
+    # Id остальных заказов сохраняем в память
+    await state.update_data(orders=orders_ids, feed_is_last=is_last)
+    # Записываем id текущего заказа
+    await state.update_data(current_order_id=order.id)
 
     # Проверяем есть ли у исполнителя этот заказ в избранном
     already_in_fav: bool = await check_is_order_in_favorites(executor_tg_id, order.id, session)
@@ -189,27 +185,22 @@ async def end_multiselect(callback: CallbackQuery, state: FSMContext, session: A
 
 # ПРОПУСТИТЬ
 @router.message(F.text == f"{btn.SKIP}", OrdersFeed.show)
-async def orders_feed(message: Message, state: FSMContext, session: Any) -> None:
+async def orders_feed(message: Message, state: FSMContext, session: Any, bot: Bot) -> None:
     """Лента заказов при нажатии кнопки пропуск"""
     data = await state.get_data()
     executor_tg_id = str(message.from_user.id)
 
     # Удаляем функциональные сообщения
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
-    # Получаем заказы из памяти
-    orders = data["orders"]
-    is_last: bool = len(orders) == 1
+    # Получаем id заказов из памяти
+    orders_ids: list[int] = data["orders"]
 
     # Берем крайний
-    try:
-        order = orders.pop()
+    order, is_last = await get_next_order(orders_ids, session)
 
     # Если больше нет заказов
-    except IndexError:
+    if not order:
         # Очищаем стейт
         # await state.clear()
 
@@ -224,10 +215,10 @@ async def orders_feed(message: Message, state: FSMContext, session: Any) -> None
     # Проверяем есть ли исполнитель уже в избранном
     already_in_fav: bool = await check_is_order_in_favorites(executor_tg_id, order.id, session)
 
-    # Записываем оставшихся исполнителей обратно
-    await state.update_data(orders=orders)
-    # Записываем текущего исполнителя
-    await state.update_data(current_or=order)
+    # Записываем id оставшихся заказов обратно
+    await state.update_data(orders=orders_ids, feed_is_last=is_last)
+    # Записываем id текущего заказа
+    await state.update_data(current_order_id=order.id)
 
     msg = order_card_to_show(order, already_in_fav)
     keyboard = kb.order_show_keyboard(is_last)
@@ -246,42 +237,35 @@ async def orders_feed(message: Message, state: FSMContext, session: Any) -> None
 
 # ДОБАВИТЬ В ИЗБРАННОЕ
 @router.message(F.text == f"{btn.TO_FAV}", OrdersFeed.show)
-async def add_order_to_favorites(message: Message, state: FSMContext, session: Any) -> None:
+async def add_order_to_favorites(message: Message, state: FSMContext, session: Any, bot: Bot,
+                                 user_context: UserContext) -> None:
     """Лента заказов при нажатии кнопки избранное"""
     data = await state.get_data()
-    executor_tg_id = str(message.from_user.id)
 
     # Удаляем функциональные сообщения
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
     # Получаем id исполнителя
-    executor_id: int = await AsyncOrm.get_executor_id(executor_tg_id, session)
+    executor_id: int = user_context.executor_id
 
     # Получаем текущий заказ
-    order: Order = data["current_or"]
-    # Получаем все заказы
-    orders: list[Order] = data["orders"]
-
-    # Проверяем есть ли он уже в исполнителях
-    already_in_fav: bool = await check_is_order_in_favorites(executor_tg_id, order.id, session)
-    if already_in_fav:
-        await message.answer(f"{btn.INFO} Этот заказ уже есть у тебя в списке избранных")
-        # return
+    order: Order = await get_current_order(data, message, session)
+    if not order:
+        return
 
-    else:
-        # Сохраняем заказ в избранное у исполнителя
-        try:
-            await AsyncOrm.add_order_to_favorites(executor_id, order.id, session)
-        except:
-            await message.answer(f"Ошибка при добавлении заказа в избранное, попробуйте позже")
-            return
+    # Сохраняем заказ в избранное у исполнителя, если его там еще нет
+    try:
+        added: bool = await AsyncOrm.add_order_to_favorites(executor_id, order.id, session)
+    except:
+        await message.answer(f"Ошибка при добавлении заказа в избранное, попробуйте позже")
+        return
 
+    if added:
         await message.answer("Заказ сохранен в ⭐ избранное")
+    else:
+        await message.answer(f"{btn.INFO} Этот заказ уже есть у тебя в списке избранных")
 
-    is_last: bool = len(orders) == 1
+    is_last: bool = data["feed_is_last"]
     msg = order_card_to_show(order, in_favorites=True)
     keyboard = kb.order_show_keyboard(is_last)
 
@@ -299,19 +283,18 @@ async def add_order_to_favorites(message: Message, state: FSMContext, session: A
 
 # НАПИСАТЬ ЗАКАЗЧИКУ
 @router.message(F.text == f"{btn.RESPOND}", OrdersFeed.show)
-async def connect_with_client(message: Message, state: FSMContext, session: Any) -> None:
+async def connect_with_client(message: Message, state: FSMContext, session: Any, bot: Bot) -> None:
     """Связаться с заказчиком"""
     data = await state.get_data()
     executor_tg_id = str(message.from_user.id)
 
     # Удаляем функциональные сообщения
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
     # Получаем текущий заказ
-    order: Order = data["current_or"]
+    order: Order = await get_current_order(data, message, session)
+    if not order:
+        return
 
     # Проверяем есть ли уже такой отклик
     response_exists: bool = await AsyncOrm.check_order_response_already_exists(executor_tg_id, order.id, session)
@@ -328,26 +311,23 @@ async def connect_with_client(message: Message, state: FSMContext, session: Any)
     keyboard = kb.back_to_orders_feed()
 
     functional_mess = await message.answer(msg, reply_markup=keyboard.as_markup(), disable_web_page_preview=True)
-    await state.update_data(functional_mess=functional_mess)
+    await state.update_data(functional_mess=message_ref(functional_mess))
 
 
 @router.message(OrdersFeed.contact)
-async def get_cover_letter(message: Message, state: FSMContext) -> None:
+async def get_cover_letter(message: Message, state: FSMContext, bot: Bot) -> None:
     """Получение сопроводительного письма от исполнителя"""
     data = await state.get_data()
 
-    #  Меняем предыдущее сообщение
-    try:
-        await data["functional_mess"].edit_text(data["functional_mess"].text)
-    except:
-        pass
+    #  Убираем клавиатуру у предыдущего сообщения
+    await remove_reply_markup(bot, data.get("functional_mess"))
 
     # Если отправлен не текст
     if not message.text:
         functional_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.back_to_orders_feed().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(functional_mess=functional_mess)
+        await state.update_data(functional_mess=message_ref(functional_mess))
         return
 
     # Игнорируем текст от кнопок
@@ -355,7 +335,7 @@ async def get_cover_letter(message: Message, state: FSMContext) -> None:
         functional_mess = await message.answer("Напиши другой текст",
                                          reply_markup=kb.back_to_orders_feed().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(functional_mess=functional_mess)
+        await state.update_data(functional_mess=message_ref(functional_mess))
         return
 
     # Меняем стейт на подтверждение отправки
@@ -367,7 +347,7 @@ async def get_cover_letter(message: Message, state: FSMContext) -> None:
     keyboard = kb.confirm_send_cover_letter()
 
     functional_mess = await message.answer(msg, reply_markup=keyboard.as_markup())
-    await state.update_data(functional_mess=functional_mess)
+    await state.update_data(functional_mess=message_ref(functional_mess))
 
     # Сохраняем текст сопроводительного письма в память
     await state.update_data(cover_letter=cover_letter)
@@ -386,25 +366,34 @@ async def send_cover_letter(callback: CallbackQuery, state: FSMContext, session:
     executor: Executor = await AsyncOrm.get_executor_by_tg_id(executor_tg_id, session)
 
     # Получаем заказ
-    order: Order = data["current_or"]
+    order: Order = await get_current_order(data, callback.message, session)
+    if not order:
+        return
     cover_letter = data["cover_letter"]
 
     keyboard = kb.back_to_orders_feed_from_contact()
 
     # Сохраняем отклик в БД
     try:
-        await AsyncOrm.create_order_response(cover_letter, order.id, executor.id, session)
+        created: bool = await AsyncOrm.create_order_response(cover_letter, order.id, executor.id, session)
     except:
         error_msg = f"{btn.INFO} Ошибка при отправке отклика, попробуй позже"
         await callback.message.edit_text(error_msg, reply_markup=keyboard.as_markup())
         return
 
+    # Отклик уже был (например, повторное нажатие кнопки), заказчику повторно не отправляем
+    if not created:
+        msg = f"{btn.INFO} Ты уже откликался на заказ <b>\"{order.title}\"</b>\n\nПосмотри другие заказы"
+        functional_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
+        await state.update_data(functional_mess=message_ref(functional_mess))
+        return
+
     # Отвечаем исполнителю
     msg = f"{btn.SUCCESS} Твой отклик по заказу \"<i>{order.title}</i>\" отправлен заказчику!"
     keyboard = kb.back_to_orders_feed_from_contact()
 
     functional_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
-    await state.update_data(functional_mess=functional_mess)
+    await state.update_data(functional_mess=message_ref(functional_mess))
 
     # Отправляем сообщение клиенту
     msg_to_client = ms.response_on_order_message(cover_letter, order, ex_tg_username, executor.name)
@@ -423,7 +412,7 @@ async def send_cover_letter(callback: CallbackQuery, state: FSMContext, session:
 # ВОЗВРАЩЕНИЕ ИЗ РАЗНЫХ ТОЧЕК В ЛЕНТУ ЗАКАЗОВ
 @router.callback_query(StateFilter(OrdersFeed.show, OrdersFeed.contact, OrdersFeed.confirm_send),
                        F.data == "back_to_orders_feed")
-async def back_to_orders_feed(callback: CallbackQuery, state: FSMContext, session: Any) -> None:
+async def back_to_orders_feed(callback: CallbackQuery, state: FSMContext, session: Any, bot: Bot) -> None:
     """Для возвращения в ленту из ответвлений"""
     data = await state.get_data()
     executor_tg_id: str = str(callback.from_user.id)
@@ -434,17 +423,14 @@ async def back_to_orders_feed(callback: CallbackQuery, state: FSMContext, sessio
     await state.set_state(OrdersFeed.show)
 
     # Удаляем предыдущее сообщение
-    try:
-        await data["functional_mess"].delete()
-    except:
-        pass
+    await delete_message(bot, data.get("functional_mess"))
 
-    # Получаем текущего исполнителя
-    order: Order = data["current_or"]
+    # Получаем текущий заказ
+    order: Order = await get_current_order(data, callback.message, session)
+    if not order:
+        return
 
-    # Получаем исполнителей из памяти
-    orders: list[Order] = data["orders"]
-    is_last: bool = len(orders) == 1
+    is_last: bool = data["feed_is_last"]
     already_in_fav = await check_is_order_in_favorites(executor_tg_id, order.id, session)
 
     msg = order_card_to_show(order, already_in_fav)
@@ -465,3 +451,32 @@ async def check_is_order_in_favorites(executor_tg_id: str, order_id: int, sessio
     """Возвращает true если заказ есть в избранных исполнителя, иначе false"""
     already_in_fav: bool = await AsyncOrm.is_order_already_in_favorites(executor_tg_id, order_id, session)
     return already_in_fav
+
+
+async def get_next_order(orders_ids: list[int], session: Any) -> tuple[Order | None, bool]:
+    """
+        Берет из списка id следующий доступный заказ и признак последнего заказа.
+        Удаленные и закрытые id убираются из списка одним запросом, ошибки БД пробрасываются,
+        чтобы не опустошить ленту
+    """
+    active = set(await AsyncOrm.get_active_orders_ids(orders_ids, session)) if orders_ids else set()
+    orders_ids[:] = [order_id for order_id in orders_ids if order_id in active]
+
+    while orders_ids:
+        # Заказ могли удалить или закрыть после проверки
+        order: Order | None = await AsyncOrm.get_order_by_id(orders_ids.pop(), session)
+        if order and order.is_active:
+            return order, not orders_ids
+
+    return None, True
+
+
+async def get_current_order(data: dict[str, Any], message: Message, session: Any) -> Order | None:
+    """Текущий заказ ленты по id из памяти"""
+    order: Order | None = await AsyncOrm.get_order_by_id(data["current_order_id"], session)
+
+    # Заказ могли удалить во время просмотра ленты
+    if not order:
+        await message.answer(f"{btn.INFO} Заказ больше недоступен, посмотри другие заказы")
+
+    return order
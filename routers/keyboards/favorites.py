@@ -8,15 +8,10 @@ from schemas.order import Order
 from settings import settings
 
 
-def favorites_executor_keyboard(executors: list[Executor], current_index: int) -> InlineKeyboardBuilder:
+def favorites_executor_keyboard(executor: Executor, current_index: int, executors_count: int) -> InlineKeyboardBuilder:
     """Клавиатура для вывода избранных исполнителей"""
     keyboard = InlineKeyboardBuilder()
 
-    # Получаем текущего исполнителя
-    executor = executors[current_index]
-
-    executors_count = len(executors)
-
     # Защита от ошибки с изменением на то же самое сообщение
     if executors_count == 1:
         keyboard.row(InlineKeyboardButton(text="<", callback_data="None"))
@@ -24,7 +19,7 @@ def favorites_executor_keyboard(executors: list[Executor], current_index: int) -
         keyboard.row(InlineKeyboardButton(text="<", callback_data="prev_ex"))
 
     keyboard.row(
-        InlineKeyboardButton(text=f"{current_index + 1}/{len(executors)}", callback_data="None"),
+        InlineKeyboardButton(text=f"{current_index + 1}/{executors_count}", callback_data="None"),
 
     )
 
@@ -60,16 +55,13 @@ def back_to_feed_keyboard() -> InlineKeyboardBuilder:
     return keyboard
 
 
-def favorites_orders_keyboard(orders: list[Order], current_index: int) -> InlineKeyboardBuilder:
+def favorites_orders_keyboard(order: Order, current_index: int, orders_count: int) -> InlineKeyboardBuilder:
     """Клавиатура для вывода избранных заказов"""
     keyboard = InlineKeyboardBuilder()
 
-    # Получаем текущий заказ
-    order = orders[current_index]
-
     keyboard.row(
         InlineKeyboardButton(text="<", callback_data="prev"),
-        InlineKeyboardButton(text=f"{current_index + 1}/{len(orders)}", callback_data="None"),
+        InlineKeyboardButton(text=f"{current_index + 1}/{orders_count}", callback_data="None"),
         InlineKeyboardButton(text=">", callback_data=f"next")
     )
 
@@ -15,6 +15,7 @@ from database.orm import AsyncOrm
 from routers.buttons import commands as cmd, buttons as btn
 from routers.keyboards import menu as kb
 from routers.messages import menu as ms
+from schemas.user import UserContext
 from logger import logger
 
 router = Router()
@@ -31,7 +32,8 @@ router.callback_query.middleware.register(CheckPrivateMessageMiddleware())
 
 @router.callback_query(F.data == "main_menu")
 @router.message(Command(cmd.MENU[0]))
-async def main_menu(message: CallbackQuery | Message, session: Any, state: FSMContext = None):
+async def main_menu(message: CallbackQuery | Message, session: Any, state: FSMContext = None,
+                    user_context: UserContext = None):
     """Главное меню"""
     # Если вернулись с сообщения с фото
     try:
@@ -64,11 +66,13 @@ async def main_menu(message: CallbackQuery | Message, session: Any, state: FSMCo
 
     tg_id = str(message.from_user.id)
 
-    # Получаем роль пользователя
-    user_role: str = await AsyncOrm.get_user_role(tg_id, session)
+    # Загружаем данные пользователя, если меню вызвано не из хендлера (например после смены роли)
+    if not user_context:
+        user_context = await AsyncOrm.get_user_context(tg_id, session)
 
-    # Проверяем админ или нет
-    is_admin: bool = await AsyncOrm.check_is_admin(tg_id, session)
+    # Роль пользователя и админ или нет
+    user_role: str = user_context.role
+    is_admin: bool = user_context.is_admin
 
     # Формируем сообщение
     msg = ms.get_menu_message(user_role)
@@ -94,7 +98,7 @@ async def main_menu(message: CallbackQuery | Message, session: Any, state: FSMCo
 
     # Получаем username из сообщения и БД
     username_from_message = message.from_user.username
-    username_from_db: str = await AsyncOrm.get_username(tg_id, session)
+    username_from_db: str = user_context.username
 
     # Обновляем если username изменился
     if username_from_db != username_from_message:
@@ -20,6 +20,7 @@ from schemas.profession import Profession, Job
 from routers.buttons import buttons as btn
 from utils.datetime_service import get_next_and_prev_month_and_year, convert_str_to_datetime, convert_date_time_to_str
 from utils.validations import is_valid_price
+from utils.messages import message_ref, delete_message, remove_reply_markup
 
 router = Router()
 
@@ -170,7 +171,7 @@ async def create_order_start(callback: CallbackQuery, state: FSMContext, session
     prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "choose_profession", CreateOrder.profession)
@@ -197,7 +198,7 @@ async def get_profession(callback: CallbackQuery, state: FSMContext, session: An
     prev_mess = await callback.message.edit_text(msg, reply_markup=keyboard.as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "select_jobs", CreateOrder.jobs)
@@ -242,7 +243,7 @@ async def get_jobs(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(CreateOrder.title)
@@ -250,17 +251,14 @@ async def get_title(message: Message, state: FSMContext) -> None:
     """Получаем название, запрашиваем ТЗ"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
 
     # Записываем название
     await state.update_data(title=message.text)
@@ -273,7 +271,7 @@ async def get_title(message: Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(CreateOrder.task)
@@ -281,24 +279,21 @@ async def get_task(message: Message, state: FSMContext) -> None:
     """Получаем ТЗ, запрашиваем цену"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не текст
     if not message.text:
         prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
 
     # Если текст длиннее 1000 символов
     if len(message.text) > 1000:
         prev_mess = await message.answer(f"Текст должен быть не более 1000 символов, вы отправили {len(message.text)}",
                                          reply_markup=kb.cancel_keyboard().as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Записываем ТЗ
@@ -315,7 +310,7 @@ async def get_task(message: Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.skip_cancel_keyboard().as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(CreateOrder.price)
@@ -326,17 +321,14 @@ async def get_price(message: Message | CallbackQuery, state: FSMContext) -> None
     if type(message) == Message:
         # Меняем предыдущее сообщение
         data = await state.get_data()
-        try:
-            await data["prev_mess"].edit_text(data["prev_mess"].text)
-        except Exception:
-            pass
+        await remove_reply_markup(message.bot, data.get("prev_mess"))
 
         # Если отправлен не текст
         if not message.text:
             prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                              reply_markup=kb.skip_cancel_keyboard().as_markup())
             # Сохраняем предыдущее сообщение
-            await state.update_data(prev_mess=prev_mess)
+            await state.update_data(prev_mess=message_ref(prev_mess))
             return
 
         # Если ввели не корректное число
@@ -344,7 +336,7 @@ async def get_price(message: Message | CallbackQuery, state: FSMContext) -> None
             prev_mess = await message.answer("Неверный формат данных, необходимо отправить только число без других символов",
                                              reply_markup=kb.skip_cancel_keyboard().as_markup())
             # Сохраняем предыдущее сообщение
-            await state.update_data(prev_mess=prev_mess)
+            await state.update_data(prev_mess=message_ref(prev_mess))
             return
 
         # Записываем цену
@@ -371,7 +363,7 @@ async def get_price(message: Message | CallbackQuery, state: FSMContext) -> None
         prev_mess = await message.message.edit_text(msg, reply_markup=calendar.as_markup())
 
     # Сохраняем предыдущее сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "action", CreateOrder.deadline)
@@ -395,7 +387,7 @@ async def action_calendar(callback: CallbackQuery, state: FSMContext) -> None:
     calendar = kb.calendar_keyboard(year, month, dates_data, need_prev_month=need_prev_month)
     await callback.answer()
     prev_mess = await callback.message.edit_text(text, reply_markup=calendar.as_markup())
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data.split("|")[0] == "select_deadline", CreateOrder.deadline)
@@ -409,10 +401,7 @@ async def get_deadline(callback: CallbackQuery, state: FSMContext) -> None:
     if deadline.date() <= datetime.datetime.now().date():
         # Удаляем сообщение
         data = await state.get_data()
-        try:
-            await data["prev_mess"].delete()
-        except Exception:
-            pass
+        await delete_message(callback.bot, data.get("prev_mess"))
 
         # Готовим клавиатуру
         now_year = datetime.datetime.now().year
@@ -425,7 +414,7 @@ async def get_deadline(callback: CallbackQuery, state: FSMContext) -> None:
         prev_mess = await callback.message.answer(msg, reply_markup=calendar.as_markup())
 
         # Сохраняем сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем дату
@@ -444,7 +433,7 @@ async def get_deadline(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.skip_cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.message(CreateOrder.files)
@@ -452,10 +441,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
     """Вспомогательный хендлер для получения файлов"""
     # Меняем предыдущее сообщение
     data = await state.get_data()
-    try:
-        await data["prev_mess"].edit_text(data["prev_mess"].html_text)
-    except Exception:
-        pass
+    await remove_reply_markup(message.bot, data.get("prev_mess"))
 
     # Если отправлен не файл
     if not message.document:
@@ -469,7 +455,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
                                          ".pdf, .docx, .xlsx, .txt, либо jpeg/jpg/png (отправленные файлом)",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Если фал больше 10МБ
@@ -483,7 +469,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
         prev_mess = await message.answer("Размер файла не должен быть более 100МБ. Отправь файл или нажми \"Продолжить\"",
                                          reply_markup=keyboard.as_markup())
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Проверяем если уже есть три файла
@@ -493,7 +479,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
             reply_markup=kb.continue_cancel_keyboard().as_markup()
         )
         # Сохраняем предыдущее сообщение
-        await state.update_data(prev_mess=prev_mess)
+        await state.update_data(prev_mess=message_ref(prev_mess))
         return
 
     # Сохраняем ids файл в стейт
@@ -513,7 +499,7 @@ async def get_file(message: Message, state: FSMContext) -> None:
     prev_mess = await message.answer(msg, reply_markup=kb.continue_cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(or_f(F.data == "continue", F.data == "skip"), CreateOrder.files)
@@ -531,7 +517,7 @@ async def get_files(callback: CallbackQuery, state: FSMContext) -> None:
     prev_mess = await callback.message.edit_text(msg, reply_markup=kb.skip_cancel_keyboard().as_markup())
 
     # Сохраняем сообщение
-    await state.update_data(prev_mess=prev_mess)
+    await state.update_data(prev_mess=message_ref(prev_mess))
 
 
 @router.callback_query(F.data == "skip", CreateOrder.requirements)
@@ -542,17 +528,14 @@ async def get_requirements(message: Message | CallbackQuery, state: FSMContext,
     if type(message) == Message:
         # Меняем предыдущее сообщение
         data = await state.get_data()
-        try:
-            await data["prev_mess"].edit_text(data["prev_mess"].text)
-        except Exception:
-            pass
+        await remove_reply_markup(message.bot, data.get("prev_mess"))
 
         # Если отправлен не текст
         if not message.text:
             prev_mess = await message.answer("Неверный формат данных, необходимо отправить текст",
                                              reply_markup=kb.skip_cancel_keyboard().as_markup())
             # Сохраняем предыдущее сообщение
-            await state.update_data(prev_mess=prev_mess)
+            await state.update_data(prev_mess=message_ref(prev_mess))
             return
 
         # Записываем требования
@@ -2,7 +2,7 @@ from typing import Any
 
 from aiogram import Router, types, F, Bot
 from aiogram.filters import Command
-from aiogram.types import InlineKeyboardButton, CallbackQuery, Message, FSInputFile
+from aiogram.types import InlineKeyboardButton, CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from middlewares.admin import AdminMiddleware
@@ -13,8 +13,9 @@ from routers.buttons import commands as cmd
 from routers.menu import main_menu
 
 from database.orm import AsyncOrm
-from schemas.user import UserAdd
+from schemas.user import UserAdd, UserContext
 from database.tables import UserRoles
+from utils.telegram_media import answer_photo_cached
 
 from settings import settings
 
@@ -28,15 +29,15 @@ router.callback_query.middleware.register(AdminMiddleware())
 
 
 @router.message(Command(f"{cmd.START[0]}"))
-async def start(message: types.Message, admin: bool, session: Any) -> None:
+async def start(message: types.Message, admin: bool, session: Any, user_context: UserContext) -> None:
     """Старт хендлер"""
     tg_id = str(message.from_user.id)
-    user_exists: bool = await AsyncOrm.check_user_already_exists(tg_id, session)
-    user_has_role: bool = await AsyncOrm.user_has_role(tg_id, session)
+    user_exists: bool = user_context.exists
+    user_has_role: bool = user_context.role is not None
 
     # Если пользователь зарегистрирован и у него выбрана роль
     if user_exists and user_has_role:
-        await main_menu(message, session)
+        await main_menu(message, session, user_context=user_context)
         return
 
     # Если пользователь не первый раз или не выбрана роль
@@ -65,10 +66,12 @@ async def start(message: types.Message, admin: bool, session: Any) -> None:
 
         # Предлагаем выбрать роль
         keyboard = await choose_role_keyboard()
-        roles_image = FSInputFile(settings.local_media_path + "roles.png")
+        roles_image_path = settings.local_media_path + "roles.png"
 
-        await message.answer_photo(
-            photo=roles_image,
+        await answer_photo_cached(
+            message.answer_photo,
+            roles_image_path,
+            session,
             caption="Выбери роль, чтобы продолжить",
             reply_markup=keyboard.as_markup()
         )
@@ -24,3 +24,21 @@ class User(UserAdd):
 
 
 
+
+
+class UserContext(BaseModel):
+    """Данные пользователя для обработки апдейта, загружаются одним запросом"""
+    tg_id: str
+    user_id: int | None = None
+    username: str | None = None
+    role: str | None = None
+    is_banned: bool = False
+    is_admin: bool = False
+    client_id: int | None = None
+    executor_id: int | None = None
+    verified: bool = False
+
+    @property
+    def exists(self) -> bool:
+        """True если пользователь зарегистрирован"""
+        return self.user_id is not None
@@ -36,6 +36,18 @@ class Database(BaseSettings):
     postgres_host: str = Field(..., env='POSTGRES_HOST')
     postgres_port: str = Field(..., env='POSTGRES_PORT')
 
+    # пул соединений asyncpg
+    pool_min_size: int = 2
+    pool_max_size: int = 20
+    pool_max_inactive_connection_lifetime: float = 300.0    # сек. до закрытия простаивающего соединения
+    pool_acquire_timeout: float = 10.0                      # сек. ожидания свободного соединения
+    pool_command_timeout: float = 30.0                      # сек. на выполнение запроса
+
+    # замеры запросов (database/instrumentation.py)
+    slow_query_ms: float = 200                              # мс, более долгие запросы пишутся в лог
+    n_plus_one_threshold: int = 5                           # повторов одного запроса за апдейт до предупреждения N+1
+    n_plus_one_raise: bool = False                          # dev режим: NPlusOneError вместо предупреждения
+
     @property
     def DATABASE_URL(self):
         return f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
@@ -52,10 +64,18 @@ class Settings(BaseSettings):
     s3_access_key: str = Field(..., env='S3_ACCESS_KEY')
     s3_url: str = "https://s3.ru-7.storage.selcloud.ru"
     s3_bucket_name: str = "profile-media"
+    s3_max_workers: int = 8                   # потоков для передачи файлов
+    s3_multipart_threshold_mb: int = 8        # файлы больше передаются multipart
+    s3_multipart_chunksize_mb: int = 8
 
     executors_profile_path: str = "profiles/executors/"
     clients_profile_path: str = "profiles/clients/"
     executors_cv_path: str = "cv/"
+    # MB на диске под фото профилей, давно не использованные удаляются и при запросе скачиваются из S3.
+    # Общий бюджет каталога, каждый из webhook_workers получает media_cache_max_mb / webhook_workers
+    media_cache_max_mb: int = 1024
+    # путей с file_id и версией в памяти процесса (utils/telegram_media.py), остальные читаются из БД
+    media_file_ids_cache_size: int = 10000
 
     # admin panel
     secret_key: str = Field(..., env='SECRET_KEY')
@@ -65,8 +85,52 @@ class Settings(BaseSettings):
 
     timezone: str = "Europe/Moscow"
 
+    # сек. до перечитывания кэша профессий и jobs (правки из админ панели)
+    taxonomy_cache_ttl: int = 300
+
+    # отложенная запись просмотров контактов исполнителей
+    views_flush_interval_ms: int = 1000       # мс между записями пачек
+    views_flush_batch_size: int = 500         # записей в пачке, при накоплении пишется сразу
+    views_queue_size: int = 10000             # максимум событий в очереди
+    views_put_timeout: float = 0.05           # сек. ожидания места в заполненной очереди
+
+    # дневные агрегаты метрик (database/rollups.py)
+    rollups_refresh_interval: int = 300       # сек. между пересчетами
+    rollups_lag: int = 60                     # сек. на запись строк с задержкой, более свежие учитываются позже
+
+    # FSM хранилище: memory - в памяти процесса, redis - общее для нескольких инстансов бота
+    fsm_storage: str = "memory"
+    redis_url: str = "redis://redis:6379/0"
+    fsm_state_ttl: int = 60 * 60 * 24 * 7     # сек. хранения состояния пользователя
+    fsm_data_ttl: int = 60 * 60 * 24 * 7      # сек. хранения данных состояния
+
+    # режим получения апдейтов: polling или webhook
+    bot_mode: str = "polling"
+    webhook_base_url: str = ""                # публичный https адрес бота, по умолчанию https://{domain}
+    webhook_path: str = "/webhook/bot"
+    webhook_secret: str = ""                  # X-Telegram-Bot-Api-Secret-Token, A-Z a-z 0-9 _ -
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    # процессов, слушающих порт через SO_REUSEPORT, больше 1 - только с FSM_STORAGE=redis
+    webhook_workers: int = 1
+
+    # порт HTTP сервера /metrics (Prometheus) в процессе бота без админки, 0 - не запускать.
+    # У webhook воркеров порты metrics_port, metrics_port + 1, ... В multiprocess режиме
+    # (PROMETHEUS_MULTIPROC_DIR) не запускается: метрики всех процессов отдает /metrics админки
+    metrics_port: int = 0
+    metrics_sample_interval: int = 15         # сек. между замерами пула БД, очередей и кэша медиа
+    metrics_fsm_sample_interval: int = 300    # сек. между подсчетами ключей FSM в Redis (SCAN по всей БД)
+    # общий каталог multiprocess метрик: бот и админка пишут в свои подкаталоги (PROMETHEUS_MULTIPROC_DIR),
+    # /metrics админки отдает все подкаталоги. Пусто - только метрики процесса админки
+    metrics_dir: str = ""
+    metrics_token: str = ""                   # Bearer токен для /metrics админки, пусто - /metrics отключен
+
     db: Database = Database()
 
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.webhook_base_url or f'https://{self.domain}'}{self.webhook_path}"
+
     @property
     def languages(self):
         return LANGUAGES
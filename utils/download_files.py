@@ -4,6 +4,7 @@ from aiogram import Bot, types
 
 from settings import settings
 from logger import logger
+from utils.media_cache import media_cache
 
 
 async def load_photo_from_tg(message: types.Message, bot: Bot, local_file_dir: str) -> str:
@@ -20,13 +21,17 @@ async def load_photo_from_tg(message: types.Message, bot: Bot, local_file_dir: s
     try:
         # Получаем фото
         photo = message.photo[-1]
-        # Скачиваем фото в локальную директорию
-        await bot.download(photo.file_id, filepath)
+        # Скачиваем фото во временный файл, кэш медиа заменит им фото, чтобы лента не отдала недокачанное
+        tmp_filepath = f"{filepath}.{os.getpid()}.part"
+        await bot.download(photo.file_id, tmp_filepath)
 
     except Exception as e:
         logger.error(f"Ошибка при скачивании фото пользователя {message.from_user.id} из телеграмма {e}")
         raise
 
+    # Фото регистрируется в кэше медиа и копируется в S3, откуда будет скачано после вытеснения
+    await media_cache.put(f"{local_file_dir}{filename}", tmp_filepath)
+
     return filename
 
 
@@ -0,0 +1,74 @@
+import datetime
+import importlib
+import json
+from typing import Any
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from pydantic import BaseModel
+
+from logger import logger
+from settings import settings
+
+# Модели из этих пакетов можно хранить в данных FSM, они восстанавливаются при чтении из Redis
+FSM_MODELS_PACKAGE = "schemas."
+_MODEL_KEY = "__model__"
+_DATETIME_KEY = "__datetime__"
+# Префикс ключей FSM в Redis
+FSM_KEY_PREFIX = "fsm"
+
+
+def _encode(obj: Any) -> Any:
+    """Модели schemas и даты в JSON. Сообщения телеграм в FSM не хранятся, только ссылки (utils/messages.py)"""
+    if isinstance(obj, BaseModel) and type(obj).__module__.startswith(FSM_MODELS_PACKAGE):
+        return {_MODEL_KEY: f"{type(obj).__module__}:{type(obj).__qualname__}", "data": obj.model_dump(mode="json")}
+    if isinstance(obj, datetime.datetime):
+        return {_DATETIME_KEY: obj.isoformat()}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _decode(obj: dict[str, Any]) -> Any:
+    if _MODEL_KEY in obj:
+        module, name = obj[_MODEL_KEY].split(":")
+        if not module.startswith(FSM_MODELS_PACKAGE):
+            raise ValueError(f"Модель {obj[_MODEL_KEY]} не может храниться в FSM")
+        return getattr(importlib.import_module(module), name).model_validate(obj["data"])
+    if _DATETIME_KEY in obj:
+        return datetime.datetime.fromisoformat(obj[_DATETIME_KEY])
+    return obj
+
+
+def fsm_json_dumps(data: Any) -> str:
+    """Сериализация данных FSM для Redis"""
+    return json.dumps(data, default=_encode, ensure_ascii=False)
+
+
+def fsm_json_loads(raw: str | bytes) -> Any:
+    """Чтение данных FSM из Redis с восстановлением моделей и дат"""
+    return json.loads(raw, object_hook=_decode)
+
+
+def create_fsm_storage() -> BaseStorage:
+    """
+        Создание FSM хранилища по settings.fsm_storage:
+        memory - в памяти процесса (локальный запуск и тесты), redis - общее для всех инстансов бота
+    """
+    if settings.fsm_storage == "memory":
+        return MemoryStorage()
+
+    if settings.fsm_storage == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+
+        storage = RedisStorage.from_url(
+            settings.redis_url,
+            key_builder=DefaultKeyBuilder(prefix=FSM_KEY_PREFIX),
+            state_ttl=settings.fsm_state_ttl,
+            data_ttl=settings.fsm_data_ttl,
+            json_dumps=fsm_json_dumps,
+            json_loads=fsm_json_loads,
+        )
+        logger.info(f"FSM хранилище Redis (ttl состояния {settings.fsm_state_ttl} с, "
+                    f"ttl данных {settings.fsm_data_ttl} с)")
+        return storage
+
+    raise ValueError(f"Неизвестный тип FSM хранилища: {settings.fsm_storage}")
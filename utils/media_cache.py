@@ -0,0 +1,220 @@
+"""
+    Локальный кэш медиа перед S3.
+    Фото, которые лежали на диске до появления кэша, в S3 не загружались. Вытесняются только файлы,
+    копия которых подтверждена в S3, остальные загружаются командой backfill (выполняется при старте бота):
+
+        python -m utils.media_cache backfill
+"""
+import argparse
+import asyncio
+import os
+from collections import OrderedDict
+
+from logger import logger
+from schemas.executor import Executor
+from settings import settings
+from utils.metrics import MEDIA_CACHE_REQUESTS
+from utils.s3_storage import s3_storage
+
+# Каталог внутри root с пустыми файлами-отметками: файл с тем же ключом есть в S3
+CONFIRMED_DIR = ".s3/"
+
+
+class MediaCache:
+    """
+        Локальный кэш медиа перед S3 с ограничением по размеру.
+        Управляет только файлами в каталогах prefixes внутри root (статичные картинки бота не трогаются):
+        при промахе файл скачивается из S3, при превышении max_bytes удаляются давно не использованные файлы (LRU).
+        Удаляются только файлы с отметкой о копии в S3 (CONFIRMED_DIR), без нее файл с диска не удаляется
+    """
+
+    def __init__(self, root: str, prefixes: tuple[str, ...], max_bytes: int):
+        self.root = root
+        self.prefixes = prefixes
+        self.max_bytes = max_bytes
+        self.size = 0
+        # ключ (путь относительно root, он же ключ в S3) -> размер файла, от давно использованных к недавним
+        self._files: OrderedDict[str, int] = OrderedDict()
+        self._downloads: dict[str, asyncio.Future] = {}
+        self._scanned = False
+
+    def path(self, key: str) -> str:
+        """Локальный путь файла"""
+        return self.root + key
+
+    def confirmed_path(self, key: str) -> str:
+        """Путь отметки о копии файла в S3"""
+        return self.root + CONFIRMED_DIR + key
+
+    def keys(self) -> list[str]:
+        """Ключи файлов на диске в каталогах prefixes"""
+        keys = []
+        for prefix in self.prefixes:
+            directory = self.path(prefix)
+            os.makedirs(directory, exist_ok=True)
+            for entry in os.scandir(directory):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    keys.append(prefix + entry.name)
+        return keys
+
+    def scan(self) -> None:
+        """Заполнение индекса файлами, уже лежащими на диске, в порядке последнего доступа"""
+        files: list[tuple[float, str, int]] = []
+        for key in self.keys():
+            try:
+                stat = os.stat(self.path(key))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_atime, key, stat.st_size))
+
+        self._files = OrderedDict((key, size) for _, key, size in sorted(files))
+        self.size = sum(self._files.values())
+        self._scanned = True
+        not_confirmed = sum(not self.is_confirmed(key) for key in self._files)
+        logger.info(f"Кэш медиа: {len(self._files)} файлов, {self.size / 1024 / 1024:.1f} MB, "
+                    f"без копии в S3: {not_confirmed}")
+        self._evict()
+
+    async def get(self, key: str) -> str | None:
+        """Локальный путь файла, при отсутствии файл скачивается из S3. None если файла нет и в S3"""
+        if not self._scanned:
+            self.scan()
+
+        if key in self._files and os.path.exists(self.path(key)):
+            self._files.move_to_end(key)
+            MEDIA_CACHE_REQUESTS.labels("hit").inc()
+            return self.path(key)
+
+        MEDIA_CACHE_REQUESTS.labels("miss").inc()
+
+        # Одновременные запросы одного файла ждут одно скачивание
+        download = self._downloads.get(key)
+        if download is None:
+            download = asyncio.ensure_future(self._download(key))
+            self._downloads[key] = download
+            download.add_done_callback(lambda _: self._downloads.pop(key, None))
+
+        return await asyncio.shield(download)
+
+    async def put(self, key: str, tmp_filepath: str) -> None:
+        """Замена файла записанным во временный файл tmp_filepath, регистрация в кэше и загрузка в S3"""
+        if not self._scanned:
+            self.scan()
+
+        # Новая версия еще не в S3: отметка снимается до замены файла, чтобы его не вытеснил другой процесс
+        self._unconfirm(key)
+        os.replace(tmp_filepath, self.path(key))
+        if key.startswith(self.prefixes):
+            self._add(key, os.path.getsize(self.path(key)))
+        await self.upload(key)
+
+    async def upload(self, key: str) -> bool:
+        """Загрузка файла в S3 и отметка о копии, false если загрузить не удалось"""
+        try:
+            await s3_storage.upload_file(self.path(key), key)
+        except Exception as e:
+            # Файл остается на диске без отметки и не вытесняется, его загрузит backfill
+            logger.error(f"Ошибка при загрузке файла {key} из кэша медиа в s3 хранилище: {e}")
+            return False
+
+        self._confirm(key)
+        return True
+
+    async def backfill(self) -> tuple[int, int]:
+        """Загрузка в S3 файлов на диске без отметки о копии, возвращает (загружено, ошибок)"""
+        keys = [key for key in self.keys() if not self.is_confirmed(key)]
+        # Не больше одновременных загрузок, чем потоков S3
+        semaphore = asyncio.Semaphore(s3_storage.max_workers)
+
+        async def upload(key: str) -> bool:
+            async with semaphore:
+                return await self.upload(key)
+
+        results = await asyncio.gather(*(upload(key) for key in keys))
+        uploaded = sum(results)
+        return uploaded, len(keys) - uploaded
+
+    async def _download(self, key: str) -> str | None:
+        filepath = self.path(key)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        try:
+            await s3_storage.download_file(key, filepath)
+        except Exception as e:
+            MEDIA_CACHE_REQUESTS.labels("error").inc()
+            logger.warning(f"Файл {key} не найден в кэше медиа и не скачан из s3 хранилища: {e}")
+            return None
+
+        self._confirm(key)
+        self._add(key, os.path.getsize(filepath))
+        return filepath
+
+    def is_confirmed(self, key: str) -> bool:
+        """Есть ли копия файла в S3. Проверяется по диску: отметки ставят и снимают все процессы"""
+        return os.path.exists(self.confirmed_path(key))
+
+    def _confirm(self, key: str) -> None:
+        marker = self.confirmed_path(key)
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        open(marker, "a").close()
+
+    def _unconfirm(self, key: str) -> None:
+        try:
+            os.remove(self.confirmed_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _add(self, key: str, size: int) -> None:
+        self.size += size - self._files.pop(key, 0)
+        self._files[key] = size
+        self._evict(keep=key)
+
+    def _evict(self, keep: str | None = None) -> None:
+        """Удаление давно не использованных файлов с копией в S3, пока кэш больше max_bytes"""
+        for key in list(self._files):
+            if self.size <= self.max_bytes:
+                break
+            if key == keep or not self.is_confirmed(key):
+                continue
+
+            self.size -= self._files.pop(key)
+            self._unconfirm(key)
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+
+media_cache = MediaCache(
+    root=settings.local_media_path,
+    prefixes=(settings.executors_profile_path,),
+    # Каталог общий для всех webhook воркеров, а индекс у каждого свой: бюджет делится между ними
+    max_bytes=settings.media_cache_max_mb * 1024 * 1024 // max(1, settings.webhook_workers),
+)
+
+
+async def get_executor_photo_path(executor: Executor) -> str:
+    """Путь до фото профиля исполнителя, дефолтная картинка если фото нет"""
+    if executor.photo:
+        filepath = await media_cache.get(settings.executors_profile_path + f"{executor.tg_id}.jpg")
+        if filepath:
+            return filepath
+
+    # берем дефолтную, если нет фотографии пользователя
+    return settings.local_media_path + "executor.jpg"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Кэш медиа")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backfill", help="загрузка в S3 файлов на диске без копии в S3")
+    parser.parse_args()
+
+    try:
+        uploaded, failed = await media_cache.backfill()
+    finally:
+        s3_storage.close()
+    logger.info(f"Кэш медиа: загружено в S3 {uploaded} файлов, ошибок {failed}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
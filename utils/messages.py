@@ -0,0 +1,34 @@
+from aiogram import Bot
+from aiogram.types import Message
+
+# Ссылка на сообщение в FSM: [chat_id, message_id]
+MessageRef = list[int]
+
+
+def message_ref(message: Message) -> MessageRef:
+    """Ссылка на сообщение для хранения в FSM вместо самого объекта Message"""
+    return [message.chat.id, message.message_id]
+
+
+async def delete_message(bot: Bot, ref: MessageRef | None) -> None:
+    """Удаление сообщения по ссылке из FSM, ошибки игнорируются"""
+    if not ref:
+        return
+
+    chat_id, message_id = ref
+    try:
+        await bot.delete_message(chat_id=chat_id, message_id=message_id)
+    except Exception:
+        pass
+
+
+async def remove_reply_markup(bot: Bot, ref: MessageRef | None) -> None:
+    """Удаление inline клавиатуры у сообщения по ссылке из FSM, ошибки игнорируются"""
+    if not ref:
+        return
+
+    chat_id, message_id = ref
+    try:
+        await bot.edit_message_reply_markup(chat_id=chat_id, message_id=message_id, reply_markup=None)
+    except Exception:
+        pass
@@ -0,0 +1,115 @@
+import collections
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server, multiprocess
+
+from logger import logger
+
+# Время обработки от миллисекунд до таймаута ответа телеграм
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+HANDLER_LATENCY = Histogram(
+    "bot_handler_latency_seconds", "Полное время обработки апдейта", ["handler"], buckets=LATENCY_BUCKETS
+)
+HANDLER_DB_TIME = Histogram(
+    "bot_handler_db_seconds", "Время запросов к БД за апдейт", ["handler"], buckets=LATENCY_BUCKETS
+)
+HANDLER_QUERIES = Histogram(
+    "bot_handler_queries", "Количество запросов к БД за апдейт", ["handler"], buckets=QUERIES_BUCKETS
+)
+HANDLER_TELEGRAM_TIME = Histogram(
+    "bot_handler_telegram_seconds", "Время запросов к Bot API за апдейт", ["handler"], buckets=LATENCY_BUCKETS
+)
+HANDLER_ERRORS = Counter("bot_handler_errors", "Апдейты, завершившиеся исключением", ["handler"])
+
+TELEGRAM_API_LATENCY = Histogram(
+    "bot_telegram_api_latency_seconds", "Время запроса к Bot API", ["method"], buckets=LATENCY_BUCKETS
+)
+TELEGRAM_API_ERRORS = Counter("bot_telegram_api_errors", "Ошибки запросов к Bot API", ["method"])
+
+# Состояние процесса. В multiprocess режиме (PROMETHEUS_MULTIPROC_DIR) livesum суммирует живые процессы,
+# livemax берет максимум - для общих на все процессы значений (Redis, каталог медиа)
+UPDATES_IN_FLIGHT = Gauge("bot_updates_in_flight", "Апдейты в обработке", multiprocess_mode="livesum")
+DB_POOL_CONNECTIONS = Gauge(
+    "bot_db_pool_connections", "Соединения пула asyncpg: in_use - заняты, size - открыты, max - предел",
+    ["state"], multiprocess_mode="livesum"
+)
+FSM_STORAGE_KEYS = Gauge("bot_fsm_storage_keys", "Записей в FSM хранилище", multiprocess_mode="livemax")
+WRITE_BEHIND_QUEUE = Gauge("bot_write_behind_queue", "Событий в очереди отложенной записи", ["queue"],
+                           multiprocess_mode="livesum")
+WRITE_BEHIND_DROPPED = Counter("bot_write_behind_dropped", "Событий, отброшенных при заполненной очереди", ["queue"])
+MEDIA_CACHE_REQUESTS = Counter("bot_media_cache_requests", "Запросы к кэшу медиа: hit, miss, error", ["result"])
+MEDIA_CACHE_BYTES = Gauge("bot_media_cache_bytes", "Размер кэша медиа на диске", multiprocess_mode="livemax")
+
+
+@dataclass
+class UpdateStats:
+    """Счетчики одного апдейта, заполняются сессией БД и сессией бота"""
+    handler: str = "unhandled"
+    queries: int = 0
+    db_time: float = 0.0
+    telegram_time: float = 0.0
+    # количество выполнений по id отпечатка запроса и уже найденные N+1
+    fingerprints: collections.Counter = field(default_factory=collections.Counter)
+    flagged: set[str] = field(default_factory=set)
+
+
+# Счетчики апдейта, который обрабатывается в текущей задаче
+current_update: ContextVar[UpdateStats | None] = ContextVar("current_update", default=None)
+
+
+@contextmanager
+def track_update(handler: str) -> Iterator[UpdateStats]:
+    """Счетчики запросов вне обработки апдейта (бенчмарки, скрипты)"""
+    stats = UpdateStats(handler=handler)
+    token = current_update.set(stats)
+    try:
+        yield stats
+    finally:
+        current_update.reset(token)
+
+
+def record_telegram_request(method: str, elapsed: float, failed: bool) -> None:
+    """Учет запроса к Bot API"""
+    TELEGRAM_API_LATENCY.labels(method).observe(elapsed)
+    if failed:
+        TELEGRAM_API_ERRORS.labels(method).inc()
+
+    stats = current_update.get()
+    if stats is not None:
+        stats.telegram_time += elapsed
+
+
+def observe_update(stats: UpdateStats, started: float, failed: bool) -> None:
+    """Запись счетчиков обработанного апдейта в гистограммы"""
+    HANDLER_LATENCY.labels(stats.handler).observe(time.perf_counter() - started)
+    HANDLER_DB_TIME.labels(stats.handler).observe(stats.db_time)
+    HANDLER_QUERIES.labels(stats.handler).observe(stats.queries)
+    HANDLER_TELEGRAM_TIME.labels(stats.handler).observe(stats.telegram_time)
+    if failed:
+        HANDLER_ERRORS.labels(stats.handler).inc()
+
+
+def process_exited(pid: int) -> None:
+    """Удаление значений livesum/livemax завершившегося процесса из каталога multiprocess метрик"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def start_metrics_server(port: int) -> None:
+    """HTTP сервер /metrics в формате Prometheus в отдельном потоке, port=0 - не запускать"""
+    if not port:
+        return
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Сервер отдал бы метрики только своего процесса, все процессы собирает /metrics админки
+        logger.warning(f"METRICS_PORT={port} не используется в multiprocess режиме, "
+                       f"метрики бота отдает /metrics админки")
+        return
+    start_http_server(port)
+    logger.info(f"Метрики бота доступны на порту {port}")
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import asyncpg
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from database.views_buffer import executor_views_buffer
+from logger import logger
+from settings import settings
+from utils.fsm_storage import FSM_KEY_PREFIX
+from utils.media_cache import media_cache
+from utils.metrics import DB_POOL_CONNECTIONS, FSM_STORAGE_KEYS, WRITE_BEHIND_QUEUE, MEDIA_CACHE_BYTES
+
+
+# Ключей за один вызов SCAN при подсчете ключей FSM
+FSM_SCAN_COUNT = 1000
+
+
+async def fsm_storage_size(storage: BaseStorage) -> int:
+    """
+        Количество записей FSM хранилища: пользователей в памяти или ключей FSM_KEY_PREFIX в Redis.
+        БД Redis может быть общей с другими сервисами, поэтому ключи считаются по префиксу через SCAN, а не dbsize
+    """
+    if isinstance(storage, MemoryStorage):
+        return len(storage.storage)
+    redis = getattr(storage, "redis", None)
+    if redis is not None:
+        count = 0
+        async for _ in redis.scan_iter(match=f"{FSM_KEY_PREFIX}:*", count=FSM_SCAN_COUNT):
+            count += 1
+        return count
+    return 0
+
+
+class MetricsSampler:
+    """
+        Периодическая запись состояния процесса в gauges: соединения пула БД, размер FSM хранилища,
+        очередь отложенной записи просмотров и размер кэша медиа.
+        В multiprocess режиме значения нельзя вычислять при сборе метрик, поэтому они замеряются раз в interval.
+        Ключи FSM в Redis считаются обходом всей БД, поэтому реже - раз в fsm_interval
+    """
+
+    def __init__(self, interval: int, fsm_interval: int):
+        self.interval = interval
+        self.fsm_interval = fsm_interval
+        self._fsm_sampled_at: float | None = None
+        self._pool: asyncpg.Pool | None = None
+        self._storage: BaseStorage | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, pool: asyncpg.Pool, storage: BaseStorage) -> None:
+        self._pool = pool
+        self._storage = storage
+        self._task = asyncio.create_task(self._run(), name="metrics_sampler")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sample(self) -> None:
+        """Один замер всех gauges"""
+        DB_POOL_CONNECTIONS.labels("in_use").set(self._pool.get_size() - self._pool.get_idle_size())
+        DB_POOL_CONNECTIONS.labels("size").set(self._pool.get_size())
+        DB_POOL_CONNECTIONS.labels("max").set(self._pool.get_max_size())
+        WRITE_BEHIND_QUEUE.labels("executor_views").set(executor_views_buffer.depth)
+        MEDIA_CACHE_BYTES.set(media_cache.size)
+
+        now = time.monotonic()
+        if self._fsm_sampled_at is None or now - self._fsm_sampled_at >= self.fsm_interval:
+            self._fsm_sampled_at = now
+            FSM_STORAGE_KEYS.set(await fsm_storage_size(self._storage))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при замере метрик процесса: {e}")
+            await asyncio.sleep(self.interval)
+
+
+metrics_sampler = MetricsSampler(
+    interval=settings.metrics_sample_interval,
+    fsm_interval=settings.metrics_fsm_sample_interval,
+)
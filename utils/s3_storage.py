@@ -1,36 +1,103 @@
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Callable
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 
 from settings import settings
 from logger import logger
 
+MB = 1024 * 1024
 
-async def save_file_to_s3_storage(filepath: str, remote_storage_filepath: str):
-    """Загрузка файла в s3 хранилище"""
-    # Формируем локальный путь до имеющегося файла
-    # local_dir_path = f"{settings.local_media_path}/{local_file_dir}/{filename}"
 
-    # Определяем в какую папку необходимо загрузить файл
-    # s3_bucket_upload_dir = f"{local_file_dir}/{filename}"
+class S3Storage:
+    """
+        Долгоживущий клиент S3.
+        boto3 блокирующий, поэтому передачи выполняются в ограниченном пуле потоков, а не в event loop.
+        Файлы больше s3_multipart_threshold_mb передаются multipart частями с диска, без чтения в память целиком
+    """
 
-    try:
-        # Создаем клиент S3
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=settings.s3_url,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key
+    def __init__(self, max_workers: int, multipart_threshold_mb: int, multipart_chunksize_mb: int):
+        self.max_workers = max_workers
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold_mb * MB,
+            multipart_chunksize=multipart_chunksize_mb * MB,
+            max_concurrency=max_workers,
+            use_threads=True,
         )
-
-        # Загружаем файл
-        s3_client.upload_file(
-            filepath,
-            settings.s3_bucket_name,
-            remote_storage_filepath
+        self._client = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def client(self) -> Any:
+        """Клиент создается один раз, boto3 клиент потокобезопасен"""
+        if self._client is None:
+            self._client = boto3.client(
+                's3',
+                endpoint_url=settings.s3_url,
+                aws_access_key_id=settings.s3_access_key,
+                aws_secret_access_key=settings.s3_secret_key,
+                # соединений не меньше, чем одновременных частей multipart во всех потоках
+                config=Config(max_pool_connections=self.max_workers * 2, retries={"mode": "standard"}),
+            )
+        return self._client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполнение блокирующей функции в пуле потоков S3"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def upload_file(self, filepath: str, key: str) -> None:
+        """Загрузка локального файла в бакет"""
+        await self.run(
+            self.client.upload_file, filepath, settings.s3_bucket_name, key, Config=self.transfer_config
         )
 
+    async def download_file(self, key: str, filepath: str) -> None:
+        """
+            Скачивание файла из бакета на диск.
+            Пишется во временный файл рядом и переименовывается, чтобы не оставить недокачанный файл
+        """
+        tmp_filepath = f"{filepath}.{os.getpid()}.part"
+        try:
+            await self.run(
+                self.client.download_file, settings.s3_bucket_name, key, tmp_filepath, Config=self.transfer_config
+            )
+            os.replace(tmp_filepath, filepath)
+        finally:
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+
+    def close(self) -> None:
+        """Остановка пула потоков, текущие передачи дожидаются завершения"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+s3_storage = S3Storage(
+    max_workers=settings.s3_max_workers,
+    multipart_threshold_mb=settings.s3_multipart_threshold_mb,
+    multipart_chunksize_mb=settings.s3_multipart_chunksize_mb,
+)
+
+
+async def save_file_to_s3_storage(filepath: str, remote_storage_filepath: str):
+    """Загрузка файла в s3 хранилище"""
+    try:
+        await s3_storage.upload_file(filepath, remote_storage_filepath)
+
     except Exception as e:
         logger.error(f"Ошибка при сохранении файла \"{filepath}\" путь {remote_storage_filepath} в s3 хранилище: {e}")
         raise
@@ -45,26 +112,10 @@ async def get_file_from_s3_storage(path: str) -> bytes:
         # Формируем путь до сохраняемого файла
         local_file_path = f"{project_dir}/{settings.local_media_path}{path}"
 
-        # Создаем клиент S3
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=settings.s3_url,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key
-        )
-
-        # Получаем файл
-        response = s3_client.get_object(
-            Bucket=settings.s3_bucket_name,
-            Key=path
-        )
-        binary_data: bytes = response['Body'].read()
-
-        # Сохраняем файл в локальную директорию
-        with open(local_file_path, 'wb') as f:
-            f.write(binary_data)
+        # Скачиваем файл в локальную директорию
+        await s3_storage.download_file(path, local_file_path)
 
-        return binary_data
+        return await s3_storage.run(Path(local_file_path).read_bytes)
 
     except Exception as e:
         logger.error(f"Ошибка при загрузке файла \"{path}\" из s3 хранилища: {e}")
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from database.orm import AsyncOrm
+from logger import logger
+from settings import settings
+from utils.media_cache import media_cache
+
+# file_id последней загруженной версии файла в памяти процесса: путь -> (версия, file_id)
+_file_ids: OrderedDict[str, tuple[str, str]] = OrderedDict()
+# Посчитанные версии: путь -> (mtime, размер, версия), хэш пересчитывается только после изменения файла
+_versions: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+
+
+def _remember(cache: OrderedDict, key: str, value: Any) -> None:
+    """Запись в LRU словарь, сверх settings.media_file_ids_cache_size удаляются давно не использованные"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > settings.media_file_ids_cache_size:
+        cache.popitem(last=False)
+
+
+def read_file_version(filepath: str, known: tuple[int, int, str] | None) -> tuple[int, int, str]:
+    """(mtime, размер, версия) файла, хэш считается, только если mtime или размер отличаются от known"""
+    stat = os.stat(filepath)
+    if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+        return known
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return stat.st_mtime_ns, stat.st_size, f"{stat.st_size}-{digest.hexdigest()}"
+
+
+async def get_file_version(filepath: str) -> str:
+    """
+        Версия файла по размеру и хэшу содержимого. От mtime не зависит: фото, заново скачанное из S3
+        после вытеснения из кэша медиа, отправляется по уже сохраненному file_id.
+        Чтение файла выполняется в потоке, а не в event loop
+    """
+    known = await asyncio.to_thread(read_file_version, filepath, _versions.get(filepath))
+    _remember(_versions, filepath, known)
+    return known[2]
+
+
+async def refetch_file(filepath: str) -> str:
+    """Путь файла, вытесненного из кэша медиа после получения пути: файл заново скачивается из S3"""
+    key = filepath.removeprefix(media_cache.root)
+    if filepath.startswith(media_cache.root) and key.startswith(media_cache.prefixes):
+        refetched = await media_cache.get(key)
+        if refetched:
+            return refetched
+    raise FileNotFoundError(filepath)
+
+
+async def get_file_id(filepath: str, version: str, session: Any) -> str | None:
+    """Получение file_id файла из памяти или БД"""
+    known = _file_ids.get(filepath)
+    if known and known[0] == version:
+        _file_ids.move_to_end(filepath)
+        return known[1]
+
+    file_id = await AsyncOrm.get_media_file_id(filepath, version, session)
+    if file_id:
+        _remember(_file_ids, filepath, (version, file_id))
+    return file_id
+
+
+async def save_file_id(filepath: str, version: str, file_id: str, session: Any) -> None:
+    """Сохранение file_id загруженного файла в память и БД"""
+    _remember(_file_ids, filepath, (version, file_id))
+    await AsyncOrm.save_media_file_id(filepath, version, file_id, session)
+
+
+async def answer_photo_cached(send: Callable[..., Awaitable[Message]], filepath: str, session: Any,
+                              **kwargs: Any) -> Message:
+    """
+        Отправка фото через send (например message.answer_photo).
+        Если файл этой версии уже загружался в телеграм, отправляется его file_id,
+        иначе файл загружается и его file_id сохраняется
+    """
+    try:
+        version = await get_file_version(filepath)
+    except FileNotFoundError:
+        # Другой запрос вытеснил файл из кэша медиа между media_cache.get и отправкой
+        filepath = await refetch_file(filepath)
+        version = await get_file_version(filepath)
+
+    file_id = await get_file_id(filepath, version, session)
+    if file_id:
+        try:
+            return await send(photo=file_id, **kwargs)
+        except TelegramBadRequest as e:
+            # file_id недействителен (например, другой бот), загружаем файл заново
+            logger.warning(f"Не удалось отправить фото {filepath} по file_id: {e}")
+            _file_ids.pop(filepath, None)
+
+    sent = await send(photo=FSInputFile(filepath), **kwargs)
+    await save_file_id(filepath, version, sent.photo[-1].file_id, session)
+    return sent